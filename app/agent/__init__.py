@@ -1,7 +1,8 @@
-from .graph import create_agent_graph
+from .graph import create_agent_graph, get_agent_graph
 from .state import GraphState
 
 __all__ = [
     "create_agent_graph",
+    "get_agent_graph",
     "GraphState",
 ]
@@ -0,0 +1,25 @@
+import time
+from typing import Optional
+from ..config import settings
+from .state import GraphState
+
+
+def start_deadline(seconds: Optional[float]) -> Optional[float]:
+    """Prazo absoluto (time.monotonic) para um turno; None = sem prazo"""
+    return time.monotonic() + seconds if seconds else None
+
+
+def time_left(state: GraphState) -> Optional[float]:
+    deadline = state.get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def classification_deadline(state: GraphState) -> Optional[float]:
+    """
+    Prazo das classificações (sentimento e intenção): o prazo do turno menos
+    CHAT_RESPOND_RESERVE, para que sempre sobre tempo para a resposta.
+    """
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - settings.CHAT_RESPOND_RESERVE
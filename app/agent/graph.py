@@ -1,15 +1,21 @@
 import logging
+import time
+from functools import wraps
 from langgraph.graph import StateGraph, END
+from ..metrics import observe_node
 from .state import GraphState
+from .deadline import time_left
 from .nodes import (
     load_context_node,
     check_integrity_node,
+    detect_trivial_turn_node,
     analyze_sentiment_node,
     analyze_intent_node,
     extract_entities_node,
     filter_availability_node,
     validate_tools_node,
     agent_respond_node,
+    template_respond_node,
     process_directives_node,
     save_session_node,
 )
@@ -17,34 +23,91 @@ from .nodes import (
 logger = logging.getLogger(__name__)
 
 
+def _route_after_fast_path(state: GraphState) -> str:
+    """Turnos triviais de alta confiança pulam o LLM"""
+    return "template" if state.get("template_kind") else "llm"
+
+
+def _route_after_respond(state: GraphState) -> str:
+    """
+    Prazo do /chat esgotado: encerra sem montar nem salvar a resposta de
+    erro (a API devolve 504). Sem prazo (worker) segue o fluxo normal.
+    """
+    if state.get("error") and state.get("deadline") is not None:
+        if state.get("deadline_exceeded") or time_left(state) <= 0:
+            return "deadline"
+    return "continue"
+
+
+def _timed(name: str, node):
+    """Registra a duração do nó no histograma bot_node_duration_seconds"""
+
+    @wraps(node)
+    async def timed_node(state: GraphState) -> GraphState:
+        started = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            observe_node(name, time.perf_counter() - started)
+
+    return timed_node
+
+
 def create_agent_graph():
 
     workflow = StateGraph(GraphState)
 
-    workflow.add_node("load_context", load_context_node)
-    workflow.add_node("check_integrity", check_integrity_node)
-    workflow.add_node("sentiment", analyze_sentiment_node)
-    workflow.add_node("intent", analyze_intent_node)
-    workflow.add_node("extract_entities", extract_entities_node)
-    workflow.add_node("filter_availability", filter_availability_node)
-    workflow.add_node("validate", validate_tools_node)
-    workflow.add_node("respond", agent_respond_node)
-    workflow.add_node("process_directives", process_directives_node)
-    workflow.add_node("save", save_session_node)
+    nodes = {
+        "load_context": load_context_node,
+        "check_integrity": check_integrity_node,
+        "fast_path": detect_trivial_turn_node,
+        "sentiment": analyze_sentiment_node,
+        "intent": analyze_intent_node,
+        "extract_entities": extract_entities_node,
+        "filter_availability": filter_availability_node,
+        "validate": validate_tools_node,
+        "respond": agent_respond_node,
+        "template_respond": template_respond_node,
+        "process_directives": process_directives_node,
+        "save": save_session_node,
+    }
+    for name, node in nodes.items():
+        workflow.add_node(name, _timed(name, node))
 
     workflow.set_entry_point("load_context")
 
     workflow.add_edge("load_context", "check_integrity")
-    workflow.add_edge("check_integrity", "sentiment")
+    workflow.add_edge("check_integrity", "fast_path")
+    workflow.add_conditional_edges(
+        "fast_path",
+        _route_after_fast_path,
+        {"template": "template_respond", "llm": "sentiment"},
+    )
     workflow.add_edge("sentiment", "intent")
     workflow.add_edge("intent", "extract_entities")
     workflow.add_edge("extract_entities", "filter_availability")
     workflow.add_edge("filter_availability", "validate")
     workflow.add_edge("validate", "respond")
-    workflow.add_edge("respond", "process_directives")
+    workflow.add_conditional_edges(
+        "respond",
+        _route_after_respond,
+        {"deadline": END, "continue": "process_directives"},
+    )
+    workflow.add_edge("template_respond", "process_directives")
     workflow.add_edge("process_directives", "save")
     workflow.add_edge("save", END)
 
     graph = workflow.compile()
     logger.info("Grafo otimizado compilado com sucesso")
     return graph
+
+
+_compiled_graph = None
+
+
+def get_agent_graph():
+    """Grafo compilado uma vez por processo (lifespan/startup) e reaproveitado"""
+    global _compiled_graph
+    if _compiled_graph is None:
+        _compiled_graph = create_agent_graph()
+    return _compiled_graph
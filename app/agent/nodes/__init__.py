@@ -1,23 +1,27 @@
 from .load_context import load_context_node
 from .check_integrity import check_integrity_node
+from .fast_path import detect_trivial_turn_node
 from .sentiment import analyze_sentiment_node
 from .intent import analyze_intent_node
 from .extract_entities import extract_entities_node
 from .filter_availability import filter_availability_node
 from .validate import validate_tools_node
 from .respond import agent_respond_node
+from .template_respond import template_respond_node
 from .process_decision import process_directives_node
 from .save import save_session_node
 
 __all__ = [
     "load_context_node",
     "check_integrity_node",
+    "detect_trivial_turn_node",
     "analyze_sentiment_node",
     "analyze_intent_node",
     "extract_entities_node",
     "filter_availability_node",
     "validate_tools_node",
     "agent_respond_node",
+    "template_respond_node",
     "process_directives_node",
     "save_session_node",
 ]
@@ -1,6 +1,7 @@
 import logging
 from ..state import GraphState
 from ...models.customer import CustomerProfile
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -8,7 +9,7 @@ logger = logging.getLogger(__name__)
 async def check_integrity_node(state: GraphState) -> GraphState:
 
     try:
-        logger.info("[CHECK_INTEGRITY] Verificando dados do cliente")
+        logger.info("[CHECK_INTEGRITY] Verificando dados do cliente", extra=SAMPLED)
 
         profile_data = state.get("customer_profile")
 
@@ -24,7 +25,8 @@ async def check_integrity_node(state: GraphState) -> GraphState:
             )
         else:
             logger.info(
-                "[CHECK_INTEGRITY] Dados completos (nome presente). Fluxo liberado."
+                "[CHECK_INTEGRITY] Dados completos (nome presente). Fluxo liberado.",
+                extra=SAMPLED,
             )
 
         return {**state, "is_data_complete": is_complete}
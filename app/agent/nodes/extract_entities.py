@@ -3,13 +3,15 @@ import re
 from datetime import datetime
 from typing import Dict, Any, Optional
 from ..state import GraphState
+from ...tools.entity_gazetteer import EntityGazetteer
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
 
 async def extract_entities_node(state: GraphState) -> GraphState:
     try:
-        logger.info("[EXTRACT] Extraindo entidades da mensagem")
+        logger.info("[EXTRACT] Extraindo entidades da mensagem", extra=SAMPLED)
 
         if not state.get("full_agenda"):
             logger.warning("[EXTRACT] Agenda não carregada, pulando extração")
@@ -18,15 +20,26 @@ async def extract_entities_node(state: GraphState) -> GraphState:
         message = state["user_message"].lower()
         entities: Dict[str, Any] = {}
 
-        entities["service_name"] = _extract_service_name(message, state["full_agenda"])
-        entities["professional_name"] = _extract_professional_name(
-            message, state["full_agenda"]
+        gazetteer = state.get("entity_gazetteer") or EntityGazetteer(
+            state["full_agenda"]
         )
+        matches = gazetteer.find_all(state["user_message"])
+
+        service = EntityGazetteer.best(matches, "service")
+        professional = EntityGazetteer.best(matches, "professional")
+
+        entities["service_id"] = service["id"] if service else None
+        entities["service_name"] = service["name"].lower() if service else None
+        entities["professional_id"] = professional["id"] if professional else None
+        entities["professional_name"] = (
+            professional["name"].lower() if professional else None
+        )
+        entities["entity_matches"] = matches
         entities["date_intent"] = _extract_date_intent(message)
         entities["time_preference"] = _extract_time_preference(message)
         entities["date_specific"] = _extract_specific_date(message)
 
-        logger.info(f"[EXTRACT] Entidades: {entities}")
+        logger.info("[EXTRACT] Entidades: %s", entities, extra=SAMPLED)
 
         return {**state, "extracted_entities": entities}
 
@@ -35,41 +48,6 @@ async def extract_entities_node(state: GraphState) -> GraphState:
         return {**state, "extracted_entities": {}, "error": str(e)}
 
 
-def _extract_service_name(message: str, agenda) -> Optional[str]:
-    for service_id, service_info in agenda.services.items():
-        service_name = service_info.name.lower()
-        service_words = service_name.split()
-
-        for word in service_words:
-            if len(word) > 3 and word in message:
-                return service_name
-
-        if service_name in message:
-            return service_name
-
-    return None
-
-
-def _extract_professional_name(message: str, agenda) -> Optional[str]:
-    for prof_id, prof_info in agenda.professionals.items():
-        prof_name = prof_info.name.lower()
-        first_name = prof_name.split()[0]
-
-        if first_name in message or prof_name in message:
-            return prof_name
-
-        patterns = [
-            rf"\b(dr|dra|doutor|doutora)\s+{first_name}\b",
-            rf"\bcom\s+(o|a)?\s*{first_name}\b",
-        ]
-
-        for pattern in patterns:
-            if re.search(pattern, message):
-                return prof_name
-
-    return None
-
-
 def _extract_date_intent(message: str) -> Optional[str]:
     date_patterns = {
         "hoje": "today",
@@ -0,0 +1,173 @@
+import logging
+import re
+from typing import Dict, List, Optional
+from ..state import GraphState
+from ...tools import intent_tool, sentiment_tool
+from ...models import (
+    Intent,
+    IntentAnalysisResult,
+    Sentiment,
+    SentimentAnalysisResult,
+)
+from ...logging_config import SAMPLED
+
+logger = logging.getLogger(__name__)
+
+
+THANKS_PATTERN = re.compile(
+    r"^(muito\s+)?(obrigad[oa]|obg|valeu|agradeço|grat[oa])"
+    r"(\s+(mesmo|demais|viu))?[\s!.]*$"
+)
+
+ACK_PATTERN = re.compile(
+    r"^(ok|okay|certo|beleza|blz|entendi|entendido|tá bom|ta bom|tudo bem)[\s!.]*$"
+)
+
+NAME_PATTERN = re.compile(r"^[^\W\d_]+(?:[\s'-][^\W\d_]+){0,3}$")
+
+NAME_STOPWORDS = {
+    "sim",
+    "não",
+    "nao",
+    "ok",
+    "oi",
+    "olá",
+    "ola",
+    "bom dia",
+    "boa tarde",
+    "boa noite",
+    "tudo bem",
+    "obrigado",
+    "obrigada",
+}
+
+NAME_REQUEST_MARKERS = ("nome", "name", "nombre")
+
+# Palavras de data, agenda ou preço: a resposta é um pedido, não um nome
+NOT_A_NAME_PATTERN = re.compile(
+    r"\b(hoje|amanh[ãa]|depois|segunda|ter[çc]a|quarta|quinta|sexta|s[áa]bado"
+    r"|domingo|feira|semana|m[êe]s|dia|hor[áa]rio|hora|manh[ãa]|tarde|noite"
+    r"|agendar|agendamento|agenda|marcar|remarcar|reagendar|desmarcar|cancelar"
+    r"|consulta|sess[ãa]o|servi[çc]o|corte|pre[çc]o|valor|quanto|custa|pagamento"
+    r"|pix|cart[ãa]o|quero|queria|gostaria|preciso|pode|tem|vaga)\b"
+)
+
+# Mensagem do bot que espera resposta mesmo sem "?" ("Posso confirmar.")
+AWAITING_ANSWER_PATTERN = re.compile(
+    r"\b(confirm\w*|posso|deseja|gostaria|prefere|qual|quais|escolh\w*"
+    r"|pode ser|me diga|me informe)\b"
+)
+
+
+async def detect_trivial_turn_node(state: GraphState) -> GraphState:
+    """
+    Decide se o turno pode ser respondido por template, sem LLM.
+
+    Só marca o turno quando a classificação é de alta confiança (regex ou
+    heurística determinística); caso contrário segue o fluxo normal.
+    """
+    try:
+        message = state["user_message"].strip()
+        kind = _classify_trivial_turn(message, state)
+
+        if not kind:
+            return {**state, "template_kind": None, "tools_called": []}
+
+        logger.info("[FAST_PATH] Turno trivial detectado: %s", kind, extra=SAMPLED)
+
+        if kind == "handoff":
+            intent_result = IntentAnalysisResult(
+                intent=Intent.HUMAN_HANDOFF, reason="Regex: Handoff"
+            )
+        else:
+            intent_result = IntentAnalysisResult(
+                intent=Intent.INFO, reason=f"Template: {kind}"
+            )
+
+        sentiment_result = sentiment_tool._quick_classify(
+            message
+        ) or SentimentAnalysisResult(
+            sentiment=Sentiment.NEUTRO, score=50, confidence="alta"
+        )
+
+        return {
+            **state,
+            "template_kind": kind,
+            "sentiment_result": sentiment_result,
+            "intent_result": intent_result,
+            "sentiment_analyzed": True,
+            "intent_analyzed": True,
+            "tools_validated": True,
+            "tools_called": ["sentiment", "intent"],
+        }
+
+    except Exception as e:
+        logger.error(f"[FAST_PATH] Erro: {e}", exc_info=True)
+        return {**state, "template_kind": None, "tools_called": []}
+
+
+def _classify_trivial_turn(message: str, state: GraphState) -> Optional[str]:
+    message_lower = message.lower()
+
+    pattern_result = intent_tool._pattern_match(message)
+    if pattern_result and pattern_result.intent == Intent.HUMAN_HANDOFF:
+        return "handoff"
+
+    if THANKS_PATTERN.match(message_lower):
+        kind = "thanks"
+    elif ACK_PATTERN.match(message_lower):
+        kind = "ack"
+    elif pattern_result is None and _is_name_reply(message, message_lower, state):
+        return "name"
+    else:
+        return None
+
+    # Um "ok" depois de uma pergunta pode ser confirmação de horário
+    if _is_awaiting_answer(state.get("recent_history", [])):
+        return None
+
+    return kind
+
+
+def _is_awaiting_answer(recent_history: List[Dict[str, str]]) -> bool:
+    for msg in reversed(recent_history):
+        if msg["role"] == "assistant":
+            content = msg["content"].lower()
+            return "?" in content or bool(AWAITING_ANSWER_PATTERN.search(content))
+    return False
+
+
+def _is_name_reply(message: str, message_lower: str, state: GraphState) -> bool:
+    if state.get("is_data_complete"):
+        return False
+
+    if message_lower in NAME_STOPWORDS or not NAME_PATTERN.match(message):
+        return False
+
+    if NOT_A_NAME_PATTERN.search(message_lower):
+        return False
+
+    gazetteer = state.get("entity_gazetteer")
+    if gazetteer and gazetteer.find_all(message):
+        return False
+
+    last_assistant = next(
+        (
+            msg["content"].lower()
+            for msg in reversed(state.get("recent_history", []))
+            if msg["role"] == "assistant"
+        ),
+        "",
+    )
+    if not any(marker in last_assistant for marker in NAME_REQUEST_MARKERS):
+        return False
+
+    # Se o cliente já pediu horário antes, o LLM precisa ofertar as opções
+    for msg in state.get("chat_history", [])[-6:]:
+        if msg.get("role") != "user":
+            continue
+        intent = msg.get("metadata", {}).get("intent")
+        if intent in (Intent.SCHEDULING.value, Intent.RESCHEDULE.value):
+            return False
+
+    return True
@@ -2,6 +2,7 @@ import logging
 from ..state import GraphState
 from ...tools.availability_tool import availability_tool
 from ...models.scheduling import AvailabilitySearchParams
+from ...logging_config import SAMPLED, lazy
 
 logger = logging.getLogger(__name__)
 
@@ -16,31 +17,37 @@ async def filter_availability_node(state: GraphState) -> GraphState:
     Economia: ~8000 tokens por request
     """
     try:
-        logger.info("[FILTER] Filtrando disponibilidade")
+        logger.info("[FILTER] Filtrando disponibilidade", extra=SAMPLED)
 
         intent = state["intent_result"].intent
         entities = state.get("extracted_entities", {})
 
         if intent not in ["SCHEDULING", "RESCHEDULE"]:
-            logger.info("[FILTER] Intent não requer filtragem de agenda")
+            logger.info("[FILTER] Intent não requer filtragem de agenda", extra=SAMPLED)
             return {**state, "filtered_agenda": None}
 
         search_params = AvailabilitySearchParams(
+            service_id=entities.get("service_id"),
             service_name=entities.get("service_name"),
+            professional_id=entities.get("professional_id"),
             professional_name=entities.get("professional_name"),
             date=entities.get("date_specific"),
             time_preference=entities.get("time_preference"),
             max_results=3,
         )
 
-        logger.info(f"[FILTER] Params: {search_params.model_dump()}")
+        logger.info(
+            "[FILTER] Params: %s", lazy(search_params.model_dump), extra=SAMPLED
+        )
 
         filtered = availability_tool.filter_availability(
             agenda=state["full_agenda"], params=search_params
         )
 
         if filtered.options:
-            logger.info(f"[FILTER] {len(filtered.options)} opções encontradas")
+            logger.info(
+                "[FILTER] %d opções encontradas", len(filtered.options), extra=SAMPLED
+            )
         else:
             logger.warning("[FILTER] Nenhuma opção disponível")
 
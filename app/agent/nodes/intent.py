@@ -1,7 +1,9 @@
 import logging
 from ..state import GraphState
+from ..deadline import classification_deadline
 from ...tools import intent_tool
 from ...models import IntentAnalysisResult, Intent
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +15,7 @@ async def analyze_intent_node(state: GraphState) -> GraphState:
     Usa patterns + LLM para classificar intenção
     """
     try:
-        logger.info("[INTENT] Analisando intenção de pagamento")
+        logger.info("[INTENT] Analisando intenção de pagamento", extra=SAMPLED)
 
         # Chama a tool
         result = await intent_tool.analyze(
@@ -21,9 +23,12 @@ async def analyze_intent_node(state: GraphState) -> GraphState:
             recent_history=state["recent_history"],
             # CORREÇÃO 1: Use 'customer_profile' que é a chave correta no GraphState
             customer_context=state["customer_profile"],
+            deadline=classification_deadline(state),
         )
 
-        logger.info(f"[INTENT] Resultado: {result.intent} - {result.reason}")
+        logger.info(
+            "[INTENT] Resultado: %s - %s", result.intent, result.reason, extra=SAMPLED
+        )
 
         # Atualiza estado
         return {
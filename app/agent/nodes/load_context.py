@@ -1,51 +1,111 @@
+import hashlib
+import json
 import logging
 from datetime import datetime
+from typing import Any, Dict
 from ..state import GraphState
+from ...database import cache
 from ...models.scheduling import FullAgenda
 from ...services import session_service
+from ...tools.entity_gazetteer import EntityGazetteer
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
+COMPILED_AGENDA_TTL = 600
 
-async def load_context_node(state: GraphState) -> GraphState:
-    try:
-        logger.info(f"[LOAD_CONTEXT] Iniciando sessao {state['session_id']}")
+HISTORY_WINDOW = 6
+RECENT_HISTORY_SIZE = 4
 
-        full_agenda = FullAgenda(**state["company_agenda"])
 
+async def load_context_node(state: GraphState) -> GraphState:
+    try:
         logger.info(
-            f"[LOAD_CONTEXT] Agenda carregada: "
-            f"{len(full_agenda.professionals)} profissionais, "
-            f"{len(full_agenda.services)} servicos"
+            "[LOAD_CONTEXT] Iniciando sessao %s", state["session_id"], extra=SAMPLED
         )
 
-        session = await session_service.get_or_create_session(
-            session_id=state["session_id"],
-            company_id=state["company_id"],
-            customer_context=state["customer_profile"],
+        full_agenda, gazetteer = _load_compiled_agenda(
+            state["company_id"], state["company_agenda"]
         )
 
-        recent_history = await session_service.get_recent_history(
-            session_id=state["session_id"], n=4
+        logger.info(
+            "[LOAD_CONTEXT] Agenda carregada: %d profissionais, %d servicos",
+            len(full_agenda.professionals),
+            len(full_agenda.services),
+            extra=SAMPLED,
         )
 
+        # O endpoint/worker normalmente já carregou a sessão (1 round-trip)
+        session = state.get("session_context")
+        if session is None:
+            session = await session_service.load_session_context(
+                session_id=state["session_id"],
+                company_id=state["company_id"],
+                customer_context=state["customer_profile"],
+                n=HISTORY_WINDOW,
+            )
+
+        messages = session.get("messages", [])
         recent_formatted = [
-            {"role": msg["role"], "content": msg["content"]} for msg in recent_history
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in messages[-RECENT_HISTORY_SIZE:]
         ]
 
         logger.info(
-            f"[LOAD_CONTEXT] Historico: {len(session.get('messages', []))} msgs, "
-            f"Recente: {len(recent_formatted)} msgs"
+            "[LOAD_CONTEXT] Historico: %s interacoes, Recente: %d msgs",
+            session.get("summary", {}).get("total_interactions", 0),
+            len(recent_formatted),
+            extra=SAMPLED,
         )
 
         return {
             **state,
             "full_agenda": full_agenda,
+            "entity_gazetteer": gazetteer,
             "filtered_agenda": None,
-            "chat_history": session.get("messages", []),
+            "chat_history": messages,
             "recent_history": recent_formatted,
+            "last_kanban_status": session.get("summary", {}).get("last_kanban_status"),
         }
 
     except Exception as e:
         logger.error(f"[LOAD_CONTEXT] Erro: {e}", exc_info=True)
         return {**state, "error": str(e)}
+
+
+def _load_compiled_agenda(company_id: str, agenda: Dict[str, Any]):
+    """
+    Valida a agenda e compila o gazetteer de entidades uma vez por versão.
+
+    A agenda validada é cacheada pelo hash do payload completo; o gazetteer
+    só depende do catálogo (serviços + profissionais), então usa um hash
+    próprio e sobrevive a mudanças de disponibilidade.
+    """
+    agenda_hash = _hash_payload(agenda)
+    agenda_key = f"agenda:{company_id}:{agenda_hash}"
+
+    full_agenda = cache.get(agenda_key)
+    if full_agenda is None:
+        full_agenda = FullAgenda(**agenda)
+        cache.set(agenda_key, full_agenda, COMPILED_AGENDA_TTL)
+
+    catalog_hash = _hash_payload(
+        {
+            "services": agenda.get("services"),
+            "professionals": agenda.get("professionals"),
+        }
+    )
+    gazetteer_key = f"gazetteer:{company_id}:{catalog_hash}"
+
+    gazetteer = cache.get(gazetteer_key)
+    if gazetteer is None:
+        gazetteer = EntityGazetteer(full_agenda)
+        cache.set(gazetteer_key, gazetteer, COMPILED_AGENDA_TTL)
+        logger.info(f"[LOAD_CONTEXT] Gazetteer compilado para {company_id}")
+
+    return full_agenda, gazetteer
+
+
+def _hash_payload(payload: Any) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.md5(raw).hexdigest()
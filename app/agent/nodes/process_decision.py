@@ -1,6 +1,7 @@
 import logging
 from ..state import GraphState
 from ...models import ChatResponse, Directives, KanbanStatus
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +15,10 @@ async def process_directives_node(state: GraphState) -> GraphState:
         kanban_status = raw.get("kanban_status", KanbanStatus.EM_ATENDIMENTO)
 
         logger.info(
-            f"[PROCESS] Processando diretiva: type={directives_type}, kanban={kanban_status}"
+            "[PROCESS] Processando diretiva: type=%s, kanban=%s",
+            directives_type,
+            kanban_status,
+            extra=SAMPLED,
         )
 
         if directives_type == "appointment_confirmation":
@@ -105,9 +109,14 @@ async def process_directives_node(state: GraphState) -> GraphState:
             },
         )
 
+        if state.get("template_kind"):
+            final_response.metadata["template"] = state["template_kind"]
+
         logger.info(
-            f"[PROCESS] Resposta final: directive={directives.type}, "
-            f"kanban={final_response.kanban_status}"
+            "[PROCESS] Resposta final: directive=%s, kanban=%s",
+            directives.type,
+            final_response.kanban_status,
+            extra=SAMPLED,
         )
 
         return {**state, "final_response": final_response}
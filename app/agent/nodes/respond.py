@@ -3,8 +3,10 @@ import json
 from ..state import GraphState
 from ..prompts import build_optimized_prompt
 from ...services import openai_service
+from ...services.openai_resilience import DeadlineExceeded
 from ...services.usage_service import usage_service
 from ...tools.availability_tool import availability_tool
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +14,7 @@ logger = logging.getLogger(__name__)
 async def agent_respond_node(state: GraphState) -> GraphState:
 
     try:
-        logger.info("[RESPOND] Gerando resposta do agente")
+        logger.info("[RESPOND] Gerando resposta do agente", extra=SAMPLED)
 
         agenda_context = _build_agenda_context(state)
 
@@ -36,6 +38,7 @@ async def agent_respond_node(state: GraphState) -> GraphState:
             messages=messages,
             temperature=0.2,
             response_format={"type": "json_object"},
+            deadline=state.get("deadline"),
         )
 
         content = response["content"]
@@ -68,8 +71,11 @@ async def agent_respond_node(state: GraphState) -> GraphState:
         )
 
         logger.info(
-            f"[RESPOND] Tokens usados: {prompt_tokens} input + "
-            f"{completion_tokens} output = {prompt_tokens + completion_tokens} total"
+            "[RESPOND] Tokens usados: %d input + %d output = %d total",
+            prompt_tokens,
+            completion_tokens,
+            prompt_tokens + completion_tokens,
+            extra=SAMPLED,
         )
 
         return {
@@ -79,6 +85,10 @@ async def agent_respond_node(state: GraphState) -> GraphState:
             "completion_tokens": completion_tokens,
         }
 
+    except DeadlineExceeded as e:
+        logger.warning(f"[RESPOND] Prazo esgotado: {e}")
+        return {**state, "error": str(e), "deadline_exceeded": True}
+
     except Exception as e:
         logger.error(f"[RESPOND] Erro crítico: {e}", exc_info=True)
         return {**state, "error": str(e)}
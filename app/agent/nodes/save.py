@@ -42,12 +42,9 @@ async def save_session_node(state: GraphState) -> GraphState:
             },
         )
 
-        await session_service.append_messages(
-            session_id=state["session_id"], messages=[user_message, assistant_message]
-        )
+        uow = session_service.unit_of_work(state["session_id"])
 
-        await session_service.update_summary(
-            session_id=state["session_id"],
+        uow.append_messages([user_message, assistant_message]).update_summary(
             sentiment=(
                 get_value(state["sentiment_result"].sentiment)
                 if state.get("sentiment_result")
@@ -62,6 +59,9 @@ async def save_session_node(state: GraphState) -> GraphState:
             rag_hit=False,
         )
 
+        # Um único update atômico por turno
+        await session_service.commit(uow)
+
         return state
 
     except Exception as e:
@@ -1,6 +1,8 @@
 import logging
 from ..state import GraphState
+from ..deadline import classification_deadline
 from ...tools import sentiment_tool
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -13,16 +15,21 @@ async def analyze_sentiment_node(state: GraphState) -> GraphState:
     Usa heurísticas + LLM para classificar sentimento
     """
     try:
-        logger.info("[SENTIMENT] Analisando sentimento")
+        logger.info("[SENTIMENT] Analisando sentimento", extra=SAMPLED)
 
         # Chama a tool
         result = await sentiment_tool.analyze(
-            message=state["user_message"], recent_history=state["recent_history"]
+            message=state["user_message"],
+            recent_history=state["recent_history"],
+            deadline=classification_deadline(state),
         )
 
         logger.info(
-            f"[SENTIMENT] Resultado: {result.sentiment} "
-            f"(score: {result.score}, confiança: {result.confidence})"
+            "[SENTIMENT] Resultado: %s (score: %s, confiança: %s)",
+            result.sentiment,
+            result.score,
+            result.confidence,
+            extra=SAMPLED,
         )
 
         # Atualiza estado
@@ -0,0 +1,55 @@
+import logging
+from ..state import GraphState
+from ..prompts import build_template_response
+from ...models import KanbanStatus
+from ...logging_config import SAMPLED
+
+logger = logging.getLogger(__name__)
+
+
+async def template_respond_node(state: GraphState) -> GraphState:
+    """
+    Responde turnos triviais com templates por idioma.
+
+    Produz o mesmo formato de `llm_response_raw` que o nó de resposta,
+    então diretivas e kanban seguem pelo process_directives normalmente.
+    Não consome tokens.
+    """
+    try:
+        kind = state["template_kind"]
+        nome = state["user_message"].strip().title() if kind == "name" else None
+
+        response_text = build_template_response(
+            kind=kind, config=state["company_config"], nome=nome
+        )
+
+        directives = {"type": "normal"}
+
+        if kind == "handoff":
+            kanban_status = KanbanStatus.HANDOFF_HUMANO.value
+        elif kind == "name":
+            kanban_status = KanbanStatus.EM_ATENDIMENTO.value
+            directives = {"type": "update_user", "payload_update": {"nome": nome}}
+        else:
+            kanban_status = (
+                state.get("last_kanban_status") or KanbanStatus.EM_ATENDIMENTO.value
+            )
+
+        logger.info(
+            "[TEMPLATE] Resposta por template: %s (0 tokens)", kind, extra=SAMPLED
+        )
+
+        return {
+            **state,
+            "llm_response_raw": {
+                "response_text": response_text,
+                "kanban_status": kanban_status,
+                "directives": directives,
+            },
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    except Exception as e:
+        logger.error(f"[TEMPLATE] Erro: {e}", exc_info=True)
+        return {**state, "error": str(e)}
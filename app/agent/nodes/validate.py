@@ -1,5 +1,6 @@
 import logging
 from ..state import GraphState
+from ...logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,7 @@ async def validate_tools_node(state: GraphState) -> GraphState:
     Se alguma validação falhar, PARA o fluxo com erro.
     """
     try:
-        logger.info("[VALIDATE] Validando execução das tools")
+        logger.info("[VALIDATE] Validando execução das tools", extra=SAMPLED)
 
         # Validações
         errors = []
@@ -58,9 +59,12 @@ async def validate_tools_node(state: GraphState) -> GraphState:
             return {**state, "tools_validated": False, "error": "; ".join(errors)}
 
         # ✅ VALIDAÇÃO OK
-        logger.info("[VALIDATE] ✅ Tools validadas com sucesso")
-        logger.info(f"  - Sentiment: {state['sentiment_result'].sentiment}")
-        logger.info(f"  - Intent: {state['intent_result'].intent}")
+        logger.info(
+            "[VALIDATE] ✅ Tools validadas com sucesso (sentiment: %s, intent: %s)",
+            state["sentiment_result"].sentiment,
+            state["intent_result"].intent,
+            extra=SAMPLED,
+        )
 
         return {**state, "tools_validated": True}
 
@@ -538,3 +538,45 @@ def _get_data_protocol_es(is_complete: bool) -> str:
     LIBERADO PARA AGENDAMIENTO: Enfócate en cerrar la cita.
     Puedes solicitar email si deseas, pero es opcional.
     """
+
+
+TEMPLATE_RESPONSES = {
+    "pt-BR": {
+        "handoff": "Claro! Vou chamar um atendente para continuar com você. Só um instante.",
+        "thanks": "Eu que agradeço! Se precisar de algo, é só chamar.",
+        "ack": "Combinado! Fico à disposição se precisar de mais alguma coisa.",
+        "name": "Prazer, {nome}! Como posso te ajudar com seu agendamento?",
+    },
+    "en-US": {
+        "handoff": "Sure! I'll bring in a team member to continue with you. Just a moment.",
+        "thanks": "You're welcome! If you need anything else, just let me know.",
+        "ack": "Great! I'm here if you need anything else.",
+        "name": "Nice to meet you, {nome}! How can I help with your appointment?",
+    },
+    "es-LA": {
+        "handoff": "¡Claro! Voy a llamar a un asesor para que continúe contigo. Un momento.",
+        "thanks": "¡Con gusto! Si necesitas algo más, aquí estoy.",
+        "ack": "¡Perfecto! Quedo atento si necesitas algo más.",
+        "name": "¡Mucho gusto, {nome}! ¿Cómo puedo ayudarte con tu cita?",
+    },
+}
+
+TEMPLATE_EMOJIS = {
+    "handoff": " 🙋",
+    "thanks": " 😊",
+    "ack": " 👍",
+    "name": " 😊",
+}
+
+
+def build_template_response(kind: str, config: dict, nome: str = None) -> str:
+    """Monta resposta determinística (sem LLM) para turnos triviais"""
+    idioma = config.get("idioma", "pt-BR")
+    templates = TEMPLATE_RESPONSES.get(idioma, TEMPLATE_RESPONSES["pt-BR"])
+
+    text = templates[kind].format(nome=nome or "")
+
+    if config.get("uso_emojis", True):
+        text += TEMPLATE_EMOJIS.get(kind, "")
+
+    return text
@@ -9,6 +9,8 @@ class GraphState(TypedDict):
     company_id: str
     session_id: str
     user_message: str
+    # Prazo do turno em time.monotonic(); None no worker (ninguém esperando)
+    deadline: Optional[float]
 
     company_config: Dict[str, Any]
     company_agenda: Dict[str, Any]
@@ -16,7 +18,9 @@ class GraphState(TypedDict):
 
     full_agenda: Optional[FullAgenda]
     filtered_agenda: Optional[FilteredAgenda]
+    entity_gazetteer: Optional[Any]
 
+    session_context: Optional[Dict[str, Any]]
     chat_history: List[Dict]
     recent_history: List[Dict]
 
@@ -28,6 +32,8 @@ class GraphState(TypedDict):
     tools_validated: bool
 
     is_data_complete: bool
+    last_kanban_status: Optional[str]
+    template_kind: Optional[str]
 
     extracted_entities: Dict[str, Any]
 
@@ -37,5 +43,7 @@ class GraphState(TypedDict):
     prompt_tokens: int
     completion_tokens: int
     error: Optional[str]
+    # O LLM desistiu por falta de prazo (DeadlineExceeded); a API responde 504
+    deadline_exceeded: bool
 
     llm_response_raw: Dict[str, Any]
@@ -1,10 +1,25 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Literal, Optional, Tuple
 
 
 class Settings(BaseSettings):
     MONGODB_URI: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "scheduling_bot"
+    # Pool por processo: some as conexões de todos os workers uvicorn/arq
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None
+    # zstd/zlib nativos; snappy exige o pacote python-snappy
+    MONGODB_COMPRESSORS: str = "zstd"
+    MONGODB_RETRY_WRITES: bool = True
+    # Listagens e /metrics/* toleram réplica um pouco atrasada
+    MONGODB_LISTING_READ_PREFERENCE: Literal[
+        "primary",
+        "primaryPreferred",
+        "secondary",
+        "secondaryPreferred",
+        "nearest",
+    ] = "secondaryPreferred"
 
     OPENAI_API_KEY: str
 
@@ -16,25 +31,83 @@ class Settings(BaseSettings):
 
     ENVIRONMENT: str = "development"
     LOG_LEVEL: str = "INFO"
+    # text | json; LOG_QUEUE tira a escrita do event loop (thread dedicada)
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    LOG_QUEUE: bool = True
+    # Fração das requisições que registram o falatório por mensagem
+    LOG_SAMPLE_RATE: float = 1.0
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
 
     MAX_TOKENS: int = 1000
     TEMPERATURE: float = 0.2
     EMBEDDING_DIMENSIONS: int = 512
+    EMBEDDING_STORAGE: Literal["float", "float32", "int8"] = "float"
     RAG_TOP_K: int = 5
     RAG_MIN_SCORE: float = 0.3
+    # Fração mínima do peso dos termos da query que um hit do BM25 deve cobrir
+    RAG_LEXICAL_MIN_COVERAGE: float = 0.5
 
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     LLM_MODEL: str = "gpt-4o"
     TOOL_MODEL: str = "gpt-4o-mini"
 
     SESSION_TTL_DAYS: int = 30
+    SESSION_RECENT_MESSAGES: int = 20
+    SESSION_HISTORY_CAP: int = 50
+    MESSAGE_BUCKET_SIZE: int = 50
+
+    INGEST_CHUNK_SIZE: int = 1000
+    INGEST_BATCH_MAX_TOKENS: int = 100000
+    INGEST_BATCH_MAX_ITEMS: int = 2048
+    INGEST_EMBEDDING_CONCURRENCY: int = 4
+    # Job em `running` sem checkpoint há mais que isso é tido como órfão
+    INGEST_JOB_STALE_SECONDS: int = 600
+
+    SESSION_LOCK_TTL: float = 60.0
+    SESSION_LOCK_WAIT_TIMEOUT: float = 30.0
+
+    COMPANY_CONFIG_CACHE_TTL: int = 300
+    # Intervalo máximo para ver invalidações de cache feitas por outro processo
+    CACHE_GENERATION_SYNC_SECONDS: float = 5.0
+    COMPANY_CONFIG_CHANGE_STREAM: bool = False
 
     OPENAI_TIMEOUT: float = 30.0
+    # Outro endpoint compatível (ex.: servidor falso externo); None = API oficial
+    OPENAI_BASE_URL: Optional[str] = None
+
+    # "fake" troca a OpenAI por um backend local determinístico (carga/benchmarks)
+    LLM_BACKEND: Literal["openai", "fake"] = "openai"
+    FAKE_LLM_LATENCY_MEDIAN_MS: float = 400.0
+    FAKE_LLM_LATENCY_P95_MS: float = 1200.0
+    FAKE_EMBEDDING_LATENCY_MEDIAN_MS: float = 40.0
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_SEED: int = 0
+
+    # Prazo total de um turno do /chat e quanto dele fica reservado à resposta
+    CHAT_DEADLINE_SECONDS: float = 20.0
+    CHAT_RESPOND_RESERVE: float = 8.0
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_RETRY_BUDGET: float = 25.0
+    OPENAI_RETRY_BASE_DELAY: float = 0.5
+    OPENAI_BREAKER_FAILURES: int = 5
+    OPENAI_BREAKER_COOLDOWN: float = 30.0
+    OPENAI_HEDGING: bool = False
+
+    # Cota por modelo, ex.: {"gpt-4o": [500, 30000]} (RPM, TPM); 0 = sem limite
+    OPENAI_RATE_LIMITS: Dict[str, Tuple[int, int]] = {}
+    OPENAI_DEFAULT_RPM: int = 0
+    OPENAI_DEFAULT_TPM: int = 0
+    OPENAI_RATE_LIMIT_MAX_WAIT: float = 20.0
 
     MAX_REQUESTS_PER_MINUTE: int = 100
     MAX_REQUESTS_PER_SECOND: int = 10
+    MAX_INFLIGHT_CHATS: int = 32
+    ADMISSION_QUEUE_TIMEOUT: float = 0.5
+    CHAT_OVERFLOW_TO_QUEUE: bool = False
+
+    # Porta do /metrics do worker (a API expõe em GET /metrics); None = desligado
+    WORKER_METRICS_PORT: Optional[int] = None
 
     class Config:
         env_file = ".env"
@@ -2,15 +2,47 @@ from typing import Any, Optional
 from datetime import datetime, timedelta
 import logging
 import threading
+import time
+from ..config import settings
+from ..metrics import observe_cache
 
 logger = logging.getLogger(__name__)
 
 
+# A cada N escritas, remove entradas expiradas (inclusive as de gerações antigas)
+SWEEP_INTERVAL = 1000
+
+SHARED_GENERATION_PREFIX = "cache:generation:"
+
+
 class MemoryCache:
+    """
+    Cache em memória com TTL e namespaces versionados.
+
+    Chaves de um namespace embutem a geração atual dele
+    (`namespace_key("rag:c1", k)` -> `rag:c1@3:k`). `invalidate_namespace`
+    só incrementa o contador: as entradas antigas deixam de ser endereçáveis
+    na hora, sem varrer chaves, e saem da memória pelo TTL.
+
+    O contador local só vale para este processo. Namespaces invalidados por
+    outro processo (ex.: ingestão no worker, busca na API) usam também a
+    geração compartilhada no Redis: `invalidate_shared_namespace` faz INCR e
+    `sync_namespace` a lê no máximo a cada CACHE_GENERATION_SYNC_SECONDS.
+    Sem Redis, o atraso entre processos volta a ser o TTL das entradas.
+    """
+
     def __init__(self):
         self._cache: dict = {}
         self._ttls: dict = {}
+        self._generations: dict = {}
+        self._shared_generations: dict = {}
+        self._synced_at: dict = {}
+        self._writes_since_sweep = 0
         self._lock = threading.RLock()
+        self._redis = None
+
+    def set_redis(self, redis):
+        self._redis = redis
 
     def get(self, key: str) -> Optional[Any]:
         with self._lock:
@@ -18,23 +50,92 @@ class MemoryCache:
                 if datetime.now() > self._ttls[key]:
                     self._cache.pop(key, None)
                     self._ttls.pop(key, None)
+                    observe_cache(key, hit=False)
                     return None
-            return self._cache.get(key)
+            value = self._cache.get(key)
+            observe_cache(key, hit=value is not None)
+            return value
 
     def set(self, key: str, value: Any, ttl_seconds: int = 3600):
         with self._lock:
             self._cache[key] = value
             self._ttls[key] = datetime.now() + timedelta(seconds=ttl_seconds)
 
+            self._writes_since_sweep += 1
+            if self._writes_since_sweep >= SWEEP_INTERVAL:
+                self._writes_since_sweep = 0
+                self.cleanup_expired()
+
     def delete(self, key: str):
         with self._lock:
             self._cache.pop(key, None)
             self._ttls.pop(key, None)
 
+    def namespace_key(self, namespace: str, key: str) -> str:
+        with self._lock:
+            generation = self._generations.get(namespace, 0)
+            shared = self._shared_generations.get(namespace)
+        if shared is not None:
+            return f"{namespace}@{generation}.{shared}:{key}"
+        return f"{namespace}@{generation}:{key}"
+
+    def invalidate_namespace(self, namespace: str):
+        """Invalida todas as chaves do namespace em O(1)"""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def invalidate_shared_namespace(self, namespace: str):
+        """Invalida o namespace aqui e publica a nova geração para os demais processos"""
+        self.invalidate_namespace(namespace)
+        if self._redis is None:
+            return
+
+        try:
+            shared = int(await self._redis.incr(SHARED_GENERATION_PREFIX + namespace))
+        except Exception as e:
+            logger.warning(
+                f"[CACHE] Redis indisponível ({e}). Invalidação de {namespace} "
+                "só neste processo; os demais esperam o TTL."
+            )
+            return
+
+        with self._lock:
+            self._shared_generations[namespace] = shared
+            self._synced_at[namespace] = time.monotonic()
+
+    async def sync_namespace(self, namespace: str):
+        """Adota a geração publicada por outro processo (lida no máximo a cada N s)"""
+        if self._redis is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            synced_at = self._synced_at.get(namespace)
+            if (
+                synced_at is not None
+                and now - synced_at < settings.CACHE_GENERATION_SYNC_SECONDS
+            ):
+                return
+            self._synced_at[namespace] = now
+
+        try:
+            shared = await self._redis.get(SHARED_GENERATION_PREFIX + namespace)
+        except Exception as e:
+            logger.warning(
+                f"[CACHE] Redis indisponível ({e}). Geração local de {namespace}."
+            )
+            return
+
+        with self._lock:
+            self._shared_generations[namespace] = int(shared) if shared else 0
+
     def clear(self):
         with self._lock:
             self._cache.clear()
             self._ttls.clear()
+            self._generations.clear()
+            self._shared_generations.clear()
+            self._synced_at.clear()
 
     def cleanup_expired(self):
         with self._lock:
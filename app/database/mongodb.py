@@ -2,9 +2,16 @@ from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from typing import Optional
 import logging
 from pymongo.errors import OperationFailure
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
 import re
 from ..config import settings
-from ..schemas import CompanyKnowledgeBase, ChatSession
+from ..metrics import MongoCommandMetrics, MongoPoolMetrics
+from ..schemas import (
+    CompanyKnowledgeBase,
+    ChatSession,
+    ChatMessageBucket,
+    KnowledgeIngestionJob,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +24,7 @@ def mask_uri(uri: str) -> str:
 class MongoDB:
     client: Optional[AsyncIOMotorClient] = None
     db: Optional[AsyncIOMotorDatabase] = None
+    listing_db: Optional[AsyncIOMotorDatabase] = None
 
     @classmethod
     async def connect(cls):
@@ -27,8 +35,20 @@ class MongoDB:
                 settings.MONGODB_URI,
                 serverSelectionTimeoutMS=5000,
                 connectTimeoutMS=10000,
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+                compressors=settings.MONGODB_COMPRESSORS or None,
+                retryWrites=settings.MONGODB_RETRY_WRITES,
+                event_listeners=[MongoCommandMetrics(), MongoPoolMetrics()],
             )
             cls.db = cls.client[settings.MONGODB_DB_NAME]
+            cls.listing_db = cls.db.with_options(
+                read_preference=make_read_preference(
+                    read_pref_mode_from_name(settings.MONGODB_LISTING_READ_PREFERENCE),
+                    None,
+                )
+            )
             await cls.client.admin.command("ping")
             logger.info("Conectado ao MongoDB com sucesso")
             await cls._create_indexes()
@@ -68,6 +88,32 @@ class MongoDB:
             )
             logger.info(f"Indices criados para {ChatSession.collection_name}")
 
+            bucket_collection = cls.db[ChatMessageBucket.collection_name]
+            for index in ChatMessageBucket.get_indexes():
+                await cls.safe_create_index(
+                    bucket_collection, index["keys"], unique=index["unique"]
+                )
+
+            ttl_config = ChatMessageBucket.get_ttl_index()
+            await cls.safe_create_index(
+                bucket_collection,
+                ttl_config["keys"],
+                expireAfterSeconds=ttl_config["expireAfterSeconds"],
+            )
+            logger.info(f"Indices criados para {ChatMessageBucket.collection_name}")
+
+            items_collection = cls.db[KnowledgeIngestionJob.items_collection_name]
+            for index in KnowledgeIngestionJob.get_item_indexes():
+                await cls.safe_create_index(
+                    items_collection, index["keys"], unique=index["unique"]
+                )
+
+            # Paginação por cursor da listagem de empresas
+            await cls.safe_create_index(
+                cls.db["companies"],
+                [("is_active", 1), ("created_at", -1), ("_id", -1)],
+            )
+
             logger.warning(
                 f"Lembre-se de criar o vector search index manualmente no MongoDB Atlas "
                 f"para a collection {CompanyKnowledgeBase.collection_name}"
@@ -87,6 +133,13 @@ class MongoDB:
             raise RuntimeError("MongoDB nao esta conectado. Chame connect() primeiro.")
         return cls.db
 
+    @classmethod
+    def get_listing_database(cls) -> AsyncIOMotorDatabase:
+        """Leituras de listagens e métricas (MONGODB_LISTING_READ_PREFERENCE)"""
+        if cls.listing_db is None:
+            raise RuntimeError("MongoDB nao esta conectado. Chame connect() primeiro.")
+        return cls.listing_db
+
 
 mongodb = MongoDB()
 
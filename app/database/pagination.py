@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+
+CountMode = Literal["exact", "estimated", "none"]
+
+# "estimated" conta no máximo até aqui (scan limitado pelo índice)
+ESTIMATED_COUNT_LIMIT = 10000
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_value: datetime, doc_id: ObjectId) -> str:
+    """Token opaco com a posição (valor de ordenação, _id) do último item"""
+    raw = json.dumps({"v": sort_value.isoformat(), "id": str(doc_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["v"]), ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursorError("Cursor de paginação inválido") from e
+
+
+def keyset_query(
+    query: Dict[str, Any], sort_field: str, cursor: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Restringe a query aos itens depois do cursor, na ordem
+    (sort_field desc, _id desc). Sem cursor, retorna a primeira página.
+    """
+    if not cursor:
+        return query
+
+    sort_value, doc_id = decode_cursor(cursor)
+    return {
+        **query,
+        "$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, "_id": {"$lt": doc_id}},
+        ],
+    }
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    sort_field: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Busca uma página por range query (custo constante por página, ao
+    contrário de skip). Retorna os documentos e o cursor da próxima página.
+    """
+    if projection is not None:
+        projection = {**projection, sort_field: 1}
+
+    docs = (
+        await collection.find(keyset_query(query, sort_field, cursor), projection)
+        .sort([(sort_field, -1), ("_id", -1)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last[sort_field], last["_id"])
+
+    return docs, next_cursor
+
+
+async def count_total(
+    collection, query: Dict[str, Any], mode: CountMode
+) -> Optional[int]:
+    if mode == "none":
+        return None
+    if mode == "estimated":
+        return await collection.count_documents(query, limit=ESTIMATED_COUNT_LIMIT)
+    return await collection.count_documents(query)
@@ -0,0 +1,149 @@
+"""
+Configuração de logs da API e do worker.
+
+- LOG_FORMAT=text mantém o formato de sempre; json emite uma linha JSON por
+  registro, com o contexto da requisição (request_id, session_id, company_id).
+- LOG_QUEUE=true: o handler só enfileira o registro; formatação e escrita
+  rodam numa thread (QueueListener), fora do event loop.
+- Campos caros ficam preguiçosos: `logger.info("... %s", lazy(obj.model_dump))`
+  só chama model_dump se o registro passar pelo nível e pela amostragem.
+- O falatório por mensagem (extra=SAMPLED) é amostrado por requisição com
+  LOG_SAMPLE_RATE: uma requisição sorteada loga tudo, as demais nada disso.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Optional
+from .config import settings
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Marca o registro como falatório por mensagem (sujeito a LOG_SAMPLE_RATE)
+SAMPLED = {"sampled": True}
+
+CONTEXT_FIELDS = ("request_id", "session_id", "company_id")
+
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+_listener: Optional[QueueListener] = None
+
+
+class lazy:
+    """Adia o cálculo de um argumento de log até a formatação"""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+
+    def __str__(self) -> str:
+        return str(self.fn())
+
+
+@contextmanager
+def log_context(**fields: Any):
+    """Contexto da requisição anexado a todo log emitido dentro do bloco"""
+    context = {**_log_context.get()}
+    context.update((k, v) for k, v in fields.items() if v is not None)
+    context.setdefault("request_id", uuid.uuid4().hex[:12])
+    context.setdefault("sampled", random.random() < settings.LOG_SAMPLE_RATE)
+
+    token = _log_context.set(context)
+    try:
+        yield context
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copia o contexto para o registro e aplica a amostragem do falatório"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        if getattr(record, "sampled", False) and not context.get("sampled", True):
+            return False
+
+        for field in CONTEXT_FIELDS:
+            if field in context:
+                setattr(record, field, context[field])
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            if value := getattr(record, field, None):
+                entry[field] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ContextQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve mensagem e traceback ainda na thread que logou (lazy incluso);
+        # o formatador final roda no listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+def _stop_listener():
+    """Esvazia a fila do listener atual (registrado uma vez no atexit)"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def setup_logging():
+    """Substitui o logging.basicConfig da API e do worker"""
+    global _listener
+
+    _stop_listener()
+
+    formatter = (
+        JsonFormatter()
+        if settings.LOG_FORMAT == "json"
+        else logging.Formatter(TEXT_FORMAT)
+    )
+    output = logging.StreamHandler()
+    output.setFormatter(formatter)
+
+    if settings.LOG_QUEUE:
+        handler = _ContextQueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, settings.LOG_LEVEL))
@@ -1,25 +1,41 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, File, Header, HTTPException, Query, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
 from openai import OpenAIError
 from bson import ObjectId
 from bson.errors import InvalidId
 from arq import create_pool
 from arq.connections import RedisSettings
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from .config import settings
-from .database import mongodb
-from .agent import create_agent_graph, GraphState
-from .models import ChatRequest, ChatResponse, CustomerProfile, CompanyConfig, CostInfo
+from .logging_config import log_context, setup_logging
+from .database import mongodb, cache
+from .metrics import TurnTimings, record_turn_timings, update_queue_metrics
+from .database.pagination import CountMode, InvalidCursorError
+from .agent import get_agent_graph, GraphState
+from .agent.nodes.load_context import HISTORY_WINDOW
+from .agent.deadline import start_deadline, time_left
+from .models import (
+    ChatRequest,
+    ChatResponse,
+    CustomerProfile,
+    CompanyConfig,
+    CostInfo,
+    TimingBreakdown,
+)
 from .models.knowledge import (
     KnowledgeEntryCreate,
     KnowledgeEntryUpdate,
     KnowledgeBulkCreate,
     KnowledgeListResponse,
     KnowledgeBulkResponse,
+    KnowledgeIngestionJobResponse,
 )
 from .models.responses import (
     GenericResponse,
@@ -32,29 +48,41 @@ from .models.responses import (
     RankingResponse,
     HealthResponse,
     SessionResponse,
+    SessionListResponse,
 )
 from .services.usage_service import usage_service
 from .services.company_service import company_service
 from .services.session_service import session_service
+from .services.session_lock import session_lock
+from .services.admission_control import admission_control, AdmissionRejected
+from .services.openai_rate_limiter import openai_rate_limiter, PRIORITY_BULK
 from .services.rag_service import rag_service
+from .services.ingestion_service import ingestion_service, SUPPORTED_FORMATS
 from .schemas import ChatSession
 from .services.openai_service import openai_service
 
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+# Folga além do prazo antes de cancelar o grafo (o LLM já para no prazo)
+DEADLINE_GRACE = 1.0
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Iniciando Bot Agendador Multi-Nicho v2.1 (OTIMIZADO)")
     await mongodb.connect()
     app.state.redis = await create_pool(RedisSettings.from_dsn(settings.REDIS_URL))
+    session_lock.set_redis(app.state.redis)
+    openai_rate_limiter.set_redis(app.state.redis)
+    cache.set_redis(app.state.redis)
+    company_service.start_config_watch()
+    openai_service.connect()
+    get_agent_graph()
     logger.info("Sistema pronto")
     yield
     logger.info("Encerrando")
+    await company_service.stop_config_watch()
     await app.state.redis.close()
     await mongodb.close()
 
@@ -116,111 +144,243 @@ def validate_agenda_structure(agenda: dict) -> None:
         )
 
 
-@app.post("/chat", response_model=ChatResponse, tags=["Chat"])
-async def chat_endpoint(request: ChatRequest):
-    try:
-        logger.info(
-            f"[CHAT] Nova interacao. Sessao: {request.session_id} | "
-            f"Empresa: {request.company.nome}"
+async def _enqueue_for_worker(
+    request: ChatRequest, paused_until: Optional[datetime], detail: str
+):
+    """
+    Grava a mensagem do cliente e deixa a resposta para o worker (webhook).
+    Uma pausa ativa do owner é mantida e adia o job até o fim dela.
+    """
+    user_message = ChatSession.create_message("user", request.cliente.mensagem)
+    await session_service.commit(
+        session_service.unit_of_work(request.session_id)
+        .append_messages([user_message])
+        .set_pause_state(paused_until, "user")
+    )
+
+    await app.state.redis.enqueue_job(
+        "delayed_response_task",
+        session_id=request.session_id,
+        user_message=request.cliente.mensagem,
+        company_payload=request.company.model_dump(),
+        _defer_until=paused_until,
+    )
+
+    return JSONResponse(
+        status_code=202,
+        content={"status": "queued", "detail": detail},
+    )
+
+
+def _active_pause(session: Optional[dict]) -> Optional[datetime]:
+    paused_until = (session or {}).get("paused_until")
+    return paused_until if paused_until and paused_until > datetime.now() else None
+
+
+async def _enqueue_overflow(request: ChatRequest, rejected: AdmissionRejected):
+    # Só sessões com histórico vão para a fila; as novas recebem o 503
+    session = await session_service.get_session_context(request.session_id, n=1)
+    if not session or not session.get("messages"):
+        raise rejected
+
+    # Sessão em pausa (owner atendendo) segue o caminho da pausa, sem zerá-la
+    if paused_until := _active_pause(session):
+        logger.info(f"[CHAT] Sessão em pausa até {paused_until}. Enfileirando.")
+        return await _enqueue_for_worker(
+            request, paused_until, "Bot em pausa, resposta agendada."
         )
 
-        validate_agenda_structure(request.company.agenda)
+    # Mesmo caminho da sessão pausada, mas sem atraso: o worker responde pelo webhook
+    logger.info(f"[CHAT] Sem vagas. Enfileirando sessão {request.session_id}.")
+    return await _enqueue_for_worker(
+        request, None, "Servidor ocupado, resposta agendada."
+    )
 
-        session = await session_service.get_session(request.session_id)
 
-        if (
-            session
-            and session.get("paused_until")
-            and session["paused_until"] > datetime.now()
-        ):
-            logger.info(
-                f"[CHAT] Sessão em pausa até {session['paused_until']}. Enfileirando."
-            )
+def _deadline_exceeded() -> HTTPException:
+    logger.warning("[CHAT] Prazo da requisição esgotado.")
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail="Tempo limite da requisição excedido",
+    )
 
-            user_message = ChatSession.create_message("user", request.cliente.mensagem)
-            await session_service.append_messages(request.session_id, [user_message])
-            await session_service.update_pause_state(
-                request.session_id, session["paused_until"], "user"
-            )
 
-            await app.state.redis.enqueue_job(
-                "delayed_response_task",
-                session_id=request.session_id,
-                user_message=request.cliente.mensagem,
-                company_payload=request.company.model_dump(),
-                _defer_until=session["paused_until"],
-            )
+async def _run_chat_turn(
+    request: ChatRequest,
+    customer_profile: CustomerProfile,
+    deadline: Optional[float],
+    timings: TurnTimings,
+    debug_timings: bool,
+):
+    # A espera pela trava pode ter consumido o prazo inteiro
+    remaining = time_left({"deadline": deadline})
+    if remaining is not None and remaining <= 0:
+        raise _deadline_exceeded()
+
+    # Única leitura da sessão no request: reaproveitada pelo grafo
+    session = await session_service.load_session_context(
+        session_id=request.session_id,
+        company_id=request.company.id,
+        customer_context=customer_profile.model_dump(),
+        n=HISTORY_WINDOW,
+    )
 
-            return JSONResponse(
-                status_code=202,
-                content={
-                    "status": "queued",
-                    "detail": "Bot em pausa, resposta agendada.",
-                },
-            )
+    if paused_until := _active_pause(session):
+        logger.info(f"[CHAT] Sessão em pausa até {paused_until}. Enfileirando.")
+        return await _enqueue_for_worker(
+            request, paused_until, "Bot em pausa, resposta agendada."
+        )
 
-        if request.company.config_override:
-            company_config = request.company.config_override.model_dump()
-        else:
-            config_obj = await company_service.get_config(request.company.id)
-            company_config = config_obj.model_dump()
+    if request.company.config_override:
+        company_config = request.company.config_override.model_dump()
+    else:
+        company_config = await company_service.get_config_dict(request.company.id)
+
+    initial_state = GraphState(
+        company_id=request.company.id,
+        session_id=request.session_id,
+        user_message=request.cliente.mensagem,
+        deadline=deadline,
+        company_config=company_config,
+        customer_profile=customer_profile.model_dump(),
+        company_agenda=request.company.agenda,
+        full_agenda=None,
+        filtered_agenda=None,
+        entity_gazetteer=None,
+        session_context=session,
+        chat_history=[],
+        recent_history=[],
+        sentiment_result=None,
+        intent_result=None,
+        sentiment_analyzed=False,
+        intent_analyzed=False,
+        tools_validated=False,
+        is_data_complete=False,
+        last_kanban_status=None,
+        template_kind=None,
+        extracted_entities={},
+        final_response=None,
+        tools_called=[],
+        prompt_tokens=0,
+        completion_tokens=0,
+        error=None,
+        deadline_exceeded=False,
+        llm_response_raw={},
+    )
 
-        customer_profile = CustomerProfile(
-            telefone=request.cliente.telefone,
-            nome=request.cliente.nome,
-            email=request.cliente.email,
+    remaining = time_left(initial_state)
+    if remaining is not None and remaining <= 0:
+        raise _deadline_exceeded()
+
+    graph = get_agent_graph()
+    try:
+        # As chamadas ao LLM já respeitam o prazo; isto cobre o resto do grafo
+        final_state = await asyncio.wait_for(
+            graph.ainvoke(initial_state),
+            timeout=(
+                None if deadline is None else time_left(initial_state) + DEADLINE_GRACE
+            ),
         )
+    except asyncio.TimeoutError:
+        raise _deadline_exceeded()
+
+    # Prazo esgotado vira 504 mesmo que algum nó tenha montado uma resposta
+    if final_state.get("error"):
+        remaining = time_left(initial_state)
+        if final_state.get("deadline_exceeded") or (
+            remaining is not None and remaining <= 0
+        ):
+            raise _deadline_exceeded()
 
-        initial_state = GraphState(
-            company_id=request.company.id,
-            session_id=request.session_id,
-            user_message=request.cliente.mensagem,
-            company_config=company_config,
-            customer_profile=customer_profile.model_dump(),
-            company_agenda=request.company.agenda,
-            full_agenda=None,
-            filtered_agenda=None,
-            chat_history=[],
-            recent_history=[],
-            sentiment_result=None,
-            intent_result=None,
-            sentiment_analyzed=False,
-            intent_analyzed=False,
-            tools_validated=False,
-            is_data_complete=False,
-            extracted_entities={},
-            final_response=None,
-            tools_called=[],
-            prompt_tokens=0,
-            completion_tokens=0,
-            error=None,
-            llm_response_raw={},
+    if final_state.get("error") and not final_state.get("final_response"):
+        logger.error(f"[CHAT] Erro critico: {final_state['error']}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro no processamento: {final_state['error']}",
         )
 
-        graph = create_agent_graph()
-        final_state = await graph.ainvoke(initial_state)
+    response = final_state["final_response"]
 
-        if final_state.get("error") and not final_state.get("final_response"):
-            logger.error(f"[CHAT] Erro critico: {final_state['error']}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Erro no processamento: {final_state['error']}",
-            )
+    total_tokens = final_state.get("prompt_tokens", 0) + final_state.get(
+        "completion_tokens", 0
+    )
 
-        response = final_state["final_response"]
+    response.cost_info = CostInfo(
+        total_tokens=total_tokens,
+        input_tokens=final_state.get("prompt_tokens", 0),
+        output_tokens=final_state.get("completion_tokens", 0),
+    )
 
-        total_tokens = final_state.get("prompt_tokens", 0) + final_state.get(
-            "completion_tokens", 0
-        )
+    if debug_timings or company_config.get("detalhar_tempos"):
+        response.cost_info.timings = TimingBreakdown(**timings.as_dict())
+
+    return response
+
+
+@app.post("/chat", response_model=ChatResponse, tags=["Chat"])
+async def chat_endpoint(
+    request: ChatRequest,
+    x_debug_timings: bool = Header(
+        False, description="Inclui cost_info.timings na resposta"
+    ),
+    x_request_id: Optional[str] = Header(
+        None, description="Propagado nos logs; gerado se ausente"
+    ),
+):
+    context = {"session_id": request.session_id, "company_id": request.company.id}
+    if x_request_id:
+        context["request_id"] = x_request_id
+
+    with log_context(**context):
+        return await _handle_chat(request, x_debug_timings)
+
+
+async def _handle_chat(request: ChatRequest, x_debug_timings: bool):
+    # O prazo conta desde a chegada, incluindo a espera pela trava da sessão
+    deadline = start_deadline(settings.CHAT_DEADLINE_SECONDS)
 
-        response.cost_info = CostInfo(
-            total_tokens=total_tokens,
-            input_tokens=final_state.get("prompt_tokens", 0),
-            output_tokens=final_state.get("completion_tokens", 0),
+    try:
+        logger.info(
+            "[CHAT] Nova interacao. Sessao: %s | Empresa: %s",
+            request.session_id,
+            request.company.nome,
         )
 
-        return response
+        validate_agenda_structure(request.company.agenda)
+        admission_control.check_rate(request.company.id)
+
+        customer_profile = CustomerProfile(
+            telefone=request.cliente.telefone,
+            nome=request.cliente.nome,
+            email=request.cliente.email,
+        )
 
+        # Um turno por sessão: a mensagem seguinte espera (até o prazo) e já vê
+        # este histórico. A vaga só é tomada com a trava em mãos, para que uma
+        # rajada de uma sessão não ocupe vagas esperando; e antes de qualquer
+        # acesso ao Mongo, para que um 503 não crie sessão
+        with record_turn_timings() as timings:
+            async with session_lock.hold(request.session_id, deadline):
+                try:
+                    async with admission_control.slot():
+                        return await _run_chat_turn(
+                            request,
+                            customer_profile,
+                            deadline,
+                            timings,
+                            x_debug_timings,
+                        )
+                except AdmissionRejected as rejected:
+                    if not settings.CHAT_OVERFLOW_TO_QUEUE:
+                        raise
+                    return await _enqueue_overflow(request, rejected)
+
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
     except HTTPException:
         raise
     except OpenAIError as e:
@@ -250,9 +410,10 @@ async def owner_interaction(session_id: str, message: str):
             "assistant", message, metadata={"source": "owner"}
         )
 
-        await session_service.append_messages(session_id, [owner_msg])
-        await session_service.update_pause_state(
-            session_id=session_id, paused_until=paused_until, last_sender_type="owner"
+        await session_service.commit(
+            session_service.unit_of_work(session_id)
+            .append_messages([owner_msg])
+            .set_pause_state(paused_until=paused_until, last_sender_type="owner")
         )
 
         return {
@@ -300,9 +461,17 @@ async def get_company_config(company_id: str):
 
 
 @app.get("/companies", response_model=CompanyListResponse, tags=["Companies"])
-async def list_companies(skip: int = 0, limit: int = 50):
+async def list_companies(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    count: CountMode = "estimated",
+):
     try:
-        return await company_service.list_companies(skip, limit)
+        return await company_service.list_companies(
+            limit=limit, cursor=cursor, count=count
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         logger.error(f"Erro ao listar companies: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Erro ao listar empresas") from e
@@ -373,8 +542,9 @@ async def create_knowledge_entry(
 async def list_knowledge_entries(
     company_id: str,
     category: str = None,
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 50,
+    count: CountMode = "estimated",
 ):
     try:
         if not company_id or not company_id.strip():
@@ -386,14 +556,17 @@ async def list_knowledge_entries(
         result = await rag_service.list_knowledge(
             company_id=company_id,
             category=category,
-            skip=skip,
             limit=limit,
+            cursor=cursor,
+            count=count,
         )
 
         return KnowledgeListResponse(**result)
 
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         logger.error(f"[KNOWLEDGE] Erro ao listar FAQs: {e}", exc_info=True)
         raise HTTPException(
@@ -420,7 +593,7 @@ async def update_knowledge_entry(
         if not company_id or not company_id.strip():
             raise HTTPException(status_code=400, detail="company_id é obrigatório")
 
-        updated = await rag_service.update_knowledge(
+        result = await rag_service.update_knowledge(
             entry_id=entry_id,
             company_id=company_id,
             question=entry.question,
@@ -429,17 +602,15 @@ async def update_knowledge_entry(
             priority=entry.priority,
         )
 
-        if not updated:
+        if not result["updated"]:
             raise HTTPException(
                 status_code=404, detail=f"FAQ {entry_id} não encontrada"
             )
 
-        regenerated = bool(entry.question or entry.answer or entry.category)
-
         return {
             "status": "success",
             "entry_id": entry_id,
-            "embedding_regenerated": regenerated,
+            "embedding_regenerated": result["embedding_regenerated"],
         }
 
     except HTTPException:
@@ -498,6 +669,109 @@ async def delete_knowledge_entry(
         ) from e
 
 
+def _ingestion_job_response(job: dict) -> KnowledgeIngestionJobResponse:
+    return KnowledgeIngestionJobResponse(job_id=str(job["_id"]), **job)
+
+
+async def _enqueue_ingestion(job: dict):
+    # O attempt no id evita colidir com o resultado guardado de uma execução anterior
+    await app.state.redis.enqueue_job(
+        "knowledge_ingestion_task",
+        job_id=str(job["_id"]),
+        _job_id=f"knowledge_ingestion:{job['_id']}:{job['attempt']}",
+    )
+
+
+@app.post(
+    "/knowledge/ingest",
+    response_model=KnowledgeIngestionJobResponse,
+    tags=["Knowledge Base"],
+    status_code=202,
+)
+async def ingest_knowledge(
+    company_id: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+):
+    """
+    Importa FAQs de um arquivo JSONL ou CSV (colunas question, answer,
+    category, priority). O processamento roda no worker; acompanhe pelo
+    GET /knowledge/ingest/{job_id}.
+    """
+    try:
+        if not company_id or not company_id.strip():
+            raise HTTPException(status_code=400, detail="company_id é obrigatório")
+
+        fmt = (format or (file.filename or "").rsplit(".", 1)[-1]).lower()
+        if fmt not in SUPPORTED_FORMATS:
+            raise HTTPException(
+                status_code=400, detail="Formato deve ser 'jsonl' ou 'csv'"
+            )
+
+        job = await ingestion_service.stage_upload(
+            company_id=company_id,
+            file=file.file,
+            fmt=fmt,
+            source=file.filename or "",
+        )
+
+        if job["status"] == "pending":
+            await _enqueue_ingestion(job)
+
+        return _ingestion_job_response(job)
+
+    except HTTPException:
+        raise
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=400, detail="Arquivo deve estar em UTF-8"
+        ) from e
+    except Exception as e:
+        logger.error(f"[KNOWLEDGE] Erro na ingestão: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail=f"Erro na ingestão: {str(e)}"
+        ) from e
+
+
+@app.get(
+    "/knowledge/ingest/{job_id}",
+    response_model=KnowledgeIngestionJobResponse,
+    tags=["Knowledge Base"],
+)
+async def get_ingestion_job(job_id: str):
+    try:
+        job = await ingestion_service.get_job(job_id)
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail="job_id inválido") from e
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return _ingestion_job_response(job)
+
+
+@app.post(
+    "/knowledge/ingest/{job_id}/resume",
+    response_model=KnowledgeIngestionJobResponse,
+    tags=["Knowledge Base"],
+    status_code=202,
+)
+async def resume_ingestion_job(job_id: str):
+    """Retoma um job falho a partir do último chunk gravado"""
+    try:
+        job = await ingestion_service.resume_job(job_id)
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail="job_id inválido") from e
+
+    if not job:
+        raise HTTPException(
+            status_code=409,
+            detail="Job inexistente, ainda em execução ou não pode ser retomado",
+        )
+
+    await _enqueue_ingestion(job)
+    return _ingestion_job_response(job)
+
+
 @app.post(
     "/knowledge/bulk",
     response_model=KnowledgeBulkResponse,
@@ -531,10 +805,11 @@ async def bulk_create_knowledge(
             for e in bulk_data.entries
         ]
 
-        ids = await rag_service.bulk_create(
-            company_id=bulk_data.company_id,
-            entries=entries_dict,
-        )
+        with openai_rate_limiter.priority(PRIORITY_BULK):
+            ids = await rag_service.bulk_create(
+                company_id=bulk_data.company_id,
+                entries=entries_dict,
+            )
 
         return KnowledgeBulkResponse(
             status="success",
@@ -595,6 +870,24 @@ async def get_company_ranking(period: str = "monthly", limit: int = 10):
         raise HTTPException(status_code=500, detail="Erro ao buscar ranking") from e
 
 
+@app.get("/sessions", response_model=SessionListResponse, tags=["Sessions"])
+async def list_sessions(
+    company_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    count: CountMode = "estimated",
+):
+    try:
+        return await session_service.list_sessions(
+            company_id=company_id, limit=limit, cursor=cursor, count=count
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        logger.error(f"Erro ao listar sessoes: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro ao listar sessoes") from e
+
+
 @app.get("/sessions/{session_id}", response_model=SessionResponse, tags=["Sessions"])
 async def get_session(session_id: str):
     try:
@@ -608,6 +901,10 @@ async def get_session(session_id: str):
         if "_id" in session:
             session["_id"] = str(session["_id"])
 
+        # Sessões no formato de buckets guardam só a janela recente no documento
+        if "message_count" in session:
+            session["messages"] = await session_service.get_full_history(session_id)
+
         return session
 
     except HTTPException:
@@ -679,6 +976,16 @@ async def readiness_check():
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    try:
+        await update_queue_metrics(app.state.redis)
+    except Exception as e:
+        logger.warning(f"[METRICS] Falha ao ler a fila do arq: {e}")
+
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,274 @@
+"""
+Métricas Prometheus do bot (expostas em GET /metrics e, no worker, na porta
+WORKER_METRICS_PORT).
+
+Os pontos instrumentados chamam as funções `observe_*` em vez de usar os
+coletores direto, para manter os nomes e labels num lugar só. Dentro de
+`record_turn_timings()` as mesmas chamadas também acumulam os tempos do turno
+(cost_info.timings do /chat).
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from arq.constants import default_queue_name
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+NODE_DURATION = Histogram(
+    "bot_node_duration_seconds",
+    "Tempo de execução de cada nó do grafo",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+
+LLM_CALL_DURATION = Histogram(
+    "bot_llm_call_duration_seconds",
+    "Latência de cada chamada à OpenAI (por tentativa)",
+    ["model", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "bot_llm_tokens_total",
+    "Tokens consumidos na OpenAI",
+    ["model", "kind"],
+)
+
+CLASSIFIER_PATH = Counter(
+    "bot_classifier_path_total",
+    "Como sentimento/intenção foram resolvidos (cache, pattern, llm, fallback)",
+    ["tool", "path"],
+)
+
+CACHE_REQUESTS = Counter(
+    "bot_cache_requests_total",
+    "Leituras do cache em memória por namespace",
+    ["namespace", "result"],
+)
+
+MONGO_COMMAND_DURATION = Histogram(
+    "bot_mongo_command_duration_seconds",
+    "Latência dos comandos do MongoDB",
+    ["command", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "bot_mongo_pool_checkout_wait_seconds",
+    "Espera por uma conexão livre no pool do MongoDB",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+MONGO_POOL_CHECKOUTS = Counter(
+    "bot_mongo_pool_checkouts_total",
+    "Retiradas de conexão do pool do MongoDB",
+    ["outcome"],
+)
+
+MONGO_POOL_CONNECTIONS = Gauge(
+    "bot_mongo_pool_connections",
+    "Conexões do pool do MongoDB (abertas e em uso)",
+    ["state"],
+)
+
+MONGO_POOL_CONNECTIONS_CREATED = Counter(
+    "bot_mongo_pool_connections_created_total",
+    "Conexões novas abertas pelo pool (rotatividade)",
+)
+
+QUEUE_DEPTH = Gauge(
+    "bot_arq_queue_depth",
+    "Jobs na fila do arq (prontos e agendados)",
+    ["state"],
+)
+
+QUEUE_OLDEST_AGE = Gauge(
+    "bot_arq_oldest_job_age_seconds",
+    "Há quanto tempo o job pronto mais antigo espera na fila",
+)
+
+_NAMESPACE_SEPARATOR = re.compile(r"[:@]")
+
+
+class TurnTimings:
+    """Tempos de um turno do /chat, acumulados pelas funções `observe_*`"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.nodes: Dict[str, float] = {}
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.mongo_seconds = 0.0
+        self.mongo_commands = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": _ms(time.perf_counter() - self.started),
+            "nodes_ms": {node: _ms(s) for node, s in self.nodes.items()},
+            "llm_calls": list(self.llm_calls),
+            "mongo_ms": _ms(self.mongo_seconds),
+            "mongo_commands": self.mongo_commands,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+# Turno em andamento; tasks do grafo e threads do Motor herdam o contexto
+_turn_timings: ContextVar[Optional[TurnTimings]] = ContextVar(
+    "turn_timings", default=None
+)
+
+
+@contextmanager
+def record_turn_timings():
+    timings = TurnTimings()
+    token = _turn_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _turn_timings.reset(token)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def observe_node(node: str, seconds: float):
+    NODE_DURATION.labels(node=node).observe(seconds)
+
+    if timings := _turn_timings.get():
+        timings.nodes[node] = timings.nodes.get(node, 0.0) + seconds
+
+
+def observe_llm_call(
+    model: str,
+    seconds: float,
+    ok: bool,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+):
+    LLM_CALL_DURATION.labels(model=model, outcome="ok" if ok else "error").observe(
+        seconds
+    )
+    if prompt_tokens:
+        LLM_TOKENS.labels(model=model, kind="prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(model=model, kind="completion").inc(completion_tokens)
+
+    if timings := _turn_timings.get():
+        timings.llm_calls.append(
+            {
+                "model": model,
+                "duration_ms": _ms(seconds),
+                "ok": ok,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            }
+        )
+
+
+def observe_classifier(tool: str, path: str):
+    CLASSIFIER_PATH.labels(tool=tool, path=path).inc()
+
+
+def observe_cache(key: str, hit: bool):
+    # Só o prefixo da chave: namespaces por empresa explodiriam a cardinalidade
+    namespace = _NAMESPACE_SEPARATOR.split(key, 1)[0]
+    CACHE_REQUESTS.labels(namespace=namespace, result="hit" if hit else "miss").inc()
+
+    if timings := _turn_timings.get():
+        if hit:
+            timings.cache_hits += 1
+        else:
+            timings.cache_misses += 1
+
+
+def _observe_mongo(command: str, outcome: str, seconds: float):
+    MONGO_COMMAND_DURATION.labels(command=command, outcome=outcome).observe(seconds)
+
+    if timings := _turn_timings.get():
+        timings.mongo_seconds += seconds
+        timings.mongo_commands += 1
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Listener do pymongo que mede cada comando enviado ao servidor"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        _observe_mongo(event.command_name, "ok", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        _observe_mongo(event.command_name, "error", event.duration_micros / 1e6)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Listener do pool: espera no checkout, conexões abertas e em uso"""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS_CREATED.inc()
+        MONGO_POOL_CONNECTIONS.labels(state="open").inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.labels(state="open").dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUTS.labels(outcome=event.reason).inc()
+        if event.duration is not None:
+            MONGO_POOL_CHECKOUT_WAIT.labels(outcome="error").observe(event.duration)
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_CHECKOUTS.labels(outcome="ok").inc()
+        MONGO_POOL_CONNECTIONS.labels(state="in_use").inc()
+        if event.duration is not None:
+            MONGO_POOL_CHECKOUT_WAIT.labels(outcome="ok").observe(event.duration)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CONNECTIONS.labels(state="in_use").dec()
+
+
+async def update_queue_metrics(redis, queue_name: Optional[str] = None):
+    """Atualiza profundidade e idade da fila do arq (chamado a cada scrape)"""
+    if redis is None:
+        return
+
+    queue_name = queue_name or default_queue_name
+    now_ms = int(time.time() * 1000)
+
+    ready = await redis.zcount(queue_name, "-inf", now_ms)
+    total = await redis.zcard(queue_name)
+    QUEUE_DEPTH.labels(state="ready").set(ready)
+    QUEUE_DEPTH.labels(state="deferred").set(total - ready)
+
+    # O score é o horário (ms) em que o job fica pronto
+    oldest = await redis.zrangebyscore(
+        queue_name, "-inf", now_ms, start=0, num=1, withscores=True
+    )
+    QUEUE_OLDEST_AGE.set((now_ms - oldest[0][1]) / 1000 if oldest else 0)
@@ -0,0 +1,112 @@
+"""
+Converte os embeddings do knowledge base para outro formato de armazenamento.
+
+Uso:
+    python -m app.migrate_embeddings --format int8
+    python -m app.migrate_embeddings --format float32 --company-id clinica_abc --dry-run
+
+Depois de migrar, ajuste EMBEDDING_STORAGE para o mesmo formato, para que
+novas FAQs já sejam gravadas assim. O índice vetorial do Atlas continua no
+mesmo path (`embedding`) e aceita BSON vectors float32/int8.
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from pymongo import UpdateOne
+from .config import settings
+from .database import mongodb
+from .schemas import CompanyKnowledgeBase
+from .schemas.knowledge_base import EMBEDDING_FORMATS
+
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def _pending_query(fmt: str, company_id: Optional[str]) -> Dict[str, Any]:
+    # Documentos antigos não têm embedding_format: são arrays de float
+    if fmt == "float":
+        query = {"embedding_format": {"$nin": [None, "float"]}}
+    else:
+        query = {"embedding_format": {"$ne": fmt}}
+
+    query["embedding"] = {"$exists": True}
+    if company_id:
+        query["company_id"] = company_id
+    return query
+
+
+async def migrate(
+    fmt: str, company_id: Optional[str], batch_size: int, dry_run: bool
+) -> int:
+    await mongodb.connect()
+    try:
+        collection = mongodb.get_database()[CompanyKnowledgeBase.collection_name]
+        query = _pending_query(fmt, company_id)
+
+        total = await collection.count_documents(query)
+        logger.info(f"[MIGRATE] {total} FAQs para converter para '{fmt}'")
+        if dry_run or not total:
+            return 0
+
+        converted = 0
+        last_id = None
+        while True:
+            page_query = dict(query)
+            if last_id is not None:
+                page_query["_id"] = {"$gt": last_id}
+
+            docs = (
+                await collection.find(
+                    page_query, {"embedding": 1, "embedding_scale": 1}
+                )
+                .sort("_id", 1)
+                .limit(batch_size)
+                .to_list(length=batch_size)
+            )
+            if not docs:
+                break
+
+            operations = [
+                UpdateOne(
+                    {"_id": doc["_id"]},
+                    {
+                        "$set": CompanyKnowledgeBase.encode_embedding(
+                            CompanyKnowledgeBase.decode_embedding(doc), fmt
+                        )
+                    },
+                )
+                for doc in docs
+            ]
+            await collection.bulk_write(operations, ordered=False)
+
+            converted += len(docs)
+            last_id = docs[-1]["_id"]
+            logger.info(f"[MIGRATE] {converted}/{total} convertidas")
+
+        logger.info(f"[MIGRATE] ✅ Concluído: {converted} FAQs em '{fmt}'")
+        return converted
+
+    finally:
+        await mongodb.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte embeddings do knowledge base (float/float32/int8)"
+    )
+    parser.add_argument("--format", required=True, choices=EMBEDDING_FORMATS)
+    parser.add_argument("--company-id", default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(migrate(args.format, args.company_id, args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
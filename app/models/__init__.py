@@ -14,6 +14,7 @@ from .chat import (
     AppointmentDirective,
     UpdateUserDirective,
     CostInfo,
+    TimingBreakdown,
 )
 from .company import CompanyConfig, CompanyConfigDB
 from .usage import TokenUsageRecord, TokenUsageAggregation, UsageMetricsRequest
@@ -42,6 +43,7 @@ __all__ = [
     "AppointmentDirective",
     "UpdateUserDirective",
     "CostInfo",
+    "TimingBreakdown",
     "CompanyConfig",
     "CompanyConfigDB",
     "TokenUsageRecord",
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from .agent import KanbanStatus
 from .company import CompanyConfig
 
@@ -61,6 +61,28 @@ class Directives(BaseModel):
     payload_appointment: Optional[AppointmentDirective] = None
 
 
+class LLMCallTiming(BaseModel):
+    """Uma chamada (tentativa) à OpenAI durante o turno"""
+
+    model: str
+    duration_ms: float
+    ok: bool
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class TimingBreakdown(BaseModel):
+    """Tempos do turno: por nó do grafo, LLM, MongoDB e cache"""
+
+    total_ms: float
+    nodes_ms: Dict[str, float] = Field(default_factory=dict)
+    llm_calls: List[LLMCallTiming] = Field(default_factory=list)
+    mongo_ms: float = 0.0
+    mongo_commands: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+
 class CostInfo(BaseModel):
     """Métricas de consumo"""
 
@@ -68,6 +90,10 @@ class CostInfo(BaseModel):
     input_tokens: int = 0
     output_tokens: int = 0
     estimated_cost_usd: Optional[float] = None
+    timings: Optional[TimingBreakdown] = Field(
+        default=None,
+        description="Só com detalhar_tempos na empresa ou header X-Debug-Timings",
+    )
 
 
 class ChatResponse(BaseModel):
@@ -12,6 +12,8 @@ class CompanyConfig(BaseModel):
     uso_emojis: bool = True
     frequencia_cta: Literal["minima", "normal", "maxima"] = "normal"
     estilo_despedida: str = "padrão"
+    # Operacional: inclui cost_info.timings nas respostas do /chat
+    detalhar_tempos: bool = False
 
     class Config:
         extra = "ignore"
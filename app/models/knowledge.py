@@ -46,8 +46,9 @@ class FAQResponse(BaseModel):
 class KnowledgeListResponse(BaseModel):
     """Lista de entradas do knowledge base"""
 
-    total: int
+    total: Optional[int] = None
     entries: List[KnowledgeEntry]
+    next_cursor: Optional[str] = None
 
 
 class KnowledgeBulkCreate(BaseModel):
@@ -63,3 +64,18 @@ class KnowledgeBulkResponse(BaseModel):
     status: str
     count: int
     ids: List[str]
+
+
+class KnowledgeIngestionJobResponse(BaseModel):
+    """Estado de um job de ingestão em massa"""
+
+    job_id: str
+    company_id: str
+    status: str = Field(description="staging, pending, running, completed, failed")
+    total: int = Field(description="Entradas válidas em staging")
+    rejected: int = Field(description="Linhas rejeitadas na validação")
+    processed: int
+    inserted: int
+    unchanged: int = Field(0, description="Entradas já existentes (sem embedding)")
+    checkpoint: int
+    errors: List[str] = []
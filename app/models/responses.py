@@ -38,8 +38,9 @@ class CompanyListItem(BaseModel):
 
 
 class CompanyListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     companies: List[CompanyListItem]
+    next_cursor: Optional[str] = None
 
 
 class KnowledgeOpResponse(BaseModel):
@@ -105,6 +106,21 @@ class SessionSummarySchema(BaseModel):
     rag_hits: int = 0
 
 
+class SessionListItem(BaseModel):
+    session_id: str
+    total_interactions: int = 0
+    last_kanban_status: Optional[str] = None
+    last_sender_type: Optional[str] = None
+    paused_until: Optional[datetime] = None
+    updated_at: datetime
+
+
+class SessionListResponse(BaseModel):
+    total: Optional[int] = None
+    sessions: List[SessionListItem]
+    next_cursor: Optional[str] = None
+
+
 class SessionResponse(BaseModel):
     id: Optional[str] = Field(alias="_id", default=None)
     session_id: str
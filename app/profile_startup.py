@@ -0,0 +1,145 @@
+"""
+Perfil do tempo de inicialização da API ou do worker.
+
+Uso:
+    python -m app.profile_startup
+    python -m app.profile_startup --target worker --top 25
+
+Importa o alvo num subprocesso com `python -X importtime` (imports frescos,
+como num pod novo) e agrega o tempo por pacote e pelos módulos mais caros.
+Depois mede, no mesmo subprocesso, as etapas que o lifespan/startup fazem
+fora do import: criação do cliente da OpenAI e compilação do grafo.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+TARGETS = {"api": "app.main", "worker": "app.worker"}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Roda no subprocesso: importa o alvo e cronometra as etapas de boot
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+phases = {{"import {module}": time.perf_counter() - started}}
+
+from app.services import openai_service
+from app.agent import get_agent_graph
+
+for name, step in (
+    ("openai_service.connect()", openai_service.connect),
+    ("get_agent_graph()", get_agent_graph),
+):
+    started = time.perf_counter()
+    step()
+    phases[name] = time.perf_counter() - started
+
+sys.stdout.write(json.dumps(phases))
+"""
+
+
+def package_of(module: str) -> str:
+    # Módulos do app ficam por subpacote (app.services, app.agent...)
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "app" else parts[0]
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """(módulo, self_us, cumulativo_us) de cada linha do -X importtime"""
+    rows = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def run_probe(module: str) -> Tuple[List[Tuple[str, int, int]], Dict[str, float]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        errors = [
+            line
+            for line in result.stderr.splitlines()
+            if not line.startswith("import time:")
+        ]
+        raise SystemExit("\n".join(errors[-20:]))
+
+    return parse_importtime(result.stderr), json.loads(result.stdout)
+
+
+def print_report(
+    target: str,
+    rows: List[Tuple[str, int, int]],
+    phases: Dict[str, float],
+    top: int,
+):
+    total_us = sum(self_us for _, self_us, _ in rows)
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for module, self_us, _ in rows:
+        by_package[package_of(module)] += self_us
+
+    print(
+        f"\n🚀 Inicialização ({target}): {len(rows)} módulos, {total_us / 1000:.0f} ms de import"
+    )
+
+    print("\n  por pacote (tempo próprio somado):")
+    for package, self_us in sorted(by_package.items(), key=lambda i: -i[1])[:top]:
+        print(
+            f"    {package:<32} {self_us / 1000:>8.1f} ms"
+            f"  {self_us / total_us:>6.1%}"
+        )
+
+    print("\n  módulos mais caros (tempo próprio):")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda r: -r[1])[:top]:
+        print(
+            f"    {module:<48} {self_us / 1000:>8.1f} ms"
+            f"  (cumulativo {cumulative_us / 1000:.1f} ms)"
+        )
+
+    print("\n  etapas de boot:")
+    for name, seconds in phases.items():
+        print(f"    {name:<32} {seconds * 1000:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", choices=sorted(TARGETS), default="api")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args()
+
+    rows, phases = run_probe(TARGETS[args.target])
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "target": args.target,
+                    "phases_ms": {k: round(v * 1000, 1) for k, v in phases.items()},
+                    "modules": [
+                        {"module": m, "self_us": s, "cumulative_us": c}
+                        for m, s, c in rows
+                    ],
+                },
+                ensure_ascii=False,
+            )
+        )
+        return
+
+    print_report(args.target, rows, phases, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 from .knowledge_base import CompanyKnowledgeBase
 from .chat_session import ChatSession
+from .chat_message_bucket import ChatMessageBucket
+from .knowledge_ingestion import KnowledgeIngestionJob
 
 __all__ = [
     "CompanyKnowledgeBase",
     "ChatSession",
+    "ChatMessageBucket",
+    "KnowledgeIngestionJob",
 ]
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+from ..config import settings
+
+
+class ChatMessageBucket:
+    """
+    Páginas de mensagens de tamanho fixo (bucket pattern).
+
+    O documento da sessão guarda só uma janela recente de mensagens; o
+    histórico completo fica aqui, em páginas de MESSAGE_BUCKET_SIZE
+    mensagens indexadas por (session_id, bucket).
+    """
+
+    collection_name = "chat_message_buckets"
+
+    @staticmethod
+    def bucket_for(position: int) -> int:
+        """Número do bucket de uma mensagem pela sua posição na conversa"""
+        return position // settings.MESSAGE_BUCKET_SIZE
+
+    @staticmethod
+    def create_push_update(
+        company_id: str, messages: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        now = datetime.now()
+        expires_at = now + timedelta(days=settings.SESSION_TTL_DAYS)
+
+        return {
+            "$push": {"messages": {"$each": messages}},
+            "$inc": {"count": len(messages)},
+            "$set": {"updated_at": now, "expires_at": expires_at},
+            "$setOnInsert": {"company_id": company_id, "created_at": now},
+        }
+
+    @staticmethod
+    def get_indexes():
+        return [
+            {"keys": [("session_id", 1), ("bucket", 1)], "unique": True},
+        ]
+
+    @staticmethod
+    def get_ttl_index():
+        return {"keys": [("expires_at", 1)], "expireAfterSeconds": 0}
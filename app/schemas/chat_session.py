@@ -17,6 +17,7 @@ class ChatSession:
             "session_id": session_id,
             "company_id": company_id,
             "messages": [],
+            "message_count": 0,
             "rag_context_used": [],
             "summary": {
                 "total_interactions": 0,
@@ -59,7 +60,8 @@ class ChatSession:
     def get_indexes():
         return [
             [("session_id", 1)],
-            [("company_id", 1), ("updated_at", -1)],
+            # Também atende a paginação por cursor (updated_at, _id)
+            [("company_id", 1), ("updated_at", -1), ("_id", -1)],
             [("expires_at", 1)],
         ]
 
@@ -1,5 +1,11 @@
+import hashlib
+import unicodedata
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from bson.binary import Binary, BinaryVectorDtype
+from ..config import settings
+
+EMBEDDING_FORMATS = ("float", "float32", "int8")
 
 
 class CompanyKnowledgeBase:
@@ -11,7 +17,11 @@ class CompanyKnowledgeBase:
         "_id": ObjectId,
         "company_id": str,
         "content": str (formatado: "Pergunta: X\nResposta: Y\nCategoria: Z"),
-        "embedding": List[float] (512 dimensões),
+        "embedding": List[float] (512 dimensões) ou BSON vector (binData
+                     subtype 9) float32/int8, conforme EMBEDDING_STORAGE,
+        "embedding_format": "float" | "float32" | "int8",
+        "embedding_scale": float (só int8: valor = int8 * scale),
+        "content_hash": str (sha256 do content normalizado + modelo/dimensões),
         "metadata": {
             "question": str,
             "answer": str,
@@ -32,6 +42,56 @@ class CompanyKnowledgeBase:
         """Formata conteúdo para gerar embedding"""
         return f"Pergunta: {question}\nResposta: {answer}\nCategoria: {category}"
 
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """
+        Identifica o embedding de um conteúdo: mesmo texto (normalizado),
+        mesmo modelo e mesmas dimensões geram o mesmo vetor.
+        """
+        normalized = " ".join(unicodedata.normalize("NFC", content).split())
+        raw = f"{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_DIMENSIONS}:{normalized}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def encode_embedding(
+        embedding: List[float], fmt: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Campos de embedding do documento no formato de armazenamento.
+
+        float32 guarda o vetor como BSON vector binário (~4x menor que o
+        array de doubles); int8 aplica quantização escalar simétrica
+        (scale = max|v| / 127, ~12x menor). Similaridade de cosseno não
+        depende da escala, então o Atlas indexa o vetor int8 diretamente.
+        """
+        fmt = fmt or settings.EMBEDDING_STORAGE
+
+        if fmt == "float32":
+            value = Binary.from_vector(embedding, BinaryVectorDtype.FLOAT32)
+            scale = None
+        elif fmt == "int8":
+            scale = max((abs(v) for v in embedding), default=0.0) / 127 or 1.0
+            quantized = [max(-127, min(127, round(v / scale))) for v in embedding]
+            value = Binary.from_vector(quantized, BinaryVectorDtype.INT8)
+        else:
+            value = list(embedding)
+            scale = None
+
+        return {"embedding": value, "embedding_format": fmt, "embedding_scale": scale}
+
+    @staticmethod
+    def decode_embedding(doc: Dict[str, Any]) -> List[float]:
+        """Vetor em floats, qualquer que seja o formato armazenado"""
+        value = doc["embedding"]
+        if not isinstance(value, Binary):
+            return list(value)
+
+        data = value.as_vector().data
+        scale = doc.get("embedding_scale")
+        if scale:
+            return [v * scale for v in data]
+        return list(data)
+
     @staticmethod
     def extract_keywords(question: str, answer: str) -> List[str]:
         """Extrai keywords simples do texto (para busca híbrida)"""
@@ -66,7 +126,8 @@ class CompanyKnowledgeBase:
         return {
             "company_id": company_id,
             "content": content,
-            "embedding": embedding,
+            **CompanyKnowledgeBase.encode_embedding(embedding),
+            "content_hash": CompanyKnowledgeBase.content_hash(content),
             "metadata": {
                 "question": question,
                 "answer": answer,
@@ -87,6 +148,17 @@ class CompanyKnowledgeBase:
             [("company_id", 1), ("is_active", 1)],
             # Índice para categoria
             [("company_id", 1), ("metadata.category", 1)],
+            # Deduplicação / reaproveitamento de embeddings
+            [("company_id", 1), ("content_hash", 1)],
+            # Paginação por cursor (created_at, _id)
+            [("company_id", 1), ("is_active", 1), ("created_at", -1), ("_id", -1)],
+            [
+                ("company_id", 1),
+                ("is_active", 1),
+                ("metadata.category", 1),
+                ("created_at", -1),
+                ("_id", -1),
+            ],
             # Índice de texto para keywords
             [("metadata.keywords", "text")],
         ]
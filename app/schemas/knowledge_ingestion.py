@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Dict, Any
+from bson import ObjectId
+
+
+class KnowledgeIngestionJob:
+    """
+    Jobs de ingestão em massa do knowledge base.
+
+    O upload é primeiro gravado em staging (uma entrada por documento, com
+    `seq` sequencial); o worker consome o staging em chunks e avança o
+    `checkpoint`. Cada FAQ criada reutiliza o `_id` do item de staging, então
+    reprocessar um chunk após uma falha não duplica entradas.
+    """
+
+    collection_name = "knowledge_ingestion_jobs"
+    items_collection_name = "knowledge_ingestion_items"
+
+    @staticmethod
+    def create_job(company_id: str, source: str) -> Dict[str, Any]:
+        now = datetime.now()
+        return {
+            "company_id": company_id,
+            "source": source,
+            "status": "staging",
+            "total": 0,
+            "rejected": 0,
+            "processed": 0,
+            "inserted": 0,
+            "unchanged": 0,
+            "checkpoint": 0,
+            "attempt": 0,
+            "errors": [],
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    @staticmethod
+    def create_item(
+        job_id: ObjectId, seq: int, entry: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return {"job_id": job_id, "seq": seq, "entry": entry}
+
+    @staticmethod
+    def get_item_indexes():
+        return [
+            {"keys": [("job_id", 1), ("seq", 1)], "unique": True},
+        ]
@@ -3,6 +3,10 @@ from .rag_service import rag_service
 from .session_service import session_service
 from .usage_service import usage_service
 from .company_service import company_service
+from .ingestion_service import ingestion_service
+from .session_lock import session_lock
+from .admission_control import admission_control, AdmissionRejected
+from .openai_rate_limiter import openai_rate_limiter
 
 __all__ = [
     "openai_service",
@@ -10,4 +14,9 @@ __all__ = [
     "session_service",
     "usage_service",
     "company_service",
+    "ingestion_service",
+    "session_lock",
+    "admission_control",
+    "AdmissionRejected",
+    "openai_rate_limiter",
 ]
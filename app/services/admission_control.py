@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Requisição recusada por sobrecarga; `retry_after` em segundos"""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float = 1) -> float:
+        """Segundos até haver `amount` fichas (0 se já houver)"""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float = 1):
+        self.tokens -= amount
+
+    def adjust(self, amount: float):
+        """Devolve (positivo) ou cobra (negativo) fichas já consumidas"""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdmissionController:
+    """
+    Controle de admissão do /chat, por processo.
+
+    Dois token buckets limitam a taxa de entrada (MAX_REQUESTS_PER_SECOND no
+    total e MAX_REQUESTS_PER_MINUTE por empresa) e respondem 429. Um
+    semáforo limita os turnos em andamento (MAX_INFLIGHT_CHATS), tomado depois
+    da trava da sessão e antes de qualquer acesso ao Mongo;
+    quem não consegue vaga em ADMISSION_QUEUE_TIMEOUT recebe 503 em vez de
+    ficar acumulando em cima dos timeouts da OpenAI. O Retry-After do 503 usa
+    a média móvel da duração dos turnos.
+    """
+
+    def __init__(self):
+        self._global = TokenBucket(
+            rate=settings.MAX_REQUESTS_PER_SECOND,
+            capacity=settings.MAX_REQUESTS_PER_SECOND,
+        )
+        self._companies: Dict[str, TokenBucket] = {}
+        self._slots = asyncio.Semaphore(settings.MAX_INFLIGHT_CHATS)
+        self._avg_turn_seconds = 5.0
+
+    def _company_bucket(self, company_id: str) -> TokenBucket:
+        bucket = self._companies.get(company_id)
+        if bucket is None:
+            bucket = TokenBucket(
+                rate=settings.MAX_REQUESTS_PER_MINUTE / 60,
+                capacity=settings.MAX_REQUESTS_PER_MINUTE,
+            )
+            self._companies[company_id] = bucket
+        return bucket
+
+    def check_rate(self, company_id: str):
+        """Consome uma ficha dos dois buckets ou levanta AdmissionRejected (429)"""
+        company_bucket = self._company_bucket(company_id)
+
+        # Só consome se os dois tiverem ficha, para não gastar a da empresa à toa
+        wait = max(self._global.wait_time(), company_bucket.wait_time())
+        if wait > 0:
+            logger.warning(
+                f"[ADMISSION] Limite de taxa atingido. Empresa: {company_id}"
+            )
+            raise AdmissionRejected(
+                status_code=429,
+                retry_after=max(1, math.ceil(wait)),
+                detail="Muitas requisições, tente novamente em instantes",
+            )
+
+        self._global.take()
+        company_bucket.take()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Reserva uma vaga de execução do grafo ou levanta AdmissionRejected (503)"""
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(), timeout=settings.ADMISSION_QUEUE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning("[ADMISSION] Sem vagas para execução. Recusando.")
+            raise AdmissionRejected(
+                status_code=503,
+                retry_after=max(1, math.ceil(self._avg_turn_seconds)),
+                detail="Servidor sobrecarregado, tente novamente em instantes",
+            )
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._slots.release()
+            elapsed = time.monotonic() - started
+            self._avg_turn_seconds = 0.9 * self._avg_turn_seconds + 0.1 * elapsed
+
+
+admission_control = AdmissionController()
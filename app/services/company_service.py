@@ -1,15 +1,55 @@
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from datetime import datetime
-from ..database import mongodb
+from pymongo.errors import OperationFailure
+from ..config import settings
+from ..database import mongodb, cache
+from ..database.pagination import (
+    CountMode,
+    InvalidCursorError,
+    count_total,
+    fetch_page,
+)
 from ..models.company import CompanyConfig, CompanyConfigDB
 
 logger = logging.getLogger(__name__)
 
 
+CONFIG_CACHE_NAMESPACE = "company_config"
+
+WATCH_RETRY_BASE_DELAY = 1.0
+WATCH_RETRY_MAX_DELAY = 60.0
+# Códigos do servidor para resume token que não está mais no oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+CHANGE_STREAM_FATAL_ERROR = 280
+
+
 class CompanyService:
+    """
+    Configurações das empresas, com cache read-through em memória.
+
+    O cache guarda o objeto já validado e o `model_dump()` pré-calculado.
+    Escritas por este serviço invalidam a entrada local; com
+    COMPANY_CONFIG_CHANGE_STREAM ativo, um change stream do MongoDB propaga
+    as invalidações entre processos (API e workers).
+    """
+
     collection_name = "companies"
 
+    def __init__(self):
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def _cache_key(self, company_id: str) -> str:
+        return cache.namespace_key(CONFIG_CACHE_NAMESPACE, company_id)
+
+    def invalidate_config(self, company_id: Optional[str] = None):
+        """Remove a config de uma empresa do cache (ou de todas)"""
+        if company_id is None:
+            cache.invalidate_namespace(CONFIG_CACHE_NAMESPACE)
+        else:
+            cache.delete(self._cache_key(company_id))
+
     async def create_or_update_config(
         self, company_id: str, config: CompanyConfig
     ) -> CompanyConfigDB:
@@ -36,6 +76,8 @@ class CompanyService:
                 await collection.insert_one(config_db.model_dump())
                 logger.info(f"Configuração criada para {company_id}")
 
+            self.invalidate_config(company_id)
+
             updated_doc = await collection.find_one({"company_id": company_id})
             return CompanyConfigDB(**updated_doc)
 
@@ -45,23 +87,48 @@ class CompanyService:
 
     async def get_config(self, company_id: str) -> Optional[CompanyConfig]:
         """Recupera configuração de uma empresa"""
+        config, _ = await self._get_cached_config(company_id)
+        return config
+
+    async def get_config_dict(self, company_id: str) -> Dict[str, Any]:
+        """Configuração já serializada (model_dump), sem revalidar a cada mensagem"""
+        _, config_dict = await self._get_cached_config(company_id)
+        return dict(config_dict)
+
+    async def _get_cached_config(
+        self, company_id: str
+    ) -> Tuple[CompanyConfig, Dict[str, Any]]:
+        key = self._cache_key(company_id)
+
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
             db = mongodb.get_database()
             collection = db[self.collection_name]
 
             doc = await collection.find_one(
-                {"company_id": company_id, "is_active": True}
+                {"company_id": company_id, "is_active": True}, {"config": 1}
             )
 
             if doc:
-                return CompanyConfig(**doc["config"])
-
-            logger.warning(f"Config não encontrada para {company_id}, usando default")
-            return CompanyConfig()
+                config = CompanyConfig(**doc["config"])
+            else:
+                logger.warning(
+                    f"Config não encontrada para {company_id}, usando default"
+                )
+                config = CompanyConfig()
 
         except Exception as e:
+            # Falha de leitura não é cacheada: a próxima mensagem tenta de novo
             logger.error(f"Erro ao buscar config: {e}")
-            return CompanyConfig()
+            config = CompanyConfig()
+            return config, config.model_dump()
+
+        entry = (config, config.model_dump())
+        cache.set(key, entry, settings.COMPANY_CONFIG_CACHE_TTL)
+        return entry
 
     async def delete_config(self, company_id: str) -> bool:
         """Soft delete de configuração"""
@@ -74,6 +141,8 @@ class CompanyService:
                 {"$set": {"is_active": False, "updated_at": datetime.now()}},
             )
 
+            self.invalidate_config(company_id)
+
             if result.matched_count > 0:
                 logger.info(f"Configuração desativada: {company_id}")
                 return True
@@ -84,27 +153,41 @@ class CompanyService:
             logger.error(f"Erro ao deletar config: {e}")
             return False
 
-    async def list_companies(self, skip: int = 0, limit: int = 50) -> dict:
-        """Lista todas as empresas configuradas"""
+    async def list_companies(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        count: CountMode = "estimated",
+    ) -> dict:
+        """
+        Lista as empresas configuradas (mais recentes primeiro), paginando
+        por cursor. O total só é calculado na primeira página.
+        """
         try:
-            db = mongodb.get_database()
+            db = mongodb.get_listing_database()
             collection = db[self.collection_name]
 
-            total = await collection.count_documents({"is_active": True})
+            query = {"is_active": True}
 
-            cursor = (
-                collection.find(
-                    {"is_active": True}, {"config.vocabularios_especificos": 0}
-                )
-                .skip(skip)
-                .limit(limit)
-                .sort("created_at", -1)
-            )
+            total = None if cursor else await count_total(collection, query, count)
 
-            companies = await cursor.to_list(length=limit)
+            companies, next_cursor = await fetch_page(
+                collection,
+                query,
+                sort_field="created_at",
+                limit=limit,
+                cursor=cursor,
+                projection={
+                    "company_id": 1,
+                    "config.nome_bot": 1,
+                    "config.nicho_mercado": 1,
+                    "updated_at": 1,
+                },
+            )
 
             return {
                 "total": total,
+                "next_cursor": next_cursor,
                 "companies": [
                     {
                         "company_id": c["company_id"],
@@ -117,9 +200,86 @@ class CompanyService:
                 ],
             }
 
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar companies: {e}")
-            return {"total": 0, "companies": []}
+            return {"total": 0, "next_cursor": None, "companies": []}
+
+    def start_config_watch(self):
+        """Inicia o change stream de invalidação, se habilitado"""
+        if not settings.COMPANY_CONFIG_CHANGE_STREAM or self._watch_task:
+            return
+        self._watch_task = asyncio.create_task(self._watch_config_changes())
+
+    async def stop_config_watch(self):
+        if not self._watch_task:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
+    async def _watch_config_changes(self):
+        """
+        Invalida o cache local a cada alteração na collection.
+
+        Se o stream cair (eleição, rede, cursor perdido), reconecta com
+        backoff a partir do último resume token e limpa o cache, já que
+        alterações podem ter passado durante a queda. Requer replica set;
+        em um MongoDB standalone segue tentando e o cache fica limitado ao TTL.
+        """
+        resume_token = None
+        delay = WATCH_RETRY_BASE_DELAY
+        reconnecting = False
+
+        while True:
+            try:
+                db = mongodb.get_database()
+                collection = db[self.collection_name]
+                pipeline = [
+                    {"$project": {"fullDocument.company_id": 1, "operationType": 1}}
+                ]
+
+                async with collection.watch(
+                    pipeline, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    logger.info("[CONFIG_CACHE] Change stream de configs ativo")
+                    if reconnecting:
+                        self.invalidate_config()
+                    delay = WATCH_RETRY_BASE_DELAY
+
+                    async for change in stream:
+                        company_id = (change.get("fullDocument") or {}).get(
+                            "company_id"
+                        )
+                        # Deletes físicos não trazem o documento: limpa tudo
+                        self.invalidate_config(company_id)
+                        resume_token = stream.resume_token
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if resume_token is not None and _is_history_lost(e):
+                    # Token fora do oplog: recomeça do zero (cache limpo ao voltar)
+                    resume_token = None
+
+                logger.warning(
+                    f"[CONFIG_CACHE] Change stream caiu ({e}). "
+                    f"Nova tentativa em {delay:.0f}s; até lá vale o TTL."
+                )
+                reconnecting = True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WATCH_RETRY_MAX_DELAY)
+
+
+def _is_history_lost(error: Exception) -> bool:
+    return isinstance(error, OperationFailure) and error.code in (
+        CHANGE_STREAM_HISTORY_LOST,
+        CHANGE_STREAM_FATAL_ERROR,
+    )
 
 
 company_service = CompanyService()
@@ -0,0 +1,226 @@
+"""
+Backend falso da OpenAI para testes de carga e benchmarks (LLM_BACKEND=fake).
+
+Imita a interface usada do AsyncOpenAI (`chat.completions.create` e
+`embeddings.create`) e devolve os tipos do SDK, então limiter, retentativas,
+breaker e os nós do grafo rodam exatamente como em produção.
+
+- Conteúdo determinístico: derivado do hash da mensagem, o mesmo texto
+  sempre gera a mesma classificação, resposta e embedding.
+- Latência log-normal configurável por mediana e p95
+  (FAKE_LLM_LATENCY_MEDIAN_MS / FAKE_LLM_LATENCY_P95_MS); passar do timeout
+  da chamada gera APITimeoutError, como no cliente real.
+- Erros injetados com FAKE_LLM_ERROR_RATE (500 ou 429 com Retry-After).
+- Latências e erros saem de um gerador com FAKE_LLM_SEED: a mesma sequência
+  de chamadas reproduz a mesma sequência de tempos.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Union
+import httpx
+from openai import APITimeoutError, InternalServerError, RateLimitError
+from openai.types import CreateEmbeddingResponse, Embedding
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.completion_usage import CompletionUsage
+from openai.types.create_embedding_response import Usage
+from ..config import settings
+from ..models import Intent, KanbanStatus, Sentiment
+
+FAKE_URL = "http://fake-openai.local/v1"
+
+# Tokens aproximados por caractere, só para preencher o `usage`
+CHARS_PER_TOKEN = 4
+
+RESPONSE_TEMPLATES = [
+    "Claro! Posso te ajudar com isso. Qual serviço você gostaria de agendar?",
+    "Entendi. Temos horários disponíveis esta semana, qual dia fica melhor?",
+    "Perfeito, vou verificar a agenda para você.",
+    "Obrigado pelo contato! Posso ajudar com mais alguma coisa?",
+]
+
+KANBAN_BY_INTENT = {
+    Intent.SCHEDULING: KanbanStatus.EM_ATENDIMENTO,
+    Intent.RESCHEDULE: KanbanStatus.REAGENDAMENTO,
+    Intent.CANCELLATION: KanbanStatus.CANCELADO,
+    Intent.INFO: KanbanStatus.DUVIDA,
+    Intent.HUMAN_HANDOFF: KanbanStatus.HANDOFF_HUMANO,
+}
+
+
+def _seeded(text: str) -> random.Random:
+    return random.Random(hashlib.sha256(text.encode()).digest())
+
+
+def _tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class _LatencyModel:
+    def __init__(self, median_ms: float, p95_ms: float, rng: random.Random):
+        self.mu = math.log(max(median_ms, 0.001) / 1000)
+        # p95 de uma log-normal = mediana * exp(1.645 * sigma)
+        self.sigma = (
+            math.log(p95_ms / median_ms) / 1.645 if p95_ms > median_ms > 0 else 0.0
+        )
+        self.rng = rng
+
+    def sample(self) -> float:
+        return self.rng.lognormvariate(self.mu, self.sigma)
+
+
+class _FakeBackend:
+    def __init__(self):
+        self.rng = random.Random(settings.FAKE_LLM_SEED)
+        self.chat_latency = _LatencyModel(
+            settings.FAKE_LLM_LATENCY_MEDIAN_MS,
+            settings.FAKE_LLM_LATENCY_P95_MS,
+            self.rng,
+        )
+        self.embedding_latency = _LatencyModel(
+            settings.FAKE_EMBEDDING_LATENCY_MEDIAN_MS,
+            settings.FAKE_EMBEDDING_LATENCY_MEDIAN_MS * 3,
+            self.rng,
+        )
+
+    async def simulate(self, latency: _LatencyModel, path: str, timeout: Any):
+        delay = latency.sample()
+        failure = self.rng.random() < settings.FAKE_LLM_ERROR_RATE
+        request = httpx.Request("POST", f"{FAKE_URL}{path}")
+
+        if isinstance(timeout, (int, float)) and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise APITimeoutError(request=request)
+
+        await asyncio.sleep(delay)
+
+        if failure:
+            if self.rng.random() < 0.5:
+                raise RateLimitError(
+                    "Rate limit simulado",
+                    response=httpx.Response(
+                        429, request=request, headers={"retry-after": "1"}
+                    ),
+                    body=None,
+                )
+            raise InternalServerError(
+                "Erro simulado",
+                response=httpx.Response(500, request=request),
+                body=None,
+            )
+
+
+class _FakeCompletions:
+    def __init__(self, backend: _FakeBackend):
+        self._backend = backend
+
+    async def create(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        timeout: Any = None,
+        **kwargs: Any,
+    ) -> ChatCompletion:
+        await self._backend.simulate(
+            self._backend.chat_latency, "/chat/completions", timeout
+        )
+
+        prompt = "\n".join(str(m.get("content") or "") for m in messages)
+        user_text = str(messages[-1].get("content") or "")
+        content = json.dumps(self._answer(user_text), ensure_ascii=False)
+
+        prompt_tokens = _tokens(prompt)
+        completion_tokens = _tokens(content)
+        return ChatCompletion(
+            id=f"fake-{hashlib.md5(prompt.encode()).hexdigest()}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason="stop",
+                    message=ChatCompletionMessage(role="assistant", content=content),
+                )
+            ],
+            usage=CompletionUsage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+    def _answer(self, user_text: str) -> Dict[str, Any]:
+        rng = _seeded(user_text)
+
+        # Mesmos prompts montados por SentimentTool e IntentTool
+        if user_text.startswith("Analise o sentimento"):
+            return {
+                "sentiment": rng.choice(list(Sentiment)).value,
+                "score": rng.randint(30, 90),
+                "confidence": rng.choice(["alta", "média", "baixa"]),
+            }
+
+        if user_text.startswith("Analise a intenção"):
+            intent = rng.choice(list(Intent))
+            return {"intent": intent.value, "reason": "Classificação simulada"}
+
+        intent = rng.choice(list(Intent))
+        return {
+            "response_text": rng.choice(RESPONSE_TEMPLATES),
+            "kanban_status": KANBAN_BY_INTENT[intent].value,
+            "directives": {"type": "normal"},
+        }
+
+
+class _FakeEmbeddings:
+    def __init__(self, backend: _FakeBackend):
+        self._backend = backend
+
+    async def create(
+        self,
+        model: str,
+        input: Union[str, List[str]],
+        dimensions: Optional[int] = None,
+        timeout: Any = None,
+        **kwargs: Any,
+    ) -> CreateEmbeddingResponse:
+        await self._backend.simulate(
+            self._backend.embedding_latency, "/embeddings", timeout
+        )
+
+        texts = [input] if isinstance(input, str) else list(input)
+        size = dimensions or settings.EMBEDDING_DIMENSIONS
+        tokens = sum(_tokens(text) for text in texts)
+
+        return CreateEmbeddingResponse(
+            object="list",
+            model=model,
+            data=[
+                Embedding(object="embedding", index=i, embedding=self._vector(t, size))
+                for i, t in enumerate(texts)
+            ],
+            usage=Usage(prompt_tokens=tokens, total_tokens=tokens),
+        )
+
+    @staticmethod
+    def _vector(text: str, size: int) -> List[float]:
+        rng = _seeded(text)
+        vector = [rng.gauss(0, 1) for _ in range(size)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+class FakeOpenAIClient:
+    """Substituto do AsyncOpenAI com as rotas usadas pelo OpenAIService"""
+
+    def __init__(self):
+        backend = _FakeBackend()
+        self.chat = SimpleNamespace(completions=_FakeCompletions(backend))
+        self.embeddings = _FakeEmbeddings(backend)
@@ -0,0 +1,380 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from ..config import settings
+from ..database import mongodb
+from ..models.knowledge import KnowledgeEntryCreate
+from ..schemas import KnowledgeIngestionJob
+from .openai_service import openai_service
+from .rag_service import rag_service
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ("jsonl", "csv")
+
+MAX_STORED_ERRORS = 20
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(settings.EMBEDDING_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    try:
+        return len(_get_encoding().encode(text))
+    except Exception:
+        # Sem o vocabulário (ex.: sem rede): estimativa conservadora
+        return len(text) // 3 + 1
+
+
+class IngestionService:
+    """
+    Ingestão em massa de FAQs a partir de uploads JSONL/CSV.
+
+    1. `stage_upload` lê o arquivo linha a linha, valida cada entrada e grava
+       em staging em lotes, sem carregar o upload inteiro na memória.
+    2. `run_job` (worker) consome o staging em chunks de INGEST_CHUNK_SIZE,
+       descarta conteúdos que a empresa já tem (pelo content_hash), divide o
+       resto em batches limitados por tokens, gera embeddings com até
+       INGEST_EMBEDDING_CONCURRENCY batches em paralelo e grava com
+       bulk_write não ordenado.
+
+    O checkpoint só avança depois que o chunk inteiro foi gravado; se o job
+    falhar, `resume_job` continua do último chunk completo.
+    """
+
+    def __init__(self):
+        self.jobs_collection_name = KnowledgeIngestionJob.collection_name
+        self.items_collection_name = KnowledgeIngestionJob.items_collection_name
+
+    def _iter_entries(
+        self, file: BinaryIO, fmt: str
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(text), start=2):
+                # Colunas vazias usam o default do modelo
+                yield line_no, {
+                    k: v for k, v in row.items() if k and v not in ("", None)
+                }
+            return
+
+        for line_no, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, {"__error__": f"JSON inválido: {e.msg}"}
+
+    async def stage_upload(
+        self, company_id: str, file: BinaryIO, fmt: str, source: str = ""
+    ) -> Dict[str, Any]:
+        """Valida o upload e grava as entradas em staging. Retorna o job criado."""
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Formato não suportado: {fmt}")
+
+        db = mongodb.get_database()
+        jobs = db[self.jobs_collection_name]
+        items = db[self.items_collection_name]
+
+        job = KnowledgeIngestionJob.create_job(company_id, source)
+        job_id = (await jobs.insert_one(job)).inserted_id
+
+        seq = 0
+        rejected = 0
+        errors: List[str] = []
+        pending: List[Dict[str, Any]] = []
+
+        for line_no, raw in self._iter_entries(file, fmt):
+            try:
+                if "__error__" in raw:
+                    raise ValueError(raw["__error__"])
+                entry = KnowledgeEntryCreate(**raw).model_dump()
+            except ValidationError as e:
+                reason = "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                )
+                rejected += 1
+                if len(errors) < MAX_STORED_ERRORS:
+                    errors.append(f"linha {line_no}: {reason}")
+                continue
+            except (ValueError, TypeError) as e:
+                rejected += 1
+                if len(errors) < MAX_STORED_ERRORS:
+                    errors.append(f"linha {line_no}: {e}")
+                continue
+
+            pending.append(KnowledgeIngestionJob.create_item(job_id, seq, entry))
+            seq += 1
+
+            if len(pending) >= settings.INGEST_CHUNK_SIZE:
+                await items.insert_many(pending, ordered=False)
+                pending = []
+
+        if pending:
+            await items.insert_many(pending, ordered=False)
+
+        job = await jobs.find_one_and_update(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "status": "pending" if seq else "completed",
+                    "total": seq,
+                    "rejected": rejected,
+                    "errors": errors,
+                    "updated_at": datetime.now(),
+                }
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+        logger.info(
+            f"[INGEST] Job {job_id} em staging: {seq} entradas, {rejected} rejeitadas"
+        )
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = mongodb.get_database()
+        return await db[self.jobs_collection_name].find_one({"_id": ObjectId(job_id)})
+
+    async def resume_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Marca um job falho (ou preso em `running` por um worker que caiu)
+        para ser reprocessado a partir do checkpoint.
+
+        Um job `running` só é retomado se o último checkpoint (`updated_at`)
+        tiver mais de INGEST_JOB_STALE_SECONDS; antes disso o worker dele
+        pode estar vivo, e resetá-lo poria dois workers no mesmo job.
+        """
+        stale_before = datetime.now() - timedelta(
+            seconds=settings.INGEST_JOB_STALE_SECONDS
+        )
+        db = mongodb.get_database()
+        return await db[self.jobs_collection_name].find_one_and_update(
+            {
+                "_id": ObjectId(job_id),
+                "$or": [
+                    {"status": "failed"},
+                    {"status": "running", "updated_at": {"$lt": stale_before}},
+                ],
+            },
+            {
+                "$set": {"status": "pending", "updated_at": datetime.now()},
+                "$inc": {"attempt": 1},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _token_batches(
+        self, prepared: List[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Agrupa itens em batches limitados por tokens e por quantidade"""
+        batches: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        current_tokens = 0
+
+        for item in prepared:
+            tokens = count_tokens(item["content"])
+
+            if current and (
+                current_tokens + tokens > settings.INGEST_BATCH_MAX_TOKENS
+                or len(current) >= settings.INGEST_BATCH_MAX_ITEMS
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+
+            current.append(item)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(
+        self, semaphore: asyncio.Semaphore, batch: List[Dict[str, Any]]
+    ) -> Dict[str, List[float]]:
+        async with semaphore:
+            embeddings = await openai_service.batch_embeddings(
+                [item["content"] for item in batch]
+            )
+        return {
+            item["content_hash"]: embedding
+            for item, embedding in zip(batch, embeddings)
+        }
+
+    async def _bulk_write(self, collection, operations: List[Any]) -> int:
+        """
+        bulk_write não ordenado. Retorna quantos documentos foram inseridos;
+        ids já gravados numa tentativa anterior são ignorados.
+        """
+        if not operations:
+            return 0
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            return result.inserted_count
+        except BulkWriteError as e:
+            details = e.details
+            fatal = [
+                err
+                for err in details.get("writeErrors", [])
+                if err.get("code") != DUPLICATE_KEY_ERROR
+            ]
+            if fatal:
+                raise
+            return details.get("nInserted", 0)
+
+    async def run_job(self, job_id: str):
+        db = mongodb.get_database()
+        jobs = db[self.jobs_collection_name]
+        items = db[self.items_collection_name]
+        knowledge = db[rag_service.collection_name]
+
+        # Só um worker processa o job por vez
+        job = await jobs.find_one_and_update(
+            {"_id": ObjectId(job_id), "status": "pending"},
+            {"$set": {"status": "running", "updated_at": datetime.now()}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not job:
+            logger.info(f"[INGEST] Job {job_id} não está pendente. Ignorando.")
+            return
+
+        company_id = job["company_id"]
+        checkpoint = job["checkpoint"]
+        semaphore = asyncio.Semaphore(settings.INGEST_EMBEDDING_CONCURRENCY)
+
+        logger.info(
+            f"[INGEST] Job {job_id}: processando a partir do item {checkpoint} "
+            f"de {job['total']}"
+        )
+
+        try:
+            while True:
+                chunk = (
+                    await items.find(
+                        {"job_id": job["_id"], "seq": {"$gte": checkpoint}}
+                    )
+                    .sort("seq", 1)
+                    .limit(settings.INGEST_CHUNK_SIZE)
+                    .to_list(length=settings.INGEST_CHUNK_SIZE)
+                )
+                if not chunk:
+                    break
+
+                prepared = [
+                    rag_service.prepare_entry(item["entry"], item["_id"])
+                    for item in chunk
+                ]
+
+                # Conteúdos que a empresa já tem não geram embedding novo
+                existing = await rag_service.find_by_content_hash(
+                    company_id, {p["content_hash"]: p["content"] for p in prepared}
+                )
+                to_embed = list(
+                    {
+                        p["content_hash"]: p
+                        for p in prepared
+                        if p["content_hash"] not in existing
+                    }.values()
+                )
+
+                results = await asyncio.gather(
+                    *[
+                        self._embed_batch(semaphore, batch)
+                        for batch in self._token_batches(to_embed)
+                    ],
+                    return_exceptions=True,
+                )
+
+                embeddings: Dict[str, List[float]] = {}
+                for result in results:
+                    if not isinstance(result, BaseException):
+                        embeddings.update(result)
+
+                operations, _ = rag_service.build_upsert_operations(
+                    company_id, prepared, existing, embeddings
+                )
+                inserted = await self._bulk_write(knowledge, operations)
+                unchanged = len({p["content_hash"] for p in prepared} & existing.keys())
+
+                failure = next(
+                    (r for r in results if isinstance(r, BaseException)), None
+                )
+                if failure:
+                    # Batches bons já foram gravados; o checkpoint fica no
+                    # início do chunk e o reprocessamento os encontra pelo hash
+                    await jobs.update_one(
+                        {"_id": job["_id"]}, {"$inc": {"inserted": inserted}}
+                    )
+                    raise failure
+
+                checkpoint = chunk[-1]["seq"] + 1
+                await jobs.update_one(
+                    {"_id": job["_id"]},
+                    {
+                        "$set": {
+                            "checkpoint": checkpoint,
+                            "updated_at": datetime.now(),
+                        },
+                        "$inc": {
+                            "processed": len(chunk),
+                            "inserted": inserted,
+                            "unchanged": unchanged,
+                        },
+                    },
+                )
+                await items.delete_many(
+                    {"job_id": job["_id"], "seq": {"$lt": checkpoint}}
+                )
+
+                logger.info(
+                    f"[INGEST] Job {job_id}: {checkpoint}/{job['total']} processados"
+                )
+
+            await jobs.update_one(
+                {"_id": job["_id"]},
+                {"$set": {"status": "completed", "updated_at": datetime.now()}},
+            )
+            await rag_service._invalidate_cache(company_id)
+            logger.info(f"[INGEST] ✅ Job {job_id} concluído")
+
+        except Exception as e:
+            logger.error(f"[INGEST] ❌ Job {job_id} falhou: {e}", exc_info=True)
+            # Chunks parciais já estão visíveis na base
+            await rag_service._invalidate_cache(company_id)
+            await jobs.update_one(
+                {"_id": job["_id"]},
+                {
+                    "$set": {"status": "failed", "updated_at": datetime.now()},
+                    "$push": {
+                        "errors": {
+                            "$each": [f"checkpoint {checkpoint}: {e}"],
+                            "$slice": -MAX_STORED_ERRORS,
+                        }
+                    },
+                },
+            )
+
+
+ingestion_service = IngestionService()
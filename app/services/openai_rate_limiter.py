@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from ..config import settings
+from .admission_control import TokenBucket
+from .openai_resilience import MIN_CALL_BUDGET, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CHAT = 0
+PRIORITY_WORKER = 1
+PRIORITY_BULK = 2
+
+# Fração da cota que fica reservada para prioridades mais altas
+PRIORITY_RESERVES = {
+    PRIORITY_CHAT: 0.0,
+    PRIORITY_WORKER: 0.1,
+    PRIORITY_BULK: 0.3,
+}
+
+MAX_POLL_SECONDS = 1.0
+
+_priority: ContextVar[int] = ContextVar("openai_priority", default=PRIORITY_CHAT)
+
+# Dois buckets (requisições e tokens) reabastecidos por minuto, com o relógio
+# do Redis. Retorna 0 se consumiu, ou os ms até haver cota.
+ACQUIRE_SCRIPT = """
+local now = redis.call("TIME")
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local cost = {1, tonumber(ARGV[3])}
+local limits = {tonumber(ARGV[1]), tonumber(ARGV[2])}
+local reserve = tonumber(ARGV[4])
+local levels = {}
+local wait = 0
+
+for i = 1, 2 do
+    local limit = limits[i]
+    if limit > 0 then
+        local state = redis.call("HMGET", KEYS[i], "tokens", "ts")
+        local level = tonumber(state[1]) or limit
+        local ts = tonumber(state[2]) or now_ms
+        level = math.min(limit, level + (now_ms - ts) * limit / 60000)
+        levels[i] = level
+
+        local needed = cost[i] + reserve * limit
+        if level < needed then
+            wait = math.max(wait, (needed - level) * 60000 / limit)
+        end
+    end
+end
+
+for i = 1, 2 do
+    if levels[i] then
+        local level = levels[i]
+        if wait == 0 then
+            level = level - cost[i]
+        end
+        redis.call("HSET", KEYS[i], "tokens", tostring(level), "ts", now_ms)
+        redis.call("PEXPIRE", KEYS[i], 120000)
+    end
+end
+
+return math.ceil(wait)
+"""
+
+ADJUST_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return redis.call("HINCRBYFLOAT", KEYS[1], "tokens", ARGV[1])
+end
+return 0
+"""
+
+
+def estimate_tokens(texts: List[str]) -> int:
+    # Estimativa conservadora sem tokenizer (~3 caracteres por token)
+    return sum(len(text) // 3 + 1 for text in texts)
+
+
+class OpenAIRateLimiter:
+    """
+    Limita as chamadas à OpenAI por modelo (RPM e TPM) antes de enviá-las.
+
+    A cota é compartilhada entre réplicas da API e workers por buckets no
+    Redis; sem Redis (ou se ele falhar) cada processo usa buckets locais.
+    O custo é estimado antes da chamada e corrigido com o `usage` real.
+
+    A prioridade vem do contexto (`priority`): o /chat usa a cota inteira,
+    respostas atrasadas do worker deixam 10% livres e a ingestão em massa
+    deixa 30%, então o tráfego interativo não fica atrás de um lote grande.
+    """
+
+    def __init__(self):
+        self._redis = None
+        self._local: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def set_redis(self, redis):
+        self._redis = redis
+
+    @contextmanager
+    def priority(self, level: int):
+        token = _priority.set(level)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    def _limits(self, model: str) -> Tuple[int, int]:
+        rpm, tpm = settings.OPENAI_RATE_LIMITS.get(
+            model, (settings.OPENAI_DEFAULT_RPM, settings.OPENAI_DEFAULT_TPM)
+        )
+        return rpm, tpm
+
+    def _keys(self, model: str) -> List[str]:
+        return [f"openai_rl:{model}:requests", f"openai_rl:{model}:tokens"]
+
+    async def acquire(
+        self, model: str, tokens: int, deadline: Optional[float] = None
+    ) -> int:
+        """
+        Espera até haver cota para uma chamada de `tokens` tokens.
+        Retorna o custo reservado (passar para `settle` depois da chamada).
+
+        Com `deadline` (time.monotonic), levanta DeadlineExceeded assim que a
+        espera estimada passar do ponto em que ainda caberia a chamada, em
+        vez de esperar até OPENAI_RATE_LIMIT_MAX_WAIT.
+        """
+        rpm, tpm = self._limits(model)
+        if rpm <= 0 and tpm <= 0:
+            return 0
+
+        reserve = PRIORITY_RESERVES.get(_priority.get(), 0.0)
+        # Uma chamada maior que a cota livre nunca passaria
+        cost = min(tokens, int(tpm * (1 - reserve))) if tpm > 0 else tokens
+        give_up_at = time.monotonic() + settings.OPENAI_RATE_LIMIT_MAX_WAIT
+
+        while True:
+            wait = await self._try_consume(model, rpm, tpm, cost, reserve)
+            if wait <= 0:
+                return cost
+
+            now = time.monotonic()
+            if deadline is not None and now + wait > deadline - MIN_CALL_BUDGET:
+                logger.warning(
+                    f"[OPENAI_LIMIT] Sem cota para {model} dentro do prazo. "
+                    f"Desistindo."
+                )
+                raise DeadlineExceeded(f"Sem cota para chamar {model} no prazo")
+
+            remaining = give_up_at - now
+            if remaining <= 0:
+                logger.warning(
+                    f"[OPENAI_LIMIT] Espera máxima atingida para {model}. "
+                    f"Enviando mesmo assim."
+                )
+                return 0
+
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS, remaining))
+
+    async def settle(self, model: str, reserved: int, actual: int):
+        """Corrige o bucket de tokens com o uso real da chamada"""
+        delta = reserved - actual
+        if not reserved or not delta:
+            return
+
+        if self._redis is not None:
+            try:
+                await self._redis.eval(ADJUST_SCRIPT, 1, self._keys(model)[1], delta)
+                return
+            except Exception as e:
+                logger.warning(f"[OPENAI_LIMIT] Redis indisponível ({e}).")
+
+        bucket = self._local.get((model, "tokens"))
+        if bucket:
+            bucket.adjust(delta)
+
+    async def _try_consume(
+        self, model: str, rpm: int, tpm: int, cost: int, reserve: float
+    ) -> float:
+        if self._redis is not None:
+            try:
+                wait_ms = await self._redis.eval(
+                    ACQUIRE_SCRIPT, 2, *self._keys(model), rpm, tpm, cost, reserve
+                )
+                return int(wait_ms) / 1000
+            except Exception as e:
+                logger.warning(
+                    f"[OPENAI_LIMIT] Redis indisponível ({e}). Usando limite local."
+                )
+
+        buckets = [
+            (self._local_bucket(model, kind, limit), amount)
+            for kind, limit, amount in (("requests", rpm, 1), ("tokens", tpm, cost))
+            if limit > 0
+        ]
+        wait = max(
+            bucket.wait_time(amount + reserve * bucket.capacity)
+            for bucket, amount in buckets
+        )
+        if wait == 0:
+            for bucket, amount in buckets:
+                bucket.take(amount)
+        return wait
+
+    def _local_bucket(self, model: str, kind: str, limit: int) -> TokenBucket:
+        bucket = self._local.get((model, kind))
+        if bucket is None:
+            bucket = TokenBucket(rate=limit / 60, capacity=limit)
+            self._local[(model, kind)] = bucket
+        return bucket
+
+
+openai_rate_limiter = OpenAIRateLimiter()
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    OpenAIError,
+    RateLimitError,
+)
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    APITimeoutError,
+    APIConnectionError,
+    RateLimitError,
+    InternalServerError,
+)
+
+MAX_RETRY_AFTER = 10.0
+# Abaixo disso a chamada nem é enviada: não daria tempo de responder
+MIN_CALL_BUDGET = 1.0
+# Timeouts com orçamento menor que isso refletem o prazo do cliente, não o provedor
+MIN_BREAKER_TIMEOUT = 5.0
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitOpenError(OpenAIError):
+    """Circuito aberto: o modelo está falhando e a chamada nem é enviada"""
+
+
+class DeadlineExceeded(OpenAIError):
+    """O prazo da requisição acabou antes (ou durante) a chamada"""
+
+
+def has_budget(deadline: Optional[float]) -> bool:
+    """True se não há prazo ou se ainda cabe uma chamada até ele"""
+    return deadline is None or deadline - time.monotonic() > MIN_CALL_BUDGET
+
+
+class CircuitBreaker:
+    """
+    Breaker por modelo. Abre após OPENAI_BREAKER_FAILURES falhas seguidas e
+    recusa chamadas por OPENAI_BREAKER_COOLDOWN segundos; depois deixa passar
+    uma chamada de teste (meio-aberto), que fecha ou reabre o circuito.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        if self.opened_at is None:
+            return False
+        cooling = time.monotonic() - self.opened_at < settings.OPENAI_BREAKER_COOLDOWN
+        return cooling or self._probing
+
+    def before_call(self):
+        if self.is_open:
+            raise CircuitOpenError(f"Circuito aberto para {self.model}")
+        if self.opened_at is not None:
+            self._probing = True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"[OPENAI] Circuito fechado para {self.model}")
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release(self):
+        """A chamada terminou sem dizer nada sobre a saúde do modelo"""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or (
+            self.failures >= settings.OPENAI_BREAKER_FAILURES
+        ):
+            if self.opened_at is None:
+                logger.warning(
+                    f"[OPENAI] Circuito aberto para {self.model} após "
+                    f"{self.failures} falhas"
+                )
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Janela das últimas latências por modelo, para o limiar de hedging"""
+
+    def __init__(self):
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, model: str, seconds: float):
+        self._samples.setdefault(model, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def p95(self, model: str) -> Optional[float]:
+        samples = self._samples.get(model)
+        if not samples or len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    """Backoff exponencial com jitter, respeitando o Retry-After do 429/503"""
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), MAX_RETRY_AFTER)
+        except ValueError:
+            pass
+
+    return random.uniform(0, settings.OPENAI_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay: Optional[float]) -> Any:
+    """
+    Roda `call`; se não responder em `delay` segundos, dispara uma segunda
+    cópia e fica com a primeira que der certo. Só para chamadas idempotentes.
+    """
+    if delay is None:
+        return await call()
+
+    tasks = {asyncio.ensure_future(call())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            logger.info(f"[OPENAI] Chamada lenta (> {delay:.2f}s). Disparando hedge.")
+            tasks.add(asyncio.ensure_future(call()))
+
+        error: Optional[BaseException] = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -1,23 +1,196 @@
-from openai import AsyncOpenAI, OpenAIError, APITimeoutError, APIConnectionError
-from typing import List, Dict, Any, Optional
+from openai import (
+    AsyncOpenAI,
+    OpenAIError,
+    APITimeoutError,
+    APIConnectionError,
+    RateLimitError,
+)
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
 import logging
+import time
 from ..config import settings
+from ..metrics import observe_llm_call
+from .openai_resilience import (
+    MIN_BREAKER_TIMEOUT,
+    RETRYABLE_ERRORS,
+    CircuitBreaker,
+    DeadlineExceeded,
+    LatencyTracker,
+    has_budget,
+    hedged,
+    retry_delay,
+)
+from .openai_rate_limiter import openai_rate_limiter, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
 
 class OpenAIService:
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=settings.OPENAI_API_KEY, timeout=settings.OPENAI_TIMEOUT
+        self._client = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies = LatencyTracker()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self.connect()
+        return self._client
+
+    def connect(self):
+        """Cria o cliente no lifespan/startup em vez de no import do módulo"""
+        if self._client is None:
+            self._client = self._create_client()
+
+    @staticmethod
+    def _create_client():
+        if settings.LLM_BACKEND == "fake":
+            from .fake_openai import FakeOpenAIClient
+
+            logger.warning("[OPENAI] Usando backend falso (LLM_BACKEND=fake)")
+            return FakeOpenAIClient()
+
+        # Retentativas ficam em _execute (orçamento de tempo, jitter e breaker)
+        return AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=0,
         )
 
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(model)
+        return breaker
+
+    def is_available(self, model: str) -> bool:
+        """False enquanto o circuito do modelo estiver aberto"""
+        return not self._breaker(model).is_open
+
+    async def _send(
+        self,
+        model: str,
+        estimate: int,
+        send: Callable[[float], Awaitable[Any]],
+        budget_deadline: float,
+        deadline: Optional[float],
+    ) -> Any:
+        reserved = await openai_rate_limiter.acquire(model, estimate, deadline)
+
+        # A espera pela cota consome o orçamento: o timeout só é calculado agora
+        if not has_budget(budget_deadline):
+            await openai_rate_limiter.settle(model, reserved, 0)
+            raise DeadlineExceeded(f"Sem tempo para chamar {model} após a espera")
+        timeout = min(settings.OPENAI_TIMEOUT, budget_deadline - time.monotonic())
+        started = time.monotonic()
+        try:
+            response = await send(timeout)
+        except APITimeoutError as e:
+            observe_llm_call(model, time.monotonic() - started, ok=False)
+            if timeout < MIN_BREAKER_TIMEOUT:
+                # Timeout curto reflete o prazo do cliente, não o provedor
+                raise DeadlineExceeded(
+                    f"Prazo esgotado durante a chamada a {model}"
+                ) from e
+            raise
+        except Exception:
+            observe_llm_call(model, time.monotonic() - started, ok=False)
+            raise
+
+        elapsed = time.monotonic() - started
+        self._latencies.record(model, elapsed)
+        observe_llm_call(
+            model,
+            elapsed,
+            ok=True,
+            prompt_tokens=response.usage.prompt_tokens,
+            completion_tokens=getattr(response.usage, "completion_tokens", 0),
+        )
+        await openai_rate_limiter.settle(model, reserved, response.usage.total_tokens)
+        return response
+
+    async def _execute(
+        self,
+        model: str,
+        estimate: int,
+        send: Callable[[float], Awaitable[Any]],
+        hedge: bool = False,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """
+        Envia a chamada com retentativas dentro de OPENAI_RETRY_BUDGET ou até
+        `deadline` (time.monotonic), o que vier antes; cada tentativa recebe
+        só o tempo que resta (depois da espera pela cota) como timeout.
+
+        Timeouts, erros de conexão, 5xx e 429 são repetidos com backoff com
+        jitter (ou o Retry-After do provedor). Falhas que não são de cota
+        alimentam o circuit breaker do modelo; com o circuito aberto a chamada
+        falha na hora com CircuitOpenError. Com `hedge`, uma segunda cópia é
+        disparada se a primeira passar do p95 recente do modelo.
+        """
+        breaker = self._breaker(model)
+        budget_deadline = time.monotonic() + settings.OPENAI_RETRY_BUDGET
+        if deadline is not None:
+            budget_deadline = min(budget_deadline, deadline)
+        attempt = 0
+
+        while True:
+            if not has_budget(budget_deadline):
+                raise DeadlineExceeded(f"Sem tempo para chamar {model}")
+
+            breaker.before_call()
+            hedge_delay = (
+                self._latencies.p95(model)
+                if hedge and settings.OPENAI_HEDGING
+                else None
+            )
+
+            try:
+                response = await hedged(
+                    lambda: self._send(
+                        model, estimate, send, budget_deadline, deadline
+                    ),
+                    hedge_delay,
+                )
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, RateLimitError):
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+
+                attempt += 1
+                delay = retry_delay(attempt, e)
+                if (
+                    attempt > settings.OPENAI_MAX_RETRIES
+                    or time.monotonic() + delay >= budget_deadline
+                ):
+                    raise
+
+                logger.warning(
+                    f"[OPENAI] {type(e).__name__} em {model}. "
+                    f"Tentativa {attempt + 1} em {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return response
+
     async def get_embedding(self, text: str) -> List[float]:
         try:
-            response = await self.client.embeddings.create(
-                model=settings.EMBEDDING_MODEL,
-                input=text,
-                dimensions=settings.EMBEDDING_DIMENSIONS,
+            response = await self._execute(
+                settings.EMBEDDING_MODEL,
+                estimate_tokens([text]),
+                lambda timeout: self.client.embeddings.create(
+                    model=settings.EMBEDDING_MODEL,
+                    input=text,
+                    dimensions=settings.EMBEDDING_DIMENSIONS,
+                    timeout=timeout,
+                ),
             )
             return response.data[0].embedding
         except APITimeoutError as e:
@@ -38,10 +211,15 @@ class OpenAIService:
             if len(texts) > 2048:
                 raise ValueError("Maximo de 2048 textos por batch")
 
-            response = await self.client.embeddings.create(
-                model=settings.EMBEDDING_MODEL,
-                input=texts,
-                dimensions=settings.EMBEDDING_DIMENSIONS,
+            response = await self._execute(
+                settings.EMBEDDING_MODEL,
+                estimate_tokens(texts),
+                lambda timeout: self.client.embeddings.create(
+                    model=settings.EMBEDDING_MODEL,
+                    input=texts,
+                    dimensions=settings.EMBEDDING_DIMENSIONS,
+                    timeout=timeout,
+                ),
             )
             return [item.embedding for item in response.data]
         except APITimeoutError as e:
@@ -64,6 +242,8 @@ class OpenAIService:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         response_format: Optional[Dict[str, str]] = None,
+        hedge: bool = False,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         try:
             params = {
@@ -78,7 +258,17 @@ class OpenAIService:
             if response_format:
                 params["response_format"] = response_format
 
-            response = await self.client.chat.completions.create(**params)
+            # A OpenAI conta max_tokens na cota de TPM antes da resposta
+            response = await self._execute(
+                params["model"],
+                estimate_tokens([str(m.get("content") or "") for m in messages])
+                + params["max_tokens"],
+                lambda timeout: self.client.chat.completions.create(
+                    **params, timeout=timeout
+                ),
+                hedge=hedge,
+                deadline=deadline,
+            )
 
             return {
                 "content": response.choices[0].message.content,
@@ -1,14 +1,30 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime
 from bson import ObjectId
+from pymongo import InsertOne, UpdateMany, UpdateOne
 import logging
+import math
 from ..database import mongodb, cache
+from ..database.pagination import (
+    CountMode,
+    InvalidCursorError,
+    count_total,
+    fetch_page,
+)
 from ..schemas import CompanyKnowledgeBase
 from ..models import FAQResponse
+from ..tools.bm25_index import BM25Index, analyze
 from .openai_service import openai_service
 from ..config import settings
+from ..logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
+# Constante do reciprocal rank fusion (valor usual da literatura)
+RRF_K = 60
+
+LEXICAL_INDEX_TTL = 600
+
 
 class RAGService:
     """Serviço de RAG - Retrieval Augmented Generation"""
@@ -20,7 +36,8 @@ class RAGService:
         self, query: str, company_id: str, top_k: int = None, min_score: float = None
     ) -> List[FAQResponse]:
         """
-        Busca vetorial no knowledge base
+        Busca híbrida no knowledge base: ranking léxico local (BM25) e
+        vector search do Atlas, combinados por reciprocal rank fusion
 
         Args:
             query: Pergunta/query do usuário
@@ -36,103 +53,71 @@ class RAGService:
             min_score = min_score or settings.RAG_MIN_SCORE
 
             logger.info(
-                f"[RAG] Iniciando busca: query='{query[:50]}...', company={company_id}"
+                "[RAG] Iniciando busca: query='%s...', company=%s",
+                query[:50],
+                company_id,
+                extra=SAMPLED,
             )
-            logger.debug(f"[RAG] Parâmetros: top_k={top_k}, min_score={min_score}")
+            logger.debug("[RAG] Parâmetros: top_k=%s, min_score=%s", top_k, min_score)
 
-            # Verifica cache
-            cache_key = f"rag:{company_id}:{query[:50]}"
+            # Verifica cache (na geração mais recente, vinda de outro processo
+            # se a FAQ foi alterada por lá)
+            await cache.sync_namespace(self._cache_namespace(company_id))
+            cache_key = cache.namespace_key(
+                self._cache_namespace(company_id), f"search:{query[:50]}"
+            )
             cached = cache.get(cache_key)
             if cached:
-                logger.info(f"[RAG] ✅ Cache hit - {len(cached)} FAQs retornadas")
+                logger.info(
+                    "[RAG] ✅ Cache hit - %d FAQs retornadas",
+                    len(cached),
+                    extra=SAMPLED,
+                )
                 return cached
 
-            # Gera embedding da query
-            logger.debug("[RAG] Gerando embedding da query...")
-            query_embedding = await openai_service.get_embedding(query)
-            logger.debug(f"[RAG] Embedding gerado: dimensão {len(query_embedding)}")
-
-            # Busca vetorial no MongoDB Atlas
-            db = mongodb.get_database()
-            collection = db[self.collection_name]
-
-            # Primeiro, verifica se existem documentos da empresa
-            doc_count = await collection.count_documents(
-                {"company_id": company_id, "is_active": True}
+            # Ranking léxico local (BM25), que também informa se há FAQs
+            lexical_index = await self._get_lexical_index(company_id)
+            logger.info(
+                "[RAG] 📊 Total de FAQs ativas na base: %d",
+                lexical_index.size,
+                extra=SAMPLED,
             )
-            logger.info(f"[RAG] 📊 Total de FAQs ativas na base: {doc_count}")
 
-            if doc_count == 0:
+            if lexical_index.size == 0:
                 logger.warning(
                     f"[RAG] ⚠️ Nenhuma FAQ encontrada para company_id={company_id}"
                 )
                 return []
 
-            # Pipeline de agregação com vector search
-            pipeline = [
-                {
-                    "$vectorSearch": {
-                        "index": "knowledge_vector_index",  # Nome do índice no Atlas
-                        "path": "embedding",
-                        "queryVector": query_embedding,
-                        "numCandidates": top_k * 10,  # Busca 10x para filtrar
-                        "limit": top_k * 2,
-                        "filter": {"company_id": company_id, "is_active": True},
-                    }
-                },
-                {"$addFields": {"score": {"$meta": "vectorSearchScore"}}},
-                {"$match": {"score": {"$gte": min_score}}},
-                {
-                    "$project": {
-                        "question": "$metadata.question",
-                        "answer": "$metadata.answer",
-                        "category": "$metadata.category",
-                        "score": 1,
-                    }
-                },
-                {"$limit": top_k},
+            # Candidatos sem piso (a similaridade local decide se o Atlas
+            # falhar); no RRF só entram os que cobrem a query
+            # (RAG_LEXICAL_MIN_COVERAGE), senão qualquer palavra em comum
+            # entraria na fusão com ~0.5
+            hits = lexical_index.search(query, top_k * 2)
+            lexical_candidates = [
+                {**payload, "score": score} for payload, score, _ in hits
             ]
+            lexical_results = [
+                {**payload, "score": score}
+                for payload, score, coverage in hits
+                if coverage >= settings.RAG_LEXICAL_MIN_COVERAGE
+            ]
+            logger.info(
+                "[RAG] 🔤 BM25 retornou %d resultados (%d acima do piso)",
+                len(lexical_candidates),
+                len(lexical_results),
+                extra=SAMPLED,
+            )
 
-            logger.debug(f"[RAG] Executando pipeline de agregação...")
-
-            try:
-                cursor = collection.aggregate(pipeline)
-                results = await cursor.to_list(length=top_k)
-                logger.info(
-                    f"[RAG] 🔍 Vector search retornou {len(results)} resultados"
-                )
+            # Ranking vetorial (Atlas); se falhar, reordena os candidatos
+            # léxicos por similaridade local
+            vector_results = await self._vector_candidates(
+                query, company_id, top_k, min_score, lexical_candidates
+            )
 
-                # Se não encontrou nada, tenta com score mais baixo
-                if len(results) == 0 and min_score > 0.3:
-                    logger.warning(
-                        f"[RAG] 🔄 Nenhum resultado com min_score={min_score}, tentando com 0.3..."
-                    )
-                    pipeline[2] = {"$match": {"score": {"$gte": 0.3}}}
-                    cursor = collection.aggregate(pipeline)
-                    results = await cursor.to_list(length=top_k)
-                    logger.info(f"[RAG] 🔍 Retry retornou {len(results)} resultados")
-
-                # Se AINDA não encontrou, usa fallback sem score
-                if len(results) == 0:
-                    logger.warning(
-                        "[RAG] 🔄 Vector search vazio, tentando fallback sem filtro de score..."
-                    )
-                    pipeline[2] = {"$match": {}}  # Remove filtro de score
-                    cursor = collection.aggregate(pipeline)
-                    results = await cursor.to_list(length=top_k)
-                    logger.info(
-                        f"[RAG] 🔍 Fallback sem score retornou {len(results)} resultados"
-                    )
-            except Exception as vector_error:
-                # Se o vector search falhar (índice não existe), faz busca fallback
-                logger.error(f"[RAG] ❌ Vector search falhou: {vector_error}")
-                logger.warning("[RAG] 🔄 Tentando busca fallback sem vector search...")
-
-                # Fallback: busca simples por palavras-chave
-                results = await self._fallback_search(
-                    collection, query, company_id, top_k
-                )
-                logger.info(f"[RAG] Fallback retornou {len(results)} resultados")
+            results = self._reciprocal_rank_fusion(
+                [vector_results, lexical_results], top_k
+            )
 
             # Converte para FAQResponse
             faqs = []
@@ -142,13 +127,15 @@ class RAGService:
                         question=r["question"],
                         answer=r["answer"],
                         category=r.get("category", "geral"),
-                        relevance_score=r.get("score", 0.5),  # Score padrão no fallback
+                        relevance_score=r["score"],
                     )
                     faqs.append(faq)
-                    logger.info(
-                        f"[RAG]   ✓ FAQ: '{faq.question[:60]}...' (score: {faq.relevance_score:.3f})"
+                    logger.debug(
+                        "[RAG]   ✓ FAQ: '%s...' (score: %.3f)",
+                        faq.question[:60],
+                        faq.relevance_score,
                     )
-                    logger.debug(f"[RAG]     Resposta: '{faq.answer[:80]}...'")
+                    logger.debug("[RAG]     Resposta: '%s...'", faq.answer[:80])
                 except Exception as parse_error:
                     logger.error(f"[RAG] Erro ao parsear FAQ: {parse_error}, doc: {r}")
                     continue
@@ -156,7 +143,9 @@ class RAGService:
             # Cacheia resultado (1 hora)
             if faqs:
                 cache.set(cache_key, faqs, ttl_seconds=3600)
-                logger.info(f"[RAG] ✅ {len(faqs)} FAQs encontradas e cacheadas")
+                logger.info(
+                    "[RAG] ✅ %d FAQs encontradas e cacheadas", len(faqs), extra=SAMPLED
+                )
             else:
                 logger.warning(
                     f"[RAG] ⚠️ Nenhuma FAQ relevante encontrada (min_score={min_score})"
@@ -169,100 +158,177 @@ class RAGService:
             # Retorna lista vazia em caso de erro (não quebra o fluxo)
             return []
 
-    async def _fallback_search(
-        self, collection, query: str, company_id: str, top_k: int
+    async def _vector_candidates(
+        self,
+        query: str,
+        company_id: str,
+        top_k: int,
+        min_score: float,
+        lexical_results: List[Dict[str, Any]],
     ) -> List[Dict[str, Any]]:
-        """
-        Busca fallback usando text search ou regex quando vector search não está disponível
-        """
+        """Candidatos do vector search (2x top_k), ordenados por similaridade"""
+        query_embedding = None
         try:
-            logger.info(f"[RAG FALLBACK] Buscando FAQs para: '{query[:50]}...'")
-
-            # Busca simples por palavras-chave na question e answer
-            query_lower = query.lower()
-            keywords = query_lower.split()[:5]  # Primeiras 5 palavras
-
-            # Remove stopwords
-            stopwords = [
-                "como",
-                "para",
-                "faço",
-                "fazer",
-                "é",
-                "um",
-                "uma",
-                "o",
-                "a",
-                "de",
-                "do",
-                "da",
+            logger.debug("[RAG] Gerando embedding da query...")
+            query_embedding = await openai_service.get_embedding(query)
+            logger.debug("[RAG] Embedding gerado: dimensão %d", len(query_embedding))
+
+            db = mongodb.get_database()
+            collection = db[self.collection_name]
+
+            # Pipeline de agregação com vector search
+            pipeline = [
+                {
+                    "$vectorSearch": {
+                        "index": "knowledge_vector_index",  # Nome do índice no Atlas
+                        "path": "embedding",
+                        "queryVector": query_embedding,
+                        "numCandidates": top_k * 10,  # Busca 10x para filtrar
+                        "limit": top_k * 2,
+                        "filter": {"company_id": company_id, "is_active": True},
+                    }
+                },
+                {"$addFields": {"score": {"$meta": "vectorSearchScore"}}},
+                {"$match": {"score": {"$gte": min_score}}},
+                {
+                    "$project": {
+                        "question": "$metadata.question",
+                        "answer": "$metadata.answer",
+                        "category": "$metadata.category",
+                        "score": 1,
+                    }
+                },
             ]
-            keywords = [kw for kw in keywords if len(kw) > 3 and kw not in stopwords]
 
-            logger.debug(f"[RAG FALLBACK] Keywords extraídas: {keywords}")
+            logger.debug("[RAG] Executando pipeline de agregação...")
 
-            if not keywords:
-                # Se não há keywords, retorna TODAS as FAQs da empresa
+            results = await collection.aggregate(pipeline).to_list(length=top_k * 2)
+            logger.info(
+                "[RAG] 🔍 Vector search retornou %d resultados",
+                len(results),
+                extra=SAMPLED,
+            )
+
+            # Se não encontrou nada, tenta com score mais baixo
+            if len(results) == 0 and min_score > 0.3:
                 logger.warning(
-                    "[RAG FALLBACK] Sem keywords válidas, retornando todas FAQs"
+                    f"[RAG] 🔄 Nenhum resultado com min_score={min_score}, tentando com 0.3..."
+                )
+                pipeline[2] = {"$match": {"score": {"$gte": 0.3}}}
+                results = await collection.aggregate(pipeline).to_list(length=top_k * 2)
+                logger.info(
+                    "[RAG] 🔍 Retry retornou %d resultados", len(results), extra=SAMPLED
                 )
-                cursor = collection.find(
-                    {"company_id": company_id, "is_active": True},
-                    {
-                        "metadata.question": 1,
-                        "metadata.answer": 1,
-                        "metadata.category": 1,
-                    },
-                ).limit(top_k)
-            else:
-                # Constrói regex para buscar pelas palavras
-                regex_pattern = "|".join([f"(?i){kw}" for kw in keywords])
 
-                logger.debug(f"[RAG FALLBACK] Regex pattern: {regex_pattern}")
+            return results
 
-                cursor = collection.find(
-                    {
-                        "company_id": company_id,
-                        "is_active": True,
-                        "$or": [
-                            {"metadata.question": {"$regex": regex_pattern}},
-                            {"metadata.answer": {"$regex": regex_pattern}},
-                            {"metadata.keywords": {"$in": keywords}},
-                        ],
-                    },
-                    {
-                        "metadata.question": 1,
-                        "metadata.answer": 1,
-                        "metadata.category": 1,
-                    },
-                ).limit(top_k)
+        except Exception as vector_error:
+            logger.error(f"[RAG] ❌ Vector search falhou: {vector_error}")
 
-            docs = await cursor.to_list(length=top_k)
+            # OpenAI indisponível: o BM25 cobre a busca sozinho
+            if query_embedding is None or not lexical_results:
+                logger.warning("[RAG] 🔄 Usando apenas o ranking léxico (BM25)")
+                return []
 
-            # Formata resultado similar ao vector search
-            results = []
-            for doc in docs:
-                results.append(
-                    {
-                        "question": doc["metadata"]["question"],
-                        "answer": doc["metadata"]["answer"],
-                        "category": doc["metadata"].get("category", "geral"),
-                        "score": 0.6,  # Score fixo alto para fallback
-                    }
-                )
-                logger.debug(
-                    f"[RAG FALLBACK]   ✓ Encontrou: '{doc['metadata']['question'][:50]}...'"
-                )
+            # Índice do Atlas indisponível: similaridade local nos candidatos
+            logger.warning("[RAG] 🔄 Reordenando candidatos do BM25 localmente")
+            return await self._score_locally(
+                query_embedding, lexical_results, min_score
+            )
 
-            logger.info(f"[RAG FALLBACK] ✅ {len(results)} FAQs encontradas")
-            return results
+    async def _score_locally(
+        self,
+        query_embedding: List[float],
+        candidates: List[Dict[str, Any]],
+        min_score: float,
+    ) -> List[Dict[str, Any]]:
+        """Similaridade de cosseno calculada aqui, com embeddings decodificados"""
+        try:
+            db = mongodb.get_database()
+            cursor = db[self.collection_name].find(
+                {"_id": {"$in": [c["_id"] for c in candidates]}},
+                {"embedding": 1, "embedding_scale": 1},
+            )
+            vectors = {
+                doc["_id"]: CompanyKnowledgeBase.decode_embedding(doc)
+                async for doc in cursor
+            }
+
+            scored = []
+            for candidate in candidates:
+                vector = vectors.get(candidate["_id"])
+                if vector is None:
+                    continue
+                score = _cosine_similarity(query_embedding, vector)
+                if score >= min_score:
+                    scored.append({**candidate, "score": score})
+
+            scored.sort(key=lambda c: c["score"], reverse=True)
+            return scored
 
         except Exception as e:
-            logger.error(
-                f"[RAG FALLBACK] ❌ Erro no fallback search: {e}", exc_info=True
-            )
+            logger.error(f"[RAG] ❌ Erro na similaridade local: {e}")
             return []
 
+    async def _get_lexical_index(self, company_id: str) -> BM25Index:
+        """Índice BM25 das FAQs ativas da empresa, construído uma vez e cacheado"""
+        cache_key = cache.namespace_key(self._cache_namespace(company_id), "bm25")
+        index = cache.get(cache_key)
+        if index is not None:
+            return index
+
+        db = mongodb.get_database()
+        cursor = db[self.collection_name].find(
+            {"company_id": company_id, "is_active": True},
+            {
+                "metadata.question": 1,
+                "metadata.answer": 1,
+                "metadata.category": 1,
+            },
+        )
+
+        documents = []
+        async for doc in cursor:
+            metadata = doc["metadata"]
+            category = metadata.get("category", "geral")
+            documents.append(
+                (
+                    {
+                        "_id": doc["_id"],
+                        "question": metadata["question"],
+                        "answer": metadata["answer"],
+                        "category": category,
+                    },
+                    analyze(f"{metadata['question']} {metadata['answer']} {category}"),
+                )
+            )
+
+        index = BM25Index(documents)
+        cache.set(cache_key, index, LEXICAL_INDEX_TTL)
+        logger.info(f"[RAG] Índice BM25 construído: {index.size} FAQs de {company_id}")
+        return index
+
+    @staticmethod
+    def _reciprocal_rank_fusion(
+        rankings: List[List[Dict[str, Any]]], top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Combina rankings por posição (RRF): score = soma de 1 / (k + rank).
+
+        O score final é normalizado para 0-1 pelo máximo possível (primeiro
+        lugar em todos os rankings); um documento que só aparece no topo de
+        um dos rankings fica com 1/len(rankings).
+        """
+        fused: Dict[str, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking, start=1):
+                entry = fused.setdefault(str(doc["_id"]), {**doc, "score": 0.0})
+                entry["score"] += 1 / (RRF_K + rank)
+
+        max_score = len(rankings) / (RRF_K + 1)
+        ranked = sorted(fused.values(), key=lambda d: d["score"], reverse=True)
+        return [{**doc, "score": doc["score"] / max_score} for doc in ranked[:top_k]]
+
     def format_for_prompt(self, faqs: List[FAQResponse]) -> str:
         """
         Formata FAQs para inserir no prompt do agente
@@ -279,7 +345,9 @@ class RAGService:
             )
             return "Nenhum conhecimento específico encontrado na base."
 
-        logger.info(f"[RAG] 📝 Formatando {len(faqs)} FAQs para o prompt")
+        logger.info(
+            "[RAG] 📝 Formatando %d FAQs para o prompt", len(faqs), extra=SAMPLED
+        )
 
         formatted = "=== CONHECIMENTO DA BASE (FAQ) ===\n\n"
         for i, faq in enumerate(faqs, 1):
@@ -295,7 +363,7 @@ class RAGService:
         formatted += "Se a pergunta do cliente corresponder a alguma FAQ acima, USE essa resposta diretamente. "
         formatted += "NÃO invente informações que não estão nas FAQs acima."
 
-        logger.debug(f"[RAG] Prompt formatado com {len(formatted)} caracteres")
+        logger.debug("[RAG] Prompt formatado com %d caracteres", len(formatted))
         return formatted
 
     async def create_knowledge(
@@ -310,9 +378,9 @@ class RAGService:
         try:
             logger.info(f"[RAG] Criando FAQ: '{question[:50]}...'")
 
-            # Gera embedding
+            # Gera embedding (ou reaproveita o de um conteúdo idêntico)
             content = CompanyKnowledgeBase.format_content(question, answer, category)
-            embedding = await openai_service.get_embedding(content)
+            [embedding] = await self._embeddings_for(company_id, [content])
 
             # Cria documento
             document = CompanyKnowledgeBase.create_document(
@@ -330,7 +398,7 @@ class RAGService:
             result = await collection.insert_one(document)
 
             # Limpa cache relacionado
-            self._invalidate_cache(company_id)
+            await self._invalidate_cache(company_id)
 
             logger.info(f"[RAG] ✅ FAQ criada: {result.inserted_id}")
             return str(result.inserted_id)
@@ -347,12 +415,12 @@ class RAGService:
         answer: Optional[str] = None,
         category: Optional[str] = None,
         priority: Optional[int] = None,
-    ) -> bool:
+    ) -> Dict[str, bool]:
         """
         Atualiza entrada existente
 
         Returns:
-            True se atualizado com sucesso
+            Dict com updated (False se não encontrada) e embedding_regenerated
         """
         try:
             db = mongodb.get_database()
@@ -364,27 +432,32 @@ class RAGService:
             )
 
             if not current:
-                return False
+                return {"updated": False, "embedding_regenerated": False}
 
             update_doc = {}
             regenerate_embedding = False
 
-            # Verifica se precisa regenerar embedding
             if question or answer or category:
-                regenerate_embedding = True
-
                 new_question = question or current["metadata"]["question"]
                 new_answer = answer or current["metadata"]["answer"]
                 new_category = category or current["metadata"]["category"]
 
-                # Gera novo embedding
                 content = CompanyKnowledgeBase.format_content(
                     new_question, new_answer, new_category
                 )
-                embedding = await openai_service.get_embedding(content)
+                new_hash = CompanyKnowledgeBase.content_hash(content)
+                current_hash = current.get(
+                    "content_hash"
+                ) or CompanyKnowledgeBase.content_hash(current.get("content", ""))
+
+                # Só gera embedding se o conteúdo realmente mudou
+                if new_hash != current_hash:
+                    [embedding] = await self._embeddings_for(company_id, [content])
+                    update_doc.update(CompanyKnowledgeBase.encode_embedding(embedding))
+                    regenerate_embedding = True
 
                 update_doc["content"] = content
-                update_doc["embedding"] = embedding
+                update_doc["content_hash"] = new_hash
                 update_doc["metadata.question"] = new_question
                 update_doc["metadata.answer"] = new_answer
                 update_doc["metadata.category"] = new_category
@@ -406,12 +479,15 @@ class RAGService:
             )
 
             # Limpa cache
-            self._invalidate_cache(company_id)
+            await self._invalidate_cache(company_id)
 
             logger.info(
                 f"FAQ atualizada: {entry_id} (embedding regenerado: {regenerate_embedding})"
             )
-            return result.matched_count > 0
+            return {
+                "updated": result.matched_count > 0,
+                "embedding_regenerated": regenerate_embedding,
+            }
 
         except Exception as e:
             logger.error(f"Erro ao atualizar knowledge: {e}")
@@ -441,7 +517,7 @@ class RAGService:
             )
 
             # Limpa cache
-            self._invalidate_cache(company_id)
+            await self._invalidate_cache(company_id)
 
             logger.info(f"FAQ deletada (soft): {entry_id}")
             return result.matched_count > 0
@@ -455,45 +531,43 @@ class RAGService:
         company_id: str,
         category: Optional[str] = None,
         limit: int = 50,
-        skip: int = 0,
+        cursor: Optional[str] = None,
+        count: CountMode = "estimated",
     ) -> Dict[str, Any]:
         """
-        Lista entradas do knowledge base
+        Lista entradas do knowledge base (mais recentes primeiro)
 
         Returns:
-            Dict com total e lista de entries
+            Dict com total (só na primeira página), lista de entries e
+            cursor da próxima página
         """
         try:
-            db = mongodb.get_database()
+            db = mongodb.get_listing_database()
             collection = db[self.collection_name]
 
             query = {"company_id": company_id, "is_active": True}
             if category:
                 query["metadata.category"] = category
 
-            # Total
-            total = await collection.count_documents(query)
+            total = None if cursor else await count_total(collection, query, count)
 
             # Documentos (sem embedding para economizar banda)
-            cursor = (
-                collection.find(
-                    query,
-                    {
-                        "_id": 1,
-                        "metadata.question": 1,
-                        "metadata.answer": 1,
-                        "metadata.category": 1,
-                        "metadata.priority": 1,
-                        "created_at": 1,
-                        "metadata.updated_at": 1,
-                    },
-                )
-                .skip(skip)
-                .limit(limit)
+            docs, next_cursor = await fetch_page(
+                collection,
+                query,
+                sort_field="created_at",
+                limit=limit,
+                cursor=cursor,
+                projection={
+                    "_id": 1,
+                    "metadata.question": 1,
+                    "metadata.answer": 1,
+                    "metadata.category": 1,
+                    "metadata.priority": 1,
+                    "metadata.updated_at": 1,
+                },
             )
 
-            docs = await cursor.to_list(length=limit)
-
             entries = [
                 {
                     "id": str(doc["_id"]),
@@ -507,8 +581,10 @@ class RAGService:
                 for doc in docs
             ]
 
-            return {"total": total, "entries": entries}
+            return {"total": total, "entries": entries, "next_cursor": next_cursor}
 
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar knowledge: {e}")
             raise
@@ -517,62 +593,237 @@ class RAGService:
         self, company_id: str, entries: List[Dict[str, Any]]
     ) -> List[str]:
         """
-        Criação em massa de FAQs
+        Criação em massa de FAQs, com upsert pelo hash do conteúdo
+
+        Entradas cujo conteúdo já existe na empresa não geram embedding nem
+        documento novo: a FAQ existente é reativada e tem a prioridade
+        atualizada. Conteúdos repetidos no próprio lote viram uma só FAQ.
 
         Args:
             company_id: ID da empresa
             entries: Lista de dicts com question, answer, category, priority
 
         Returns:
-            Lista de IDs criados
+            Lista de IDs (na ordem das entries)
         """
         try:
             logger.info(f"[RAG] Bulk create: {len(entries)} FAQs")
 
-            # Prepara textos para batch embedding
-            texts = [
-                CompanyKnowledgeBase.format_content(
-                    e["question"], e["answer"], e["category"]
-                )
-                for e in entries
-            ]
+            db = mongodb.get_database()
+            collection = db[self.collection_name]
 
-            # Gera embeddings em batch
-            embeddings = await openai_service.batch_embeddings(texts)
+            prepared = [self.prepare_entry(entry, ObjectId()) for entry in entries]
+            existing = await self.find_by_content_hash(
+                company_id, {p["content_hash"]: p["content"] for p in prepared}
+            )
 
-            # Cria documentos
-            documents = [
-                CompanyKnowledgeBase.create_document(
-                    company_id=company_id,
-                    question=entries[i]["question"],
-                    answer=entries[i]["answer"],
-                    category=entries[i]["category"],
-                    priority=entries[i].get("priority", 3),
-                    embedding=embeddings[i],
+            new_contents = {
+                p["content_hash"]: p["content"]
+                for p in prepared
+                if p["content_hash"] not in existing
+            }
+            embeddings = {}
+            if new_contents:
+                vectors = await openai_service.batch_embeddings(
+                    list(new_contents.values())
                 )
-                for i in range(len(entries))
-            ]
+                embeddings = dict(zip(new_contents.keys(), vectors))
 
-            # Insere em massa
-            db = mongodb.get_database()
-            collection = db[self.collection_name]
-            result = await collection.insert_many(documents)
+            operations, ids_by_hash = self.build_upsert_operations(
+                company_id, prepared, existing, embeddings
+            )
+            if operations:
+                await collection.bulk_write(operations, ordered=False)
 
             # Limpa cache
-            self._invalidate_cache(company_id)
+            await self._invalidate_cache(company_id)
 
-            ids = [str(id) for id in result.inserted_ids]
-            logger.info(f"[RAG] ✅ Bulk create: {len(ids)} FAQs criadas com sucesso")
+            ids = [str(ids_by_hash[p["content_hash"]]) for p in prepared]
+            logger.info(
+                f"[RAG] ✅ Bulk create: {len(embeddings)} FAQs novas, "
+                f"{len(ids_by_hash) - len(embeddings)} já existentes"
+            )
             return ids
 
         except Exception as e:
             logger.error(f"[RAG] ❌ Erro no bulk create: {e}", exc_info=True)
             raise
 
-    def _invalidate_cache(self, company_id: str):
-        """Limpa cache relacionado a uma empresa"""
+    @staticmethod
+    def prepare_entry(entry: Dict[str, Any], entry_id: ObjectId) -> Dict[str, Any]:
+        content = CompanyKnowledgeBase.format_content(
+            entry["question"], entry["answer"], entry["category"]
+        )
+        return {
+            "_id": entry_id,
+            "entry": entry,
+            "content": content,
+            "content_hash": CompanyKnowledgeBase.content_hash(content),
+        }
+
+    async def find_by_content_hash(
+        self, company_id: str, contents_by_hash: Dict[str, str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        FAQs da empresa (ativas ou não) que já têm esses conteúdos.
+
+        Documentos gravados antes do content_hash existir são encontrados
+        pelo `content` e devolvidos com `legacy=True` (o embedding é tido como
+        do modelo atual); o upsert grava o hash neles, em vez de criar uma
+        segunda cópia.
+        """
+        if not contents_by_hash:
+            return {}
+
+        db = mongodb.get_database()
+        cursor = db[self.collection_name].find(
+            {
+                "company_id": company_id,
+                "$or": [
+                    {"content_hash": {"$in": list(contents_by_hash)}},
+                    {
+                        "content_hash": {"$exists": False},
+                        "content": {"$in": list(contents_by_hash.values())},
+                    },
+                ],
+            },
+            {
+                "content": 1,
+                "content_hash": 1,
+                "embedding": 1,
+                "embedding_scale": 1,
+                "is_active": 1,
+            },
+        )
+
+        found: Dict[str, Dict[str, Any]] = {}
+        async for doc in cursor:
+            if "content_hash" not in doc:
+                doc["content_hash"] = CompanyKnowledgeBase.content_hash(doc["content"])
+                doc["legacy"] = True
+
+            current = found.get(doc["content_hash"])
+            # Se houver duplicatas antigas, prefere a ativa
+            if current is None or (
+                doc.get("is_active") and not current.get("is_active")
+            ):
+                found[doc["content_hash"]] = doc
+        return found
+
+    def build_upsert_operations(
+        self,
+        company_id: str,
+        prepared: List[Dict[str, Any]],
+        existing: Dict[str, Dict[str, Any]],
+        embeddings: Dict[str, List[float]],
+    ) -> Tuple[List[Any], Dict[str, ObjectId]]:
+        """
+        Operações de bulk_write: insere conteúdos novos (que tenham embedding)
+        e reativa/atualiza a prioridade dos existentes.
+
+        A FAQ que fica ativa para um conteúdo desativa as outras cópias ativas
+        do mesmo texto (ex.: embedding de outro modelo/dimensão, com outro
+        hash), para a busca não trazer a mesma resposta duas vezes.
+        """
+        latest = {p["content_hash"]: p for p in prepared}
+        now = datetime.now()
+
+        operations = []
+        ids_by_hash: Dict[str, ObjectId] = {}
+
+        for content_hash, item in latest.items():
+            entry = item["entry"]
+
+            if content_hash in existing:
+                doc_id = existing[content_hash]["_id"]
+                update = {
+                    "is_active": True,
+                    "metadata.priority": entry.get("priority", 3),
+                    "metadata.updated_at": now,
+                }
+                if existing[content_hash].get("legacy"):
+                    update["content_hash"] = content_hash
+                operations.append(UpdateOne({"_id": doc_id}, {"$set": update}))
+
+            elif content_hash in embeddings:
+                doc_id = item["_id"]
+                document = CompanyKnowledgeBase.create_document(
+                    company_id=company_id,
+                    question=entry["question"],
+                    answer=entry["answer"],
+                    category=entry["category"],
+                    priority=entry.get("priority", 3),
+                    embedding=embeddings[content_hash],
+                )
+                document["_id"] = doc_id
+                operations.append(InsertOne(document))
+
+            else:
+                continue
+
+            operations.append(
+                UpdateMany(
+                    {
+                        "company_id": company_id,
+                        "content": item["content"],
+                        "_id": {"$ne": doc_id},
+                        "is_active": True,
+                    },
+                    {"$set": {"is_active": False, "metadata.updated_at": now}},
+                )
+            )
+            ids_by_hash[content_hash] = doc_id
+
+        return operations, ids_by_hash
+
+    async def _embeddings_for(
+        self, company_id: str, contents: List[str]
+    ) -> List[List[float]]:
+        """
+        Embeddings dos conteúdos, reaproveitando os já gravados com o mesmo
+        hash e sem repetir textos iguais na chamada à OpenAI.
+        """
+        hashes = [CompanyKnowledgeBase.content_hash(c) for c in contents]
+
+        known = {
+            h: CompanyKnowledgeBase.decode_embedding(doc)
+            for h, doc in (
+                await self.find_by_content_hash(company_id, dict(zip(hashes, contents)))
+            ).items()
+        }
+
+        missing = {h: c for h, c in zip(hashes, contents) if h not in known}
+        if missing:
+            if len(missing) == 1:
+                vectors = [await openai_service.get_embedding(*missing.values())]
+            else:
+                vectors = await openai_service.batch_embeddings(list(missing.values()))
+            known.update(zip(missing.keys(), vectors))
+
+        logger.debug(
+            f"[RAG] Embeddings: {len(missing)} gerados, "
+            f"{len(contents) - len(missing)} reaproveitados"
+        )
+        return [known[h] for h in hashes]
+
+    @staticmethod
+    def _cache_namespace(company_id: str) -> str:
+        return f"rag:{company_id}"
+
+    async def _invalidate_cache(self, company_id: str):
+        """
+        Limpa cache relacionado a uma empresa (resultados de busca e índice
+        BM25), neste processo e, via Redis, nos demais
+        """
+        await cache.invalidate_shared_namespace(self._cache_namespace(company_id))
         logger.debug(f"[RAG] Cache invalidado para company {company_id}")
 
 
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
 # Instância global
 rag_service = RAGService()
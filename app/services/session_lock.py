@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Só remove/renova a lease se ela ainda for nossa
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class SessionLockService:
+    """
+    Serializa os turnos de uma mesma sessão.
+
+    Dentro do processo, um asyncio.Lock por sessão enfileira as requisições;
+    entre processos (réplicas da API e workers), uma lease no Redis
+    (SET NX PX com token) garante um turno por vez. A lease é renovada
+    enquanto o turno roda e expira sozinha se o processo morrer.
+
+    Se o Redis falhar ou a espera passar de SESSION_LOCK_WAIT_TIMEOUT (ou do
+    `deadline` da requisição, o que vier antes), o turno segue sem a trava
+    (fail-open): atrasar a resposta é pior que processar fora de ordem.
+    """
+
+    def __init__(self):
+        self._redis = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._holders: Dict[str, int] = {}
+
+    def set_redis(self, redis):
+        self._redis = redis
+
+    def _lease_key(self, session_id: str) -> str:
+        return f"session_lock:{session_id}"
+
+    @asynccontextmanager
+    async def hold(self, session_id: str, deadline: Optional[float] = None):
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        self._holders[session_id] = self._holders.get(session_id, 0) + 1
+        wait_until = time.monotonic() + settings.SESSION_LOCK_WAIT_TIMEOUT
+        if deadline is not None:
+            wait_until = min(wait_until, deadline)
+
+        locked = False
+        token = None
+        renewal = None
+        try:
+            try:
+                await asyncio.wait_for(
+                    lock.acquire(), timeout=max(0.0, wait_until - time.monotonic())
+                )
+                locked = True
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"[SESSION_LOCK] Timeout local na sessão {session_id}. "
+                    f"Seguindo sem serializar."
+                )
+
+            token = await self._acquire_lease(session_id, wait_until)
+            if token:
+                renewal = asyncio.create_task(self._renew_lease(session_id, token))
+
+            yield
+
+        finally:
+            if renewal:
+                renewal.cancel()
+            if token:
+                await self._release_lease(session_id, token)
+            if locked:
+                lock.release()
+
+            self._holders[session_id] -= 1
+            if not self._holders[session_id]:
+                del self._holders[session_id]
+                self._locks.pop(session_id, None)
+
+    async def _acquire_lease(self, session_id: str, deadline: float) -> Optional[str]:
+        if self._redis is None:
+            return None
+
+        key = self._lease_key(session_id)
+        token = uuid.uuid4().hex
+        ttl_ms = int(settings.SESSION_LOCK_TTL * 1000)
+        delay = 0.05
+
+        try:
+            while True:
+                if await self._redis.set(key, token, nx=True, px=ttl_ms):
+                    return token
+
+                if time.monotonic() + delay > deadline:
+                    logger.warning(
+                        f"[SESSION_LOCK] Lease da sessão {session_id} ocupada além "
+                        f"do limite. Seguindo sem serializar."
+                    )
+                    return None
+
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.5)
+
+        except Exception as e:
+            logger.warning(f"[SESSION_LOCK] Redis indisponível ({e}). Sem lease.")
+            return None
+
+    async def _renew_lease(self, session_id: str, token: str):
+        ttl_ms = int(settings.SESSION_LOCK_TTL * 1000)
+        try:
+            while True:
+                await asyncio.sleep(settings.SESSION_LOCK_TTL / 3)
+                await self._redis.eval(
+                    RENEW_SCRIPT, 1, self._lease_key(session_id), token, ttl_ms
+                )
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"[SESSION_LOCK] Falha ao renovar lease: {e}")
+
+    async def _release_lease(self, session_id: str, token: str):
+        try:
+            await self._redis.eval(
+                RELEASE_SCRIPT, 1, self._lease_key(session_id), token
+            )
+        except Exception as e:
+            logger.warning(f"[SESSION_LOCK] Falha ao liberar lease: {e}")
+
+
+session_lock = SessionLockService()
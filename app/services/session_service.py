@@ -1,15 +1,105 @@
 from typing import List, Dict, Any, Optional
+import asyncio
 import logging
 from datetime import datetime, date
+from pymongo import ReturnDocument
+from ..config import settings
 from ..database import mongodb
-from ..schemas import ChatSession
+from ..database.pagination import (
+    CountMode,
+    InvalidCursorError,
+    count_total,
+    fetch_page,
+)
+from ..schemas import ChatSession, ChatMessageBucket
 
 logger = logging.getLogger(__name__)
 
 
+class SessionUnitOfWork:
+    """
+    Acumula as alterações de uma sessão durante o processamento de um turno
+    ($push/$set/$inc) para gravá-las em um único update atômico.
+
+    Os arrays de histórico usam $slice, então o documento não cresce sem
+    limite.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.messages: List[Dict[str, Any]] = []
+        self._set: Dict[str, Any] = {}
+        self._push: Dict[str, List[Any]] = {}
+        self._inc: Dict[str, int] = {}
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.messages or self._set or self._push or self._inc)
+
+    def append_messages(self, messages: List[Dict[str, Any]]) -> "SessionUnitOfWork":
+        self.messages.extend(messages)
+        return self
+
+    def update_summary(
+        self,
+        sentiment: Optional[str] = None,
+        intent: Optional[str] = None,
+        kanban_status: Optional[str] = None,
+        rag_hit: bool = False,
+    ) -> "SessionUnitOfWork":
+        if sentiment:
+            self._push.setdefault("summary.sentiment_history", []).append(sentiment)
+        if intent:
+            self._push.setdefault("summary.intent_history", []).append(intent)
+        if kanban_status:
+            self._set["summary.last_kanban_status"] = kanban_status
+        if rag_hit:
+            self._inc["summary.rag_hits"] = self._inc.get("summary.rag_hits", 0) + 1
+        return self
+
+    def add_rag_usage(
+        self, question: str, relevance_score: float
+    ) -> "SessionUnitOfWork":
+        rag_usage = ChatSession.create_rag_usage(question, relevance_score)
+        self._push.setdefault("rag_context_used", []).append(rag_usage)
+        return self
+
+    def set_pause_state(
+        self, paused_until: Optional[datetime], last_sender_type: str
+    ) -> "SessionUnitOfWork":
+        self._set["paused_until"] = paused_until
+        self._set["last_sender_type"] = last_sender_type
+        return self
+
+    def build_update(self) -> Dict[str, Any]:
+        update: Dict[str, Any] = {"$set": {**self._set, "updated_at": datetime.now()}}
+
+        push = {
+            field: {"$each": values, "$slice": -settings.SESSION_HISTORY_CAP}
+            for field, values in self._push.items()
+        }
+        inc = dict(self._inc)
+
+        if self.messages:
+            push["messages"] = {
+                "$each": self.messages,
+                "$slice": -settings.SESSION_RECENT_MESSAGES,
+            }
+            inc["summary.total_interactions"] = 1
+            inc["message_count"] = len(self.messages)
+
+        if push:
+            update["$push"] = push
+        if inc:
+            update["$inc"] = inc
+
+        return update
+
+
 class SessionService:
     def __init__(self):
         self.collection_name = ChatSession.collection_name
+        self.bucket_collection_name = ChatMessageBucket.collection_name
 
     def _convert_dates_to_datetime(self, obj: Any) -> Any:
         if isinstance(obj, date) and not isinstance(obj, datetime):
@@ -24,6 +114,76 @@ class SessionService:
         else:
             return obj
 
+    def _context_projection(self, n: int) -> Dict[str, Any]:
+        """Projeção do contexto de um turno: resumo + últimas N mensagens"""
+        return {
+            "session_id": 1,
+            "company_id": 1,
+            "summary": 1,
+            "customer_context": 1,
+            "paused_until": 1,
+            "last_sender_type": 1,
+            "messages": {"$slice": -n},
+        }
+
+    async def load_session_context(
+        self,
+        session_id: str,
+        company_id: str,
+        customer_context: Dict[str, Any],
+        n: int = 6,
+    ) -> Dict[str, Any]:
+        """
+        Obtém (ou cria) a sessão e atualiza o customer_context em um único
+        round-trip, retornando apenas o resumo e as últimas N mensagens.
+        """
+        try:
+            db = mongodb.get_database()
+            collection = db[self.collection_name]
+
+            customer_context = self._convert_dates_to_datetime(customer_context)
+
+            new_session = ChatSession.create_new_session(
+                session_id=session_id,
+                company_id=company_id,
+                customer_context=customer_context,
+            )
+            for key in ("session_id", "customer_context", "updated_at"):
+                new_session.pop(key)
+
+            return await collection.find_one_and_update(
+                {"session_id": session_id},
+                {
+                    "$set": {
+                        "customer_context": customer_context,
+                        "updated_at": datetime.now(),
+                    },
+                    "$setOnInsert": self._convert_dates_to_datetime(new_session),
+                },
+                projection=self._context_projection(n),
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+
+        except Exception as e:
+            logger.error(f"Erro ao carregar contexto da sessao: {e}", exc_info=True)
+            raise
+
+    async def get_session_context(
+        self, session_id: str, n: int = 6
+    ) -> Optional[Dict[str, Any]]:
+        """Leitura projetada (resumo + últimas N mensagens), sem upsert"""
+        try:
+            db = mongodb.get_database()
+            collection = db[self.collection_name]
+
+            return await collection.find_one(
+                {"session_id": session_id}, self._context_projection(n)
+            )
+        except Exception as e:
+            logger.error(f"Erro ao buscar contexto da sessao: {e}", exc_info=True)
+            return None
+
     async def get_or_create_session(
         self, session_id: str, company_id: str, customer_context: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -63,25 +223,154 @@ class SessionService:
             logger.error(f"Erro ao obter/criar sessao: {e}", exc_info=True)
             raise
 
-    async def append_messages(self, session_id: str, messages: List[Dict[str, Any]]):
-        try:
-            db = mongodb.get_database()
-            collection = db[self.collection_name]
+    def unit_of_work(self, session_id: str) -> SessionUnitOfWork:
+        return SessionUnitOfWork(session_id)
 
-            messages = self._convert_dates_to_datetime(messages)
+    async def commit(self, uow: SessionUnitOfWork):
+        """
+        Grava todas as alterações acumuladas em um único update da sessão.
 
-            await collection.update_one(
-                {"session_id": session_id},
-                {
-                    "$push": {"messages": {"$each": messages}},
-                    "$set": {"updated_at": datetime.now()},
-                    "$inc": {"summary.total_interactions": 1},
-                },
+        Quando há mensagens, o contador `message_count` devolvido pelo update
+        define em qual bucket cada mensagem entra no histórico completo.
+        """
+        if uow.is_empty:
+            return
+
+        db = mongodb.get_database()
+        collection = db[self.collection_name]
+
+        update = self._convert_dates_to_datetime(uow.build_update())
+
+        if not uow.messages:
+            await collection.update_one({"session_id": uow.session_id}, update)
+            return
+
+        session = await self._apply_with_messages(collection, uow.session_id, update)
+
+        if session is None:
+            # Sessão legada (histórico inteiro no documento): migra e tenta de novo
+            if not await self._migrate_legacy_session(db, uow.session_id):
+                return
+            session = await self._apply_with_messages(
+                collection, uow.session_id, update
             )
+            if session is None:
+                return
+
+        messages = update["$push"]["messages"]["$each"]
+        await self._write_buckets(
+            db,
+            session_id=uow.session_id,
+            company_id=session.get("company_id"),
+            first_position=session["message_count"] - len(messages),
+            messages=messages,
+        )
+
+    async def _apply_with_messages(
+        self, collection, session_id: str, update: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        return await collection.find_one_and_update(
+            {"session_id": session_id, "message_count": {"$exists": True}},
+            update,
+            projection={"company_id": 1, "message_count": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def append_messages(self, session_id: str, messages: List[Dict[str, Any]]):
+        """
+        Adiciona mensagens à janela recente da sessão e às páginas do histórico.
+
+        O documento da sessão mantém só as últimas SESSION_RECENT_MESSAGES
+        mensagens; o histórico completo fica nos buckets.
+        """
+        try:
+            await self.commit(self.unit_of_work(session_id).append_messages(messages))
         except Exception as e:
             logger.error(f"Erro ao adicionar mensagens: {e}", exc_info=True)
             raise
 
+    async def _write_buckets(
+        self,
+        db,
+        session_id: str,
+        company_id: Optional[str],
+        first_position: int,
+        messages: List[Dict[str, Any]],
+    ):
+        pages: Dict[int, List[Dict[str, Any]]] = {}
+        for offset, message in enumerate(messages):
+            bucket = ChatMessageBucket.bucket_for(first_position + offset)
+            pages.setdefault(bucket, []).append(message)
+
+        bucket_collection = db[self.bucket_collection_name]
+        await asyncio.gather(
+            *[
+                bucket_collection.update_one(
+                    {"session_id": session_id, "bucket": bucket},
+                    ChatMessageBucket.create_push_update(company_id, page),
+                    upsert=True,
+                )
+                for bucket, page in pages.items()
+            ]
+        )
+
+    async def _migrate_legacy_session(self, db, session_id: str) -> bool:
+        """Move o array `messages` de uma sessão antiga para buckets"""
+        collection = db[self.collection_name]
+
+        session = await collection.find_one(
+            {"session_id": session_id}, {"company_id": 1, "messages": 1}
+        )
+        if not session:
+            return False
+
+        legacy_messages = session.get("messages", [])
+
+        result = await collection.update_one(
+            {"session_id": session_id, "message_count": {"$exists": False}},
+            {
+                "$set": {
+                    "message_count": len(legacy_messages),
+                    "messages": legacy_messages[-settings.SESSION_RECENT_MESSAGES :],
+                }
+            },
+        )
+
+        # Outro processo pode ter migrado entre a leitura e a escrita
+        if result.modified_count and legacy_messages:
+            await self._write_buckets(
+                db,
+                session_id=session_id,
+                company_id=session.get("company_id"),
+                first_position=0,
+                messages=legacy_messages,
+            )
+            logger.info(
+                f"Sessao {session_id} migrada para buckets "
+                f"({len(legacy_messages)} mensagens)"
+            )
+
+        return True
+
+    async def get_full_history(self, session_id: str) -> List[Dict[str, Any]]:
+        """Histórico completo, remontado a partir dos buckets"""
+        try:
+            db = mongodb.get_database()
+            cursor = (
+                db[self.bucket_collection_name]
+                .find({"session_id": session_id}, {"messages": 1})
+                .sort("bucket", 1)
+            )
+
+            history = []
+            async for bucket in cursor:
+                history.extend(bucket.get("messages", []))
+            return history
+
+        except Exception as e:
+            logger.error(f"Erro ao obter historico completo: {e}", exc_info=True)
+            return []
+
     async def get_recent_history(
         self, session_id: str, n: int = 4
     ) -> List[Dict[str, Any]]:
@@ -115,28 +404,14 @@ class SessionService:
         rag_hit: bool = False,
     ):
         try:
-            db = mongodb.get_database()
-            collection = db[self.collection_name]
-
-            update_ops = {"$set": {"updated_at": datetime.now()}}
-
-            push_ops = {}
-            if sentiment:
-                push_ops["summary.sentiment_history"] = sentiment
-            if intent:
-                push_ops["summary.intent_history"] = intent
-
-            if push_ops:
-                update_ops["$push"] = push_ops
-
-            if kanban_status:
-                update_ops["$set"]["summary.last_kanban_status"] = kanban_status
-
-            if rag_hit:
-                update_ops["$inc"] = {"summary.rag_hits": 1}
-
-            await collection.update_one({"session_id": session_id}, update_ops)
-
+            await self.commit(
+                self.unit_of_work(session_id).update_summary(
+                    sentiment=sentiment,
+                    intent=intent,
+                    kanban_status=kanban_status,
+                    rag_hit=rag_hit,
+                )
+            )
         except Exception as e:
             logger.error(f"Erro ao atualizar summary: {e}", exc_info=True)
 
@@ -144,15 +419,9 @@ class SessionService:
         self, session_id: str, question: str, relevance_score: float
     ):
         try:
-            db = mongodb.get_database()
-            collection = db[self.collection_name]
-
-            rag_usage = ChatSession.create_rag_usage(question, relevance_score)
-
-            await collection.update_one(
-                {"session_id": session_id}, {"$push": {"rag_context_used": rag_usage}}
+            await self.commit(
+                self.unit_of_work(session_id).add_rag_usage(question, relevance_score)
             )
-
         except Exception as e:
             logger.error(f"Erro ao registrar uso do RAG: {e}", exc_info=True)
 
@@ -162,6 +431,9 @@ class SessionService:
             collection = db[self.collection_name]
 
             result = await collection.delete_one({"session_id": session_id})
+            await db[self.bucket_collection_name].delete_many(
+                {"session_id": session_id}
+            )
 
             if result.deleted_count > 0:
                 return True
@@ -182,23 +454,72 @@ class SessionService:
             logger.error(f"Erro ao buscar sessao: {e}", exc_info=True)
             return None
 
-    async def update_pause_state(
-        self, session_id: str, paused_until: Optional[datetime], last_sender_type: str
-    ):
+    async def list_sessions(
+        self,
+        company_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        count: CountMode = "estimated",
+    ) -> Dict[str, Any]:
+        """Sessões de uma empresa, da atividade mais recente para a mais antiga"""
         try:
-            db = mongodb.get_database()
+            db = mongodb.get_listing_database()
             collection = db[self.collection_name]
 
-            await collection.update_one(
-                {"session_id": session_id},
-                {
-                    "$set": {
-                        "paused_until": paused_until,
-                        "last_sender_type": last_sender_type,
-                        "updated_at": datetime.now(),
-                    }
+            query = {"company_id": company_id}
+
+            total = None if cursor else await count_total(collection, query, count)
+
+            sessions, next_cursor = await fetch_page(
+                collection,
+                query,
+                sort_field="updated_at",
+                limit=limit,
+                cursor=cursor,
+                projection={
+                    "session_id": 1,
+                    "summary.total_interactions": 1,
+                    "summary.last_kanban_status": 1,
+                    "last_sender_type": 1,
+                    "paused_until": 1,
                 },
             )
+
+            return {
+                "total": total,
+                "next_cursor": next_cursor,
+                "sessions": [
+                    {
+                        "session_id": session["session_id"],
+                        "total_interactions": session.get("summary", {}).get(
+                            "total_interactions", 0
+                        ),
+                        "last_kanban_status": session.get("summary", {}).get(
+                            "last_kanban_status"
+                        ),
+                        "last_sender_type": session.get("last_sender_type"),
+                        "paused_until": session.get("paused_until"),
+                        "updated_at": session["updated_at"],
+                    }
+                    for session in sessions
+                ],
+            }
+
+        except InvalidCursorError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao listar sessoes: {e}", exc_info=True)
+            raise
+
+    async def update_pause_state(
+        self, session_id: str, paused_until: Optional[datetime], last_sender_type: str
+    ):
+        try:
+            await self.commit(
+                self.unit_of_work(session_id).set_pause_state(
+                    paused_until, last_sender_type
+                )
+            )
         except Exception as e:
             logger.error(f"Erro ao atualizar estado de pausa: {e}", exc_info=True)
             raise
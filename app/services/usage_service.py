@@ -42,7 +42,7 @@ class UsageService:
             db = mongodb.get_database()
             await db[self.collection_name].insert_one(record.model_dump())
 
-            logger.debug(f"[USAGE] Tokens registrados: {total} (node: {node_name})")
+            logger.debug("[USAGE] Tokens registrados: %d (node: %s)", total, node_name)
             return record
 
         except Exception as e:
@@ -64,7 +64,7 @@ class UsageService:
             end_date: Data final (YYYY-MM-DD)
         """
         try:
-            db = mongodb.get_database()
+            db = mongodb.get_listing_database()
             collection = db[self.collection_name]
 
             match_stage = {}
@@ -140,7 +140,7 @@ class UsageService:
     ) -> List[Dict[str, Any]]:
         """Retorna ranking de empresas por consumo de tokens"""
         try:
-            db = mongodb.get_database()
+            db = mongodb.get_listing_database()
             collection = db[self.collection_name]
 
             pipeline = [
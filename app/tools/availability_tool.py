@@ -1,6 +1,7 @@
 import logging
 from datetime import datetime
 from ..models.scheduling import FullAgenda, FilteredAgenda, AvailabilitySearchParams
+from ..logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +14,9 @@ class AvailabilityTool:
 
         try:
             logger.info(
-                f"[AVAILABILITY] Filtrando: service={params.service_name or params.service_id}"
+                "[AVAILABILITY] Filtrando: service=%s",
+                params.service_name or params.service_id,
+                extra=SAMPLED,
             )
 
             service_id = self._resolve_service_id(agenda, params)
@@ -33,7 +36,10 @@ class AvailabilityTool:
             current_time = now.strftime("%H:%M")
 
             logger.info(
-                f"[AVAILABILITY] Filtrando horários a partir de {current_date} {current_time}"
+                "[AVAILABILITY] Filtrando horários a partir de %s %s",
+                current_date,
+                current_time,
+                extra=SAMPLED,
             )
 
             for prof_id in professionals:
@@ -54,7 +60,7 @@ class AvailabilityTool:
 
                     if check_date < current_date:
                         logger.debug(
-                            f"[AVAILABILITY] Ignorando data passada: {check_date}"
+                            "[AVAILABILITY] Ignorando data passada: %s", check_date
                         )
                         continue
 
@@ -64,7 +70,7 @@ class AvailabilityTool:
                         slots = [slot for slot in slots if slot > current_time]
                         if not slots:
                             logger.debug(
-                                f"[AVAILABILITY] Sem horários futuros para hoje"
+                                "[AVAILABILITY] Sem horários futuros para hoje"
                             )
                             continue
 
@@ -98,7 +104,9 @@ class AvailabilityTool:
             )
 
             logger.info(
-                f"[AVAILABILITY] Encontradas {len(options)} opções (somente futuras)"
+                "[AVAILABILITY] Encontradas %d opções (somente futuras)",
+                len(options),
+                extra=SAMPLED,
             )
             return filtered
 
@@ -0,0 +1,130 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+from .entity_gazetteer import fold_accents
+
+TERM_PATTERN = re.compile(r"\b\w{3,}\b")
+
+# Palavras frequentes em perguntas que não discriminam FAQs
+STOPWORDS = {
+    "com",
+    "que",
+    "uma",
+    "por",
+    "dos",
+    "das",
+    "nos",
+    "nas",
+    "tem",
+    "sim",
+    "nao",
+    "como",
+    "para",
+    "faco",
+    "fazer",
+    "qual",
+    "quais",
+    "quando",
+    "onde",
+    "voces",
+    "esta",
+    "este",
+    "isso",
+    "essa",
+    "esse",
+    "pode",
+    "posso",
+    "minha",
+    "meu",
+    "tenho",
+    "sobre",
+    "mais",
+    "muito",
+    "quero",
+    "gostaria",
+    "saber",
+}
+
+
+def analyze(text: str) -> List[str]:
+    """Termos normalizados (sem acento, minúsculos, 3+ letras, sem stopwords)"""
+    return [t for t in TERM_PATTERN.findall(fold_accents(text)) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 em memória para as FAQs de uma empresa.
+
+    Cada documento é indexado pelos termos de pergunta, resposta e categoria,
+    com a mesma tokenização de `extract_keywords` mas sem o limite de 20
+    palavras e incluindo termos curtos (ex.: "pix"). A busca só visita as
+    postings dos termos da query, então o custo não depende do total de FAQs.
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[Tuple[Dict[str, Any], Iterable[str]]],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.k1 = k1
+        self.b = b
+        self._payloads: List[Dict[str, Any]] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for payload, terms in documents:
+            doc_index = len(self._payloads)
+            counts = Counter(terms)
+            self._payloads.append(payload)
+            self._lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((doc_index, tf))
+
+        total = len(self._payloads)
+        self._avg_length = (sum(self._lengths) / total) if total else 0.0
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        self._mean_idf = sum(self._idf.values()) / len(self._idf) if self._idf else 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self._payloads)
+
+    def search(
+        self, query: str, limit: int
+    ) -> List[Tuple[Dict[str, Any], float, float]]:
+        """
+        (payload, score BM25, cobertura) dos melhores documentos. Cobertura é
+        a fração do peso (IDF) dos termos da query que o documento contém;
+        termos que não existem no índice contam com o IDF médio. Com um piso
+        nela, uma palavra solta em comum ("dia", "corte") não traz FAQ sem
+        relação.
+        """
+        terms = set(analyze(query))
+        query_weight = sum(self._idf.get(term, self._mean_idf) for term in terms)
+
+        scores: Dict[int, float] = {}
+        covered: Dict[int, float] = {}
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            idf = self._idf[term]
+            for doc_index, tf in postings:
+                norm = 1 - self.b + self.b * self._lengths[doc_index] / self._avg_length
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * (
+                    tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                )
+                covered[doc_index] = covered.get(doc_index, 0.0) + idf
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [
+            (self._payloads[i], score, covered[i] / query_weight)
+            for i, score in ranked[:limit]
+        ]
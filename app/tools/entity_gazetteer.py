@@ -0,0 +1,149 @@
+import re
+import unicodedata
+from itertools import islice
+from typing import Any, Dict, List, Optional
+from ..models.scheduling import FullAgenda
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+STOPWORDS = {"de", "da", "do", "das", "dos", "e", "com", "para", "a", "o"}
+
+PROFESSIONAL_TITLES = ("dr", "dra", "doutor", "doutora")
+
+FULL_NAME_SCORE = 1.0
+FIRST_NAME_SCORE = 0.8
+PARTIAL_SCORE = 0.6
+
+# Palavras presentes em muitos serviços não discriminam nada
+MAX_PARTIAL_AMBIGUITY = 5
+
+
+def fold_accents(text: str) -> str:
+    """
+    Remove acentos e coloca em minúsculas, um caractere por caractere do
+    original: os spans do texto dobrado valem no texto original. O lower()
+    é feito por caractere porque pode mudar o tamanho ("İ" vira 2 code points).
+    """
+    return "".join(unicodedata.normalize("NFKD", ch.lower())[0] for ch in text)
+
+
+def tokenize(text: str) -> List[tuple]:
+    """Retorna tokens normalizados com seus spans no texto original"""
+    folded = fold_accents(text)
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(folded)]
+
+
+class EntityGazetteer:
+    """
+    Dicionário de serviços e profissionais de uma agenda, compilado em uma
+    trie de tokens (sem acento).
+
+    A busca percorre a mensagem uma única vez: para cada token, desce na
+    trie enquanto os próximos tokens continuarem casando. O custo depende
+    do tamanho da mensagem e do maior nome cadastrado, não da quantidade
+    de serviços/profissionais.
+    """
+
+    def __init__(self, agenda: FullAgenda):
+        self._root: Dict[str, Any] = {}
+
+        service_tokens = {
+            service_id: [t for t, _, _ in tokenize(service_info.name)]
+            for service_id, service_info in agenda.services.items()
+        }
+
+        token_frequency: Dict[str, int] = {}
+        for tokens in service_tokens.values():
+            for token in set(tokens):
+                token_frequency[token] = token_frequency.get(token, 0) + 1
+
+        for service_id, tokens in service_tokens.items():
+            name = agenda.services[service_id].name
+            self._add(tokens, "service", service_id, name, FULL_NAME_SCORE)
+
+            for token in tokens:
+                frequency = token_frequency[token]
+                if (
+                    len(token) > 3
+                    and token not in STOPWORDS
+                    and frequency <= MAX_PARTIAL_AMBIGUITY
+                ):
+                    self._add(
+                        [token], "service", service_id, name, PARTIAL_SCORE / frequency
+                    )
+
+        for prof_id, prof_info in agenda.professionals.items():
+            tokens = [t for t, _, _ in tokenize(prof_info.name)]
+            if not tokens:
+                continue
+
+            self._add(tokens, "professional", prof_id, prof_info.name, FULL_NAME_SCORE)
+            self._add(
+                tokens[:1], "professional", prof_id, prof_info.name, FIRST_NAME_SCORE
+            )
+            for title in PROFESSIONAL_TITLES:
+                self._add(
+                    [title, tokens[0]],
+                    "professional",
+                    prof_id,
+                    prof_info.name,
+                    FULL_NAME_SCORE,
+                )
+
+    def _add(self, tokens: List[str], kind: str, entity_id: str, name: str, score):
+        if not tokens:
+            return
+
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+
+        entries = node.setdefault("__entries__", {})
+        key = (kind, entity_id)
+        if entries.get(key, (None, 0))[1] < score:
+            entries[key] = (name, score)
+
+    def find_all(self, message: str) -> List[Dict[str, Any]]:
+        """
+        Retorna todas as ocorrências de serviços e profissionais na mensagem.
+
+        Cada match traz tipo, id, nome canônico, span (no texto original)
+        e score (1.0 nome completo, 0.8 primeiro nome, até 0.6 palavra parcial,
+        dividido pelo número de serviços que compartilham a palavra).
+        """
+        tokens = tokenize(message)
+        matches = []
+
+        for i, (_, start, _) in enumerate(tokens):
+            node = self._root
+            for token, _, end in islice(tokens, i, None):
+                node = node.get(token)
+                if node is None:
+                    break
+
+                for (kind, entity_id), (name, score) in node.get(
+                    "__entries__", {}
+                ).items():
+                    matches.append(
+                        {
+                            "type": kind,
+                            "id": entity_id,
+                            "name": name,
+                            "start": start,
+                            "end": end,
+                            "score": score,
+                        }
+                    )
+
+        return matches
+
+    @staticmethod
+    def best(matches: List[Dict[str, Any]], kind: str) -> Optional[Dict[str, Any]]:
+        """Melhor match de um tipo: maior score, depois maior span, depois o primeiro"""
+        candidates = [m for m in matches if m["type"] == kind]
+        if not candidates:
+            return None
+        return max(
+            candidates,
+            key=lambda m: (m["score"], m["end"] - m["start"], -m["start"]),
+        )
@@ -1,12 +1,14 @@
-import re
 import hashlib
 import json
 from typing import List, Dict, Optional
 import logging
 from ..models import IntentAnalysisResult, Intent
 from ..services import openai_service
+from ..services.openai_resilience import has_budget
 from ..database import cache
 from ..config import settings
+from ..metrics import observe_classifier
+from .pattern_matcher import PatternMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -74,73 +76,84 @@ class IntentTool:
             r"\b(atendimento humano|pessoa real)\b",
         ]
 
+        # Ordem = prioridade de classificação
+        self._matcher = PatternMatcher(
+            {
+                "handoff": self.handoff_patterns,
+                "cancellation": self.cancellation_patterns,
+                "reschedule": self.reschedule_patterns,
+                "scheduling": self.scheduling_patterns,
+                "info": self.info_patterns,
+            }
+        )
+        self._pattern_results = {
+            "handoff": (Intent.HUMAN_HANDOFF, "Regex: Handoff"),
+            "cancellation": (Intent.CANCELLATION, "Regex: Cancelamento"),
+            "reschedule": (Intent.RESCHEDULE, "Regex: Reagendamento"),
+            "scheduling": (Intent.SCHEDULING, "Regex: Agendamento"),
+            "info": (Intent.INFO, "Regex: Informação"),
+        }
+
     async def analyze(
         self,
         message: str,
         recent_history: List[Dict[str, str]],
         customer_context: dict = None,
+        deadline: Optional[float] = None,
     ) -> IntentAnalysisResult:
         try:
             cache_key = self._get_cache_key(message, recent_history)
             cached = cache.get(cache_key)
             if cached:
                 logger.debug("Intent cache hit")
+                observe_classifier("intent", "cache")
                 return IntentAnalysisResult(**cached)
 
             pattern_result = self._pattern_match(message)
             if pattern_result:
                 cache.set(cache_key, pattern_result.model_dump(), self.cache_ttl)
+                observe_classifier("intent", "pattern")
                 return pattern_result
 
-            result = await self._call_llm(message, recent_history)
+            if not openai_service.is_available(settings.TOOL_MODEL) or not has_budget(
+                deadline
+            ):
+                logger.warning(
+                    "[INTENT] OpenAI instável ou sem tempo. Usando só os padrões."
+                )
+                observe_classifier("intent", "fallback")
+                return IntentAnalysisResult(
+                    intent=Intent.INFO,
+                    reason="LLM indisponível, classificado como INFO por segurança",
+                )
+
+            result = await self._call_llm(message, recent_history, deadline)
+            observe_classifier("intent", "llm")
 
             cache.set(cache_key, result.model_dump(), self.cache_ttl)
             return result
 
         except Exception as e:
             logger.error(f"Erro na análise de intenção: {e}")
+            observe_classifier("intent", "error")
             return IntentAnalysisResult(
                 intent=Intent.INFO,
                 reason="Erro na análise, classificado como INFO por segurança",
             )
 
     def _pattern_match(self, message: str) -> Optional[IntentAnalysisResult]:
-        message_lower = message.lower()
-
-        for pattern in self.handoff_patterns:
-            if re.search(pattern, message_lower):
-                return IntentAnalysisResult(
-                    intent=Intent.HUMAN_HANDOFF, reason="Regex: Handoff"
-                )
-
-        for pattern in self.cancellation_patterns:
-            if re.search(pattern, message_lower):
-                return IntentAnalysisResult(
-                    intent=Intent.CANCELLATION, reason="Regex: Cancelamento"
-                )
+        category = self._matcher.first(message.lower())
+        if not category:
+            return None
 
-        for pattern in self.reschedule_patterns:
-            if re.search(pattern, message_lower):
-                return IntentAnalysisResult(
-                    intent=Intent.RESCHEDULE, reason="Regex: Reagendamento"
-                )
-
-        for pattern in self.scheduling_patterns:
-            if re.search(pattern, message_lower):
-                return IntentAnalysisResult(
-                    intent=Intent.SCHEDULING, reason="Regex: Agendamento"
-                )
-
-        for pattern in self.info_patterns:
-            if re.search(pattern, message_lower):
-                return IntentAnalysisResult(
-                    intent=Intent.INFO, reason="Regex: Informação"
-                )
-
-        return None
+        intent, reason = self._pattern_results[category]
+        return IntentAnalysisResult(intent=intent, reason=reason)
 
     async def _call_llm(
-        self, message: str, recent_history: List[Dict[str, str]]
+        self,
+        message: str,
+        recent_history: List[Dict[str, str]],
+        deadline: Optional[float] = None,
     ) -> IntentAnalysisResult:
 
         history_text = self._format_history(recent_history)
@@ -161,6 +174,8 @@ Retorne JSON."""
             model=settings.TOOL_MODEL,
             temperature=0.1,
             response_format={"type": "json_object"},
+            hedge=True,
+            deadline=deadline,
         )
 
         result_dict = json.loads(response["content"])
@@ -0,0 +1,58 @@
+import re
+from typing import Dict, List, Optional
+
+
+class PatternMatcher:
+    """
+    Matcher compilado uma única vez para listas de regex por categoria.
+
+    Junta todos os padrões em uma única alternância com um grupo nomeado
+    por categoria. Cada alternativa fica dentro de um lookahead (largura
+    zero), então um padrão longo (ex: com `.*`) não "consome" o texto de
+    outra categoria: a mensagem é varrida em uma passada só.
+
+    A ordem do dict define a prioridade. Quando duas categorias casam na
+    mesma posição, vence a de maior prioridade (`first`). Para `find_all`
+    há uma segunda regex em que cada categoria é um lookahead opcional
+    próprio, então todas as que casam na mesma posição são capturadas.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories = list(categories)
+        self._priority = {name: i for i, name in enumerate(self.categories)}
+
+        bodies = {
+            name: "|".join(f"(?:{p})" for p in patterns)
+            for name, patterns in categories.items()
+        }
+        alternatives = [f"(?=(?P<{name}>{body}))" for name, body in bodies.items()]
+        self._regex = re.compile("|".join(alternatives))
+
+        # Só para nas posições onde algo casa; ali testa cada categoria
+        any_category = "|".join(f"(?:{body})" for body in bodies.values())
+        optional = "".join(
+            f"(?:(?=(?P<{name}>{body})))?" for name, body in bodies.items()
+        )
+        self._all_regex = re.compile(f"(?=(?:{any_category})){optional}")
+
+    def find_all(self, text: str) -> List[str]:
+        """Retorna todas as categorias encontradas, em ordem de prioridade"""
+        hits = set()
+        for match in self._all_regex.finditer(text):
+            hits.update(
+                name for name, value in match.groupdict().items() if value is not None
+            )
+            if len(hits) == len(self.categories):
+                break
+        return sorted(hits, key=self._priority.__getitem__)
+
+    def first(self, text: str) -> Optional[str]:
+        """Retorna a categoria de maior prioridade encontrada (ou None)"""
+        best = None
+        for match in self._regex.finditer(text):
+            priority = self._priority[match.lastgroup]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.categories[best] if best is not None else None
@@ -1,12 +1,14 @@
-import re
 import hashlib
 import json
 from typing import List, Dict, Optional
 import logging
 from ..models import SentimentAnalysisResult, Sentiment
 from ..services import openai_service
+from ..services.openai_resilience import has_budget
 from ..database import cache
 from ..config import settings
+from ..metrics import observe_classifier
+from .pattern_matcher import PatternMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -39,90 +41,118 @@ class SentimentTool:
 
     def __init__(self):
         self.cache_ttl = 3600
+        self._load_patterns()
+
+    def _load_patterns(self):
+        """Carrega padrões Regex para classificação rápida"""
+
+        self.raiva_patterns = [
+            r"\b(absurdo|ridículo|inadmissível|vergonha|palhaçada)\b",
+            r"\b(não aguento|estou farto|chega|basta)\b",
+            r"[!]{2,}",
+        ]
+
+        self.positivo_patterns = [
+            r"\b(obrigad[oa]|agradeço|perfeito|ótimo|excelente|maravilhoso)\b",
+            r"\b(pode marcar|confirmo|fechado|topo|combinado)\b",
+        ]
+
+        self.ansioso_patterns = [
+            r"\b(urgente|rápido|agora|hoje mesmo|preciso)\b",
+            r"\b(não posso esperar|é para já)\b",
+        ]
+
+        self.confuso_patterns = [
+            r"\b(não entend[io]|como assim|o que é)\b",
+            r"\b(explica|dúvida|confus[oa])\b",
+            r"\?{2,}",
+        ]
+
+        self.triste_patterns = [
+            r"\b(difícil|complicad[oa]|não consigo)\b",
+            r"\b(problema|situação difícil)\b",
+        ]
+
+        # Ordem = prioridade de classificação
+        self._matcher = PatternMatcher(
+            {
+                "raiva": self.raiva_patterns,
+                "positivo": self.positivo_patterns,
+                "ansioso": self.ansioso_patterns,
+                "confuso": self.confuso_patterns,
+                "triste": self.triste_patterns,
+            }
+        )
+        self._pattern_results = {
+            "raiva": (Sentiment.RAIVA, 85, "alta"),
+            "positivo": (Sentiment.POSITIVO, 80, "alta"),
+            "ansioso": (Sentiment.ANSIOSO, 75, "média"),
+            "confuso": (Sentiment.CONFUSO, 70, "média"),
+            "triste": (Sentiment.TRISTE, 70, "média"),
+        }
 
     async def analyze(
-        self, message: str, recent_history: List[Dict[str, str]]
+        self,
+        message: str,
+        recent_history: List[Dict[str, str]],
+        deadline: Optional[float] = None,
     ) -> SentimentAnalysisResult:
         try:
             cache_key = self._get_cache_key(message, recent_history)
             cached = cache.get(cache_key)
             if cached:
                 logger.debug("Sentiment cache hit")
+                observe_classifier("sentiment", "cache")
                 return SentimentAnalysisResult(**cached)
 
             quick_result = self._quick_classify(message)
             if quick_result:
                 logger.debug("Sentiment via heurística")
                 cache.set(cache_key, quick_result.model_dump(), self.cache_ttl)
+                observe_classifier("sentiment", "pattern")
                 return quick_result
 
-            result = await self._call_llm(message, recent_history)
+            if not openai_service.is_available(settings.TOOL_MODEL) or not has_budget(
+                deadline
+            ):
+                logger.warning(
+                    "[SENTIMENT] OpenAI instável ou sem tempo. Usando só a heurística."
+                )
+                observe_classifier("sentiment", "fallback")
+                return SentimentAnalysisResult(
+                    sentiment=Sentiment.NEUTRO, score=50, confidence="baixa"
+                )
+
+            result = await self._call_llm(message, recent_history, deadline)
+            observe_classifier("sentiment", "llm")
             cache.set(cache_key, result.model_dump(), self.cache_ttl)
 
-            logger.debug(f"Sentiment via LLM: {result.sentiment}")
+            logger.debug("Sentiment via LLM: %s", result.sentiment)
             return result
 
         except Exception as e:
             logger.error(f"Erro na análise de sentimento: {e}")
+            observe_classifier("sentiment", "error")
             return SentimentAnalysisResult(
                 sentiment=Sentiment.NEUTRO, score=50, confidence="baixa"
             )
 
     def _quick_classify(self, message: str) -> Optional[SentimentAnalysisResult]:
-        """Classificação rápida via regex patterns"""
-        message_lower = message.lower()
-
-        raiva_patterns = [
-            r"\b(absurdo|ridículo|inadmissível|vergonha|palhaçada)\b",
-            r"\b(não aguento|estou farto|chega|basta)\b",
-            r"[!]{2,}",
-        ]
-        if any(re.search(p, message_lower) for p in raiva_patterns):
-            return SentimentAnalysisResult(
-                sentiment=Sentiment.RAIVA, score=85, confidence="alta"
-            )
-
-        positivo_patterns = [
-            r"\b(obrigad[oa]|agradeço|perfeito|ótimo|excelente|maravilhoso)\b",
-            r"\b(pode marcar|confirmo|fechado|topo|combinado)\b",
-        ]
-        if any(re.search(p, message_lower) for p in positivo_patterns):
-            return SentimentAnalysisResult(
-                sentiment=Sentiment.POSITIVO, score=80, confidence="alta"
-            )
-
-        ansioso_patterns = [
-            r"\b(urgente|rápido|agora|hoje mesmo|preciso)\b",
-            r"\b(não posso esperar|é para já)\b",
-        ]
-        if any(re.search(p, message_lower) for p in ansioso_patterns):
-            return SentimentAnalysisResult(
-                sentiment=Sentiment.ANSIOSO, score=75, confidence="média"
-            )
-
-        confuso_patterns = [
-            r"\b(não entend[io]|como assim|o que é)\b",
-            r"\b(explica|dúvida|confus[oa])\b",
-            r"\?{2,}",
-        ]
-        if any(re.search(p, message_lower) for p in confuso_patterns):
-            return SentimentAnalysisResult(
-                sentiment=Sentiment.CONFUSO, score=70, confidence="média"
-            )
-
-        triste_patterns = [
-            r"\b(difícil|complicad[oa]|não consigo)\b",
-            r"\b(problema|situação difícil)\b",
-        ]
-        if any(re.search(p, message_lower) for p in triste_patterns):
-            return SentimentAnalysisResult(
-                sentiment=Sentiment.TRISTE, score=70, confidence="média"
-            )
-
-        return None
+        """Classificação rápida via regex patterns (uma passada só)"""
+        category = self._matcher.first(message.lower())
+        if not category:
+            return None
+
+        sentiment, score, confidence = self._pattern_results[category]
+        return SentimentAnalysisResult(
+            sentiment=sentiment, score=score, confidence=confidence
+        )
 
     async def _call_llm(
-        self, message: str, recent_history: List[Dict[str, str]]
+        self,
+        message: str,
+        recent_history: List[Dict[str, str]],
+        deadline: Optional[float] = None,
     ) -> SentimentAnalysisResult:
         """Chamada LLM para casos ambíguos"""
 
@@ -148,6 +178,8 @@ Retorne APENAS o JSON com o resultado da análise."""
             model=settings.TOOL_MODEL,
             temperature=0.1,
             response_format={"type": "json_object"},
+            hedge=True,
+            deadline=deadline,
         )
 
         result_dict = json.loads(response["content"])
@@ -2,26 +2,47 @@ import logging
 import httpx
 from datetime import datetime
 from arq.connections import RedisSettings
+from prometheus_client import start_http_server
 from tenacity import retry, stop_after_attempt, wait_exponential, RetryError
-from app.database import mongodb
-from app.services import session_service, company_service
-from app.agent import create_agent_graph, GraphState
+from app.database import mongodb, cache
+from app.services import (
+    session_service,
+    company_service,
+    ingestion_service,
+    session_lock,
+    openai_rate_limiter,
+    openai_service,
+)
+from app.services.openai_rate_limiter import PRIORITY_WORKER, PRIORITY_BULK
+from app.agent import get_agent_graph, GraphState
+from app.agent.nodes.load_context import HISTORY_WINDOW
 from app.models import CustomerProfile, ChatResponse
 from app.config import settings
+from app.logging_config import log_context, setup_logging
 
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
 async def startup(ctx):
     await mongodb.connect()
+    company_service.start_config_watch()
+    session_lock.set_redis(ctx.get("redis"))
+    openai_rate_limiter.set_redis(ctx.get("redis"))
+    cache.set_redis(ctx.get("redis"))
+    openai_service.connect()
+    get_agent_graph()
     logger.info("🟢 Worker: Conectado ao MongoDB")
 
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT)
+        logger.info(
+            f"[METRICS] Métricas do worker na porta {settings.WORKER_METRICS_PORT}"
+        )
+
 
 async def shutdown(ctx):
+    await company_service.stop_config_watch()
     await mongodb.close()
     logger.info("🔴 Worker: Desconectado do MongoDB")
 
@@ -71,72 +92,93 @@ async def save_to_dlq(
 
 async def delayed_response_task(
     ctx, session_id: str, user_message: str, company_payload: dict
+):
+    with log_context(
+        request_id=ctx.get("job_id"),
+        session_id=session_id,
+        company_id=company_payload.get("id"),
+    ):
+        await _process_delayed_response(session_id, user_message, company_payload)
+
+
+async def _process_delayed_response(
+    session_id: str, user_message: str, company_payload: dict
 ):
     try:
         logger.info(f"[WORKER] 🔄 Processando mensagem atrasada: {session_id}")
 
-        session = await session_service.get_session(session_id)
-        if not session:
-            logger.warning(f"[WORKER] ⚠️ Sessão não encontrada: {session_id}")
-            return
-
-        if session.get("paused_until") and session["paused_until"] > datetime.now():
-            logger.info(
-                f"[WORKER] ⏸️ Pausa renovada pelo owner. Abortando resposta automática. Session: {session_id}"
+        # Mesma trava do /chat: não roda em paralelo com um turno ao vivo
+        async with session_lock.hold(session_id):
+            session = await session_service.get_session_context(
+                session_id, n=HISTORY_WINDOW
             )
-            return
+            if not session:
+                logger.warning(f"[WORKER] ⚠️ Sessão não encontrada: {session_id}")
+                return
 
-        if session.get("last_sender_type") != "user":
-            logger.info(
-                f"[WORKER] 👤 Última mensagem não é do usuário. Owner assumiu controle. Abortando. Session: {session_id}"
-            )
-            return
+            if session.get("paused_until") and session["paused_until"] > datetime.now():
+                logger.info(
+                    f"[WORKER] ⏸️ Pausa renovada pelo owner. Abortando resposta automática. Session: {session_id}"
+                )
+                return
 
-        company_id = company_payload.get("id")
+            if session.get("last_sender_type") != "user":
+                logger.info(
+                    f"[WORKER] 👤 Última mensagem não é do usuário. Owner assumiu controle. Abortando. Session: {session_id}"
+                )
+                return
 
-        if config_override := company_payload.get("config_override"):
-            company_config = config_override
-        else:
-            config_obj = await company_service.get_config(company_id)
-            company_config = config_obj.model_dump()
+            company_id = company_payload.get("id")
 
-        customer_data = session.get("customer_context", {})
-        customer_profile = CustomerProfile(
-            telefone=customer_data.get("telefone"),
-            nome=customer_data.get("nome"),
-            email=customer_data.get("email"),
-            is_data_complete=customer_data.get("is_data_complete", False),
-        )
+            if config_override := company_payload.get("config_override"):
+                company_config = config_override
+            else:
+                company_config = await company_service.get_config_dict(company_id)
 
-        initial_state = GraphState(
-            company_id=company_id,
-            session_id=session_id,
-            user_message=user_message,
-            company_config=company_config,
-            customer_profile=customer_profile.model_dump(),
-            company_agenda=company_payload.get("agenda"),
-            full_agenda=None,
-            filtered_agenda=None,
-            chat_history=[],
-            recent_history=[],
-            sentiment_result=None,
-            intent_result=None,
-            sentiment_analyzed=False,
-            intent_analyzed=False,
-            tools_validated=False,
-            is_data_complete=customer_profile.is_data_complete,
-            extracted_entities={},
-            final_response=None,
-            tools_called=[],
-            prompt_tokens=0,
-            completion_tokens=0,
-            error=None,
-            llm_response_raw={},
-        )
+            customer_data = session.get("customer_context", {})
+            customer_profile = CustomerProfile(
+                telefone=customer_data.get("telefone"),
+                nome=customer_data.get("nome"),
+                email=customer_data.get("email"),
+                is_data_complete=customer_data.get("is_data_complete", False),
+            )
+
+            initial_state = GraphState(
+                company_id=company_id,
+                session_id=session_id,
+                user_message=user_message,
+                deadline=None,
+                company_config=company_config,
+                customer_profile=customer_profile.model_dump(),
+                company_agenda=company_payload.get("agenda"),
+                full_agenda=None,
+                filtered_agenda=None,
+                entity_gazetteer=None,
+                session_context=session,
+                chat_history=[],
+                recent_history=[],
+                sentiment_result=None,
+                intent_result=None,
+                sentiment_analyzed=False,
+                intent_analyzed=False,
+                tools_validated=False,
+                is_data_complete=customer_profile.is_data_complete,
+                last_kanban_status=None,
+                template_kind=None,
+                extracted_entities={},
+                final_response=None,
+                tools_called=[],
+                prompt_tokens=0,
+                completion_tokens=0,
+                error=None,
+                deadline_exceeded=False,
+                llm_response_raw={},
+            )
 
-        logger.info(f"[WORKER] 🤖 Executando grafo para {session_id}")
-        graph = create_agent_graph()
-        final_state = await graph.ainvoke(initial_state)
+            logger.info(f"[WORKER] 🤖 Executando grafo para {session_id}")
+            graph = get_agent_graph()
+            with openai_rate_limiter.priority(PRIORITY_WORKER):
+                final_state = await graph.ainvoke(initial_state)
 
         if not final_state.get("final_response"):
             logger.error(
@@ -193,8 +235,22 @@ async def delayed_response_task(
         )
 
 
+async def knowledge_ingestion_task(ctx, job_id: str):
+    try:
+        logger.info(f"[WORKER] 📥 Processando ingestão de knowledge: {job_id}")
+        with log_context(request_id=job_id), openai_rate_limiter.priority(
+            PRIORITY_BULK
+        ):
+            await ingestion_service.run_job(job_id)
+    except Exception as e:
+        logger.error(
+            f"[WORKER] ❌ Erro crítico na ingestão {job_id}: {e}",
+            exc_info=True,
+        )
+
+
 class WorkerSettings:
-    functions = [delayed_response_task]
+    functions = [delayed_response_task, knowledge_ingestion_task]
     on_startup = startup
     on_shutdown = shutdown
     redis_settings = RedisSettings.from_dsn(settings.REDIS_URL)
@@ -0,0 +1 @@
+"""Benchmarks de performance do bot (execute com `python -m benchmarks.<nome>`)"""
@@ -0,0 +1,394 @@
+"""
+Teste de carga do pipeline do /chat (e da resposta atrasada do worker).
+
+Gera sessões multi-turno sintéticas (roteiros de benchmarks.corpus, agendas
+de tamanho configurável), dispara os turnos com a concorrência pedida e
+reporta latência p50/p95/p99, vazão, tempo por nó do grafo e operações do
+Mongo por mensagem. Por padrão usa o backend falso da OpenAI
+(LLM_BACKEND=fake), um banco separado (scheduling_bot_bench) e limites de
+taxa desligados, contra o Mongo/Redis locais. Os percentis consideram só os
+turnos bem-sucedidos; os demais aparecem em `status`.
+
+Uso:
+    python -m benchmarks.chat_load --sessions 200 --turns 4 --concurrency 32
+    python -m benchmarks.chat_load --target worker --save baseline.json
+    python -m benchmarks.chat_load --compare baseline.json --max-regression 0.2
+
+Com --target chat as requisições passam pelo app ASGI em processo; com --url
+vão para um servidor já rodando (aí só latência e status são medidos). Com
+--target worker cada turno roda `delayed_response_task` com o webhook
+desligado.
+"""
+
+import os
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("MONGODB_DB_NAME", "scheduling_bot_bench")
+# O alvo é o pipeline, não o controle de admissão (rode com limites reais se quiser)
+os.environ.setdefault("MAX_REQUESTS_PER_SECOND", "1000000")
+os.environ.setdefault("MAX_REQUESTS_PER_MINUTE", "1000000")
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+from pymongo import monitoring
+
+from .workload import build_agenda, build_sessions, chat_payload
+
+SUCCESS = (200, 202, "ok")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MongoOpsListener(monitoring.CommandListener):
+    """Conta comandos do Mongo (por nome) e o tempo gasto neles"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts: Counter = Counter()
+        self.micros = 0
+
+    def started(self, event):
+        self.counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        self.micros += event.duration_micros
+
+    def failed(self, event):
+        self.micros += event.duration_micros
+
+
+class NodeTimer:
+    """Envolve os nós do grafo (antes de compilar) para medir cada um"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def install(self):
+        from app.agent import graph as graph_module
+
+        for name, fn in list(vars(graph_module).items()):
+            if name.endswith("_node") and callable(fn):
+                setattr(graph_module, name, self._wrap(name, fn))
+
+    def _wrap(self, name, fn):
+        async def timed(state):
+            started = time.perf_counter()
+            try:
+                return await fn(state)
+            finally:
+                self.samples[name].append((time.perf_counter() - started) * 1000)
+
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "calls": len(values),
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+            }
+            for name, values in sorted(self.samples.items())
+        }
+
+
+async def _seed_companies(company_ids: List[str]):
+    from app.models import CompanyConfig
+    from app.services import company_service
+
+    for company_id in company_ids:
+        await company_service.create_or_update_config(
+            company_id, CompanyConfig(nicho_mercado="Clínica de Estética")
+        )
+
+
+async def _run_sessions(sessions, concurrency: int, run_turn) -> List[Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Dict[str, Any]] = []
+
+    async def run_session(session):
+        # Turnos da mesma sessão são sequenciais, como num chat real
+        async with semaphore:
+            for message in session.messages:
+                started = time.perf_counter()
+                status = await run_turn(session, message)
+                results.append(
+                    {
+                        "latency_ms": (time.perf_counter() - started) * 1000,
+                        "status": status,
+                    }
+                )
+
+    await asyncio.gather(*(run_session(s) for s in sessions))
+    return results
+
+
+async def bench_chat(args, sessions, agenda, client: httpx.AsyncClient):
+    async def run_turn(session, message):
+        response = await client.post(
+            "/chat", json=chat_payload(session, message, agenda), timeout=120
+        )
+        return response.status_code
+
+    return await _run_sessions(sessions, args.concurrency, run_turn)
+
+
+async def bench_worker(args, sessions, agenda):
+    from app import worker
+    from app.agent.nodes.load_context import HISTORY_WINDOW
+    from app.schemas import ChatSession
+    from app.services import session_service
+
+    async def no_webhook(url, payload, headers):
+        return None
+
+    worker.send_webhook = no_webhook
+
+    for session in sessions:
+        await session_service.load_session_context(
+            session_id=session.session_id,
+            company_id=session.company_id,
+            customer_context={"telefone": session.telefone},
+            n=HISTORY_WINDOW,
+        )
+
+    async def run_turn(session, message):
+        # Mesmo estado que o /chat deixa antes de enfileirar
+        await session_service.commit(
+            session_service.unit_of_work(session.session_id)
+            .append_messages([ChatSession.create_message("user", message)])
+            .set_pause_state(None, "user")
+        )
+        await worker.delayed_response_task(
+            {},
+            session_id=session.session_id,
+            user_message=message,
+            company_payload=chat_payload(session, message, agenda)["company"],
+        )
+        return "ok"
+
+    return await _run_sessions(sessions, args.concurrency, run_turn)
+
+
+def build_report(args, results, elapsed, mongo: Optional[MongoOpsListener], nodes):
+    latencies = [r["latency_ms"] for r in results if r["status"] in SUCCESS]
+    messages = len(results) or 1
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "target": args.target,
+            "sessions": args.sessions,
+            "turns": args.turns,
+            "concurrency": args.concurrency,
+            "companies": args.companies,
+            "agenda": {
+                "professionals": args.professionals,
+                "services": args.services,
+                "days": args.days,
+                "slots_per_day": args.slots,
+            },
+            "seed": args.seed,
+            "llm_backend": os.environ.get("LLM_BACKEND"),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "messages": len(results),
+        "throughput_msgs_s": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "status": dict(Counter(str(r["status"]) for r in results)),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies, default=0.0), 2),
+            "mean": round(sum(latencies) / (len(latencies) or 1), 2),
+        },
+    }
+
+    if nodes is not None:
+        report["nodes"] = nodes.summary()
+
+    if mongo is not None:
+        report["mongo"] = {
+            "ops_per_message": round(sum(mongo.counts.values()) / messages, 2),
+            "time_ms_per_message": round(mongo.micros / 1000 / messages, 3),
+            "by_command": {
+                name: round(count / messages, 2)
+                for name, count in mongo.counts.most_common()
+            },
+        }
+
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    meta = report["meta"]
+    print(
+        f"\n[{meta['target']}] {report['messages']} mensagens | "
+        f"concorrência {meta['concurrency']} | {report['throughput_msgs_s']} msg/s"
+    )
+    print(f"  status: {report['status']}")
+
+    lat = report["latency_ms"]
+    print(
+        f"  latência (ms): p50 {lat['p50']} | p95 {lat['p95']} | "
+        f"p99 {lat['p99']} | max {lat['max']}"
+    )
+
+    if report.get("nodes"):
+        print("  nós do grafo:")
+        for name, stats in report["nodes"].items():
+            print(
+                f"    {name:<32} {stats['mean_ms']:9.2f} ms (p95 "
+                f"{stats['p95_ms']:.2f}) x{stats['calls']}"
+            )
+
+    if report.get("mongo"):
+        mongo = report["mongo"]
+        print(
+            f"  mongo: {mongo['ops_per_message']} ops/msg, "
+            f"{mongo['time_ms_per_message']} ms/msg"
+        )
+        for name, per_message in mongo["by_command"].items():
+            print(f"    {name:<20} {per_message}/msg")
+
+
+def compare(report: Dict[str, Any], baseline_path: str, max_regression: float) -> bool:
+    """Imprime as diferenças para o baseline; False se o p95 piorou além do limite"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    print(f"\nComparação com {baseline_path} ({baseline['meta']['created_at']}):")
+
+    rows = [
+        (f"latência {k}", baseline["latency_ms"][k], report["latency_ms"][k])
+        for k in ("p50", "p95", "p99")
+    ]
+    rows.append(
+        ("vazão msg/s", baseline["throughput_msgs_s"], report["throughput_msgs_s"])
+    )
+    if "mongo" in baseline and "mongo" in report:
+        rows.append(
+            (
+                "mongo ops/msg",
+                baseline["mongo"]["ops_per_message"],
+                report["mongo"]["ops_per_message"],
+            )
+        )
+
+    for label, old, new in rows:
+        delta = (new - old) / old * 100 if old else 0.0
+        print(f"  {label:<16} {old:>10} -> {new:>10} ({delta:+.1f}%)")
+
+    old_p95 = baseline["latency_ms"]["p95"]
+    regressed = old_p95 and report["latency_ms"]["p95"] > old_p95 * (1 + max_regression)
+    if regressed:
+        print(f"  ❌ p95 piorou mais que {max_regression:.0%}")
+    return not regressed
+
+
+async def run(args) -> Dict[str, Any]:
+    sessions = build_sessions(
+        args.sessions, args.companies, args.turns, seed=args.seed, prefix=args.prefix
+    )
+    agenda = build_agenda(
+        professionals=args.professionals,
+        services=args.services,
+        days=args.days,
+        slots_per_day=args.slots,
+        seed=args.seed,
+    )
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url) as client:
+            started = time.perf_counter()
+            results = await bench_chat(args, sessions, agenda, client)
+            return build_report(
+                args, results, time.perf_counter() - started, None, None
+            )
+
+    mongo = MongoOpsListener()
+    monitoring.register(mongo)
+
+    nodes = NodeTimer()
+    nodes.install()
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        await _seed_companies(sorted({s.company_id for s in sessions}))
+
+        if args.target == "worker":
+            mongo.reset()
+            started = time.perf_counter()
+            results = await bench_worker(args, sessions, agenda)
+        else:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                mongo.reset()
+                started = time.perf_counter()
+                results = await bench_chat(args, sessions, agenda, client)
+
+        elapsed = time.perf_counter() - started
+
+    return build_report(args, results, elapsed, mongo, nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target", choices=["chat", "worker"], default="chat")
+    parser.add_argument("--url", default=None, help="Servidor já rodando (só /chat)")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--professionals", type=int, default=3)
+    parser.add_argument("--services", type=int, default=5)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--slots", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--prefix",
+        default=f"bench{int(time.time())}",
+        help="Prefixo dos session_ids (novo a cada execução por padrão)",
+    )
+    parser.add_argument("--save", default=None, help="Grava o relatório em JSON")
+    parser.add_argument("--compare", default=None, help="Baseline JSON anterior")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.url and args.target == "worker":
+        parser.error("--url só vale para --target chat")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nRelatório salvo em {args.save}")
+
+    if args.compare and not compare(report, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
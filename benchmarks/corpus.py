@@ -0,0 +1,88 @@
+"""Corpus de mensagens reais (anonimizadas) em português para benchmarks"""
+
+PT_BR_MESSAGES = [
+    "Oi, boa tarde!",
+    "Quero marcar uma limpeza de pele",
+    "Tem horário amanhã de manhã?",
+    "Pode ser quinta às 14h com a Ana",
+    "Confirmo, pode marcar",
+    "Fechado!",
+    "Preciso remarcar meu horário, surgiu um imprevisto e não vou conseguir ir",
+    "Dá pra trocar para outro dia?",
+    "Quero cancelar minha consulta",
+    "Desisto, não quero mais ir",
+    "Quanto custa o peeling?",
+    "Onde fica a clínica?",
+    "Vocês aceitam convênio?",
+    "Como funciona a drenagem linfática?",
+    "Quero falar com atendente",
+    "Preciso de ajuda, não estou entendendo nada",
+    "Isso é um absurdo!!",
+    "Que palhaçada, estou esperando há horas",
+    "Obrigada, você foi ótima",
+    "Perfeito, muito obrigado!",
+    "É urgente, preciso hoje mesmo",
+    "Não posso esperar até semana que vem",
+    "Como assim? Não entendi",
+    "O que é microagulhamento???",
+    "Está difícil conseguir um horário, não consigo ir durante a semana",
+    "Tive um problema com o pagamento",
+    "ok",
+    "Maria Souza",
+    "meu email é maria@email.com",
+    "Sexta às 10h está ótimo",
+    "Tem vaga com o João na segunda?",
+    "Prefiro à tarde, depois do almoço",
+    "Qual o valor da massagem relaxante?",
+    "Gostaria de fazer uma avaliação",
+    "Vou pensar e depois te falo",
+    "beleza, até mais",
+    "Pode me mandar o endereço?",
+    "Quero reagendar para outro horário, pode ser?",
+    "Não quero mais, esquece",
+    "Estou farto de esperar resposta",
+]
+
+# Conversas multi-turno por intenção; cada sessão sintética segue um roteiro
+SCENARIOS = {
+    "scheduling": [
+        "Oi, boa tarde!",
+        "Quero marcar uma limpeza de pele",
+        "Tem horário amanhã de manhã?",
+        "Maria Souza",
+        "Sexta às 10h está ótimo",
+        "Confirmo, pode marcar",
+    ],
+    "info": [
+        "Oi, boa tarde!",
+        "Quanto custa o peeling?",
+        "Como funciona a drenagem linfática?",
+        "Pode me mandar o endereço?",
+        "Perfeito, muito obrigado!",
+    ],
+    "reschedule": [
+        "Preciso remarcar meu horário, surgiu um imprevisto e não vou conseguir ir",
+        "Dá pra trocar para outro dia?",
+        "Prefiro à tarde, depois do almoço",
+        "Fechado!",
+    ],
+    "cancellation": [
+        "Quero cancelar minha consulta",
+        "Desisto, não quero mais ir",
+        "beleza, até mais",
+    ],
+    "handoff": [
+        "Preciso de ajuda, não estou entendendo nada",
+        "Isso é um absurdo!!",
+        "Quero falar com atendente",
+    ],
+}
+
+# Proporção aproximada de cada roteiro no tráfego
+SCENARIO_WEIGHTS = {
+    "scheduling": 0.45,
+    "info": 0.25,
+    "reschedule": 0.12,
+    "cancellation": 0.1,
+    "handoff": 0.08,
+}
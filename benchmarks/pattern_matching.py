@@ -0,0 +1,89 @@
+"""
+Benchmark dos fast paths de regex (intent + sentiment).
+
+Compara a varredura antiga (um `re.search` por padrão, categoria por
+categoria) com o `PatternMatcher` compilado, e confere que ambos chegam
+à mesma classificação para todo o corpus.
+
+Uso:
+    python -m benchmarks.pattern_matching [--rounds 200]
+"""
+
+import argparse
+import re
+import time
+
+from app.tools import intent_tool, sentiment_tool
+from .corpus import PT_BR_MESSAGES
+
+
+def _legacy_first(categories, text):
+    for name, patterns in categories:
+        if any(re.search(p, text) for p in patterns):
+            return name
+    return None
+
+
+def _bench(fn, messages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            fn(message.lower())
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    matchers = {
+        "intent": (
+            intent_tool._matcher,
+            [
+                ("handoff", intent_tool.handoff_patterns),
+                ("cancellation", intent_tool.cancellation_patterns),
+                ("reschedule", intent_tool.reschedule_patterns),
+                ("scheduling", intent_tool.scheduling_patterns),
+                ("info", intent_tool.info_patterns),
+            ],
+        ),
+        "sentiment": (
+            sentiment_tool._matcher,
+            [
+                ("raiva", sentiment_tool.raiva_patterns),
+                ("positivo", sentiment_tool.positivo_patterns),
+                ("ansioso", sentiment_tool.ansioso_patterns),
+                ("confuso", sentiment_tool.confuso_patterns),
+                ("triste", sentiment_tool.triste_patterns),
+            ],
+        ),
+    }
+
+    print(f"Corpus: {len(PT_BR_MESSAGES)} mensagens x {args.rounds} rodadas\n")
+
+    for name, (matcher, categories) in matchers.items():
+        mismatches = [
+            m
+            for m in PT_BR_MESSAGES
+            if matcher.first(m.lower()) != _legacy_first(categories, m.lower())
+        ]
+
+        legacy_us = _bench(
+            lambda text: _legacy_first(categories, text), PT_BR_MESSAGES, args.rounds
+        )
+        compiled_us = _bench(matcher.first, PT_BR_MESSAGES, args.rounds)
+
+        print(f"[{name}]")
+        print(f"  legado:    {legacy_us:8.2f} us/msg")
+        print(f"  compilado: {compiled_us:8.2f} us/msg")
+        print(f"  speedup:   {legacy_us / compiled_us:8.2f}x")
+        print(f"  divergências: {len(mismatches)}")
+        for m in mismatches:
+            print(f"    - {m!r}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
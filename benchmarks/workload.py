@@ -0,0 +1,113 @@
+"""Geração determinística de agendas, empresas e sessões para os benchmarks"""
+
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+from .corpus import SCENARIOS, SCENARIO_WEIGHTS
+
+SERVICE_NAMES = [
+    "Limpeza de Pele",
+    "Peeling Facial",
+    "Consulta Fisioterapia",
+    "Massoterapia",
+    "Corte Masculino",
+    "Drenagem Linfática",
+    "Microagulhamento",
+    "Avaliação",
+]
+
+PROFESSIONAL_NAMES = ["Ana", "Maria", "João", "Carla", "Pedro", "Beatriz", "Lucas"]
+
+
+def build_agenda(
+    professionals: int = 3,
+    services: int = 5,
+    days: int = 5,
+    slots_per_day: int = 8,
+    start: date = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Agenda no formato do ChatRequest (ver exemplo_agenda.json)"""
+    rng = random.Random(seed)
+    start = start or date.today() + timedelta(days=1)
+
+    service_ids = [f"S{i + 1}" for i in range(services)]
+    agenda: Dict[str, Any] = {
+        "professionals": {},
+        "services": {
+            sid: {
+                "name": SERVICE_NAMES[i % len(SERVICE_NAMES)],
+                "duration": 60,
+                "price": rng.choice([80, 150, 180, 200, 220]),
+            }
+            for i, sid in enumerate(service_ids)
+        },
+        "availability": {},
+    }
+
+    for p in range(professionals):
+        pid = f"A{p + 1}"
+        offered = rng.sample(service_ids, k=min(len(service_ids), rng.randint(1, 3)))
+        agenda["professionals"][pid] = {
+            "name": PROFESSIONAL_NAMES[p % len(PROFESSIONAL_NAMES)],
+            "services": offered,
+        }
+        agenda["availability"][pid] = {
+            sid: {
+                (start + timedelta(days=d)).isoformat(): [
+                    f"{8 + h:02d}:00" for h in range(slots_per_day)
+                ]
+                for d in range(days)
+            }
+            for sid in offered
+        }
+
+    return agenda
+
+
+@dataclass
+class SyntheticSession:
+    session_id: str
+    company_id: str
+    telefone: str
+    scenario: str
+    messages: List[str]
+
+
+def build_sessions(
+    count: int, companies: int, turns: int, seed: int = 0, prefix: str = "bench"
+) -> List[SyntheticSession]:
+    """Sessões com roteiros sorteados por SCENARIO_WEIGHTS (até `turns` mensagens)"""
+    rng = random.Random(seed)
+    names = list(SCENARIO_WEIGHTS)
+    weights = [SCENARIO_WEIGHTS[n] for n in names]
+
+    sessions = []
+    for i in range(count):
+        scenario = rng.choices(names, weights=weights)[0]
+        sessions.append(
+            SyntheticSession(
+                session_id=f"{prefix}-{seed}-{i}",
+                company_id=f"{prefix}_company_{i % companies}",
+                telefone=f"5511{9000000 + i:08d}",
+                scenario=scenario,
+                messages=SCENARIOS[scenario][:turns],
+            )
+        )
+    return sessions
+
+
+def chat_payload(
+    session: SyntheticSession, message: str, agenda: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        "session_id": session.session_id,
+        "company": {
+            "id": session.company_id,
+            "nome": session.company_id.replace("_", " ").title(),
+            "agenda": agenda,
+        },
+        "cliente": {"telefone": session.telefone, "mensagem": message},
+    }